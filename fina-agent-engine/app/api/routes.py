@@ -1,27 +1,44 @@
 import os
-import shutil
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, File, Form, HTTPException, Query, UploadFile
 from fastapi.responses import StreamingResponse
 
+from app.api.uploads import save_upload_stream
 from app.core.dependencies import (
     ApprovalServiceDep,
     ChatServiceDep,
+    IngestionJobsDep,
     IngestionServiceDep,
     MCPClientDep,
     ThreadServiceDep,
 )
-from app.core.exceptions import FinaAgentException, ValidationError
+from app.core.exceptions import FinaAgentException, PayloadTooLargeError, ValidationError
 from app.core.logger import get_logger
 from app.schemas.approval_request import ApprovalRequest
 from app.schemas.requests import ChatRequest
 from app.schemas.responses import (
     ApprovalResponse,
     ChatResponse,
+    DocumentDeletionResponse,
+    EmbeddingCacheStats,
     HealthResponse,
-    IngestionResponse,
+    IngestionJobResponse,
+    MCPBreakerStats,
+    MCPPoolStats,
+    PortfolioCacheStats,
+    SearchBatchingStats,
+    SearchPoolStats,
+    TenantIndexStats,
     ThreadStatusResponse,
+    VectorIndexStats,
 )
+from app.service.embedding_cache import embedding_cache
+from app.service.query_batcher import query_batcher
+from app.service.search_pool import loop_monitor, search_pool
+from app.service.vector_store import tenant_for, tenant_indexes, vector_index
 
 # Configuration
 logger = get_logger("API_ROUTES")
@@ -153,6 +170,14 @@ async def health_check(mcp_client: MCPClientDep) -> HealthResponse:
     - MCP server connectivity (Node B)
     - API key configuration validation
     - Vector database status
+    - Resident vector index load time and size
+    - Resident tenant indexes and their memory use
+    - Embedding cache hit/miss counters
+    - Vector search batch sizes and queueing delay
+    - Search pool timings and event loop blocking
+    - MCP session pool latency and coalesced tool calls
+    - Node B circuit breaker state, retries and hedged requests
+    - Portfolio cache hits, revalidations and invalidations
     
     Args:
         mcp_client: Injected MCPClient dependency
@@ -169,56 +194,155 @@ async def health_check(mcp_client: MCPClientDep) -> HealthResponse:
             "groq": bool(os.getenv("GROQ_API_KEY")),
             "huggingface": bool(os.getenv("HUGGINGFACEHUB_API_TOKEN"))
         },
-        vector_db="exists" if os.path.exists("data/vector_db") else "empty"
+        vector_db="exists" if os.path.exists("data/vector_db") else "empty",
+        vector_index=VectorIndexStats(**vector_index.stats()),
+        tenant_indexes=TenantIndexStats(**tenant_indexes.stats()),
+        embedding_cache=EmbeddingCacheStats(**embedding_cache.stats()),
+        search_batching=SearchBatchingStats(**query_batcher.stats()),
+        search_pool=SearchPoolStats(
+            **search_pool.stats(),
+            **{f"loop_{k}": v for k, v in loop_monitor.stats().items() if k != "samples"}
+        ),
+        mcp_pool=MCPPoolStats(**mcp_client.pool.stats(), **mcp_client.flights.stats()),
+        mcp_breaker=MCPBreakerStats(**mcp_client.resilience.stats()),
+        portfolio_cache=PortfolioCacheStats(**mcp_client.cache.stats())
     )
 
 
 
-@router.post("/ingest", response_model=IngestionResponse, tags=["Data Ingestion"])
+@router.post(
+    "/ingest",
+    response_model=IngestionJobResponse,
+    status_code=202,
+    tags=["Data Ingestion"]
+)
 async def upload_pdf(
+    ingestion_jobs: IngestionJobsDep,
     file: UploadFile = File(...),
-    ingest_service: IngestionServiceDep = None
-) -> IngestionResponse:
-    """PDF Ingestion Endpoint: Processes PDF files for vector database storage.
+    issuer: Optional[str] = Form(None, max_length=100),
+    report_date: Optional[date] = Form(None),
+    user_id: str = Form(..., min_length=1, max_length=100)
+) -> IngestionJobResponse:
+    """PDF Ingestion Endpoint: Queues PDF files for vector database storage.
     
-    Validates file type, processes the PDF into chunks, and stores
-    in the vector database for RAG retrieval.
+    Validates file type, stores the upload and returns immediately with a
+    job id. A background worker then processes the PDF into chunks and
+    appends them to the vector database for RAG retrieval. Files whose
+    SHA256 hash is already registered are skipped without re-embedding.
     
     Args:
+        ingestion_jobs: Injected IngestionJobManager dependency
         file: Uploaded PDF file
-        ingest_service: Injected IngestionService dependency
+        issuer: Optional issuer or ticker, used by filtered document search
+        report_date: Optional report date, used by filtered document search
+        user_id: Owner of the document (selects the vector store)
         
     Returns:
-        IngestionResponse with processing results
+        IngestionJobResponse for the queued job (HTTP 202)
         
     Raises:
         ValidationError: If file is not a PDF
-        HTTPException: On processing errors
+        PayloadTooLargeError: If file exceeds MAX_PDF_SIZE_MB
+        HTTPException: On queueing errors
     """
     if not file.filename.lower().endswith(".pdf"):
         raise ValidationError("Only PDF files are allowed")
 
-    os.makedirs("data", exist_ok=True)
-    temp_path = f"data/temp_{file.filename}"
-
+    temp_path = None
     try:
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # Process the PDF
-        chunks = await ingest_service.process_pdf(temp_path)
+        # Chunked async write, hashed on the fly, aborted past MAX_PDF_SIZE_MB
+        upload = await save_upload_stream(file)
+        temp_path = upload.path
 
-        return IngestionResponse(
-            status="success",
-            filename=file.filename,
-            chunks_processed=chunks,
-            storage_mode="Cloud API (Zero Disk Impact)"
+        # The worker owns the temp file from here on and removes it when done
+        job = await ingestion_jobs.submit(
+            temp_path,
+            file.filename,
+            file_hash=upload.sha256,
+            issuer=issuer,
+            report_date=report_date.isoformat() if report_date else None,
+            tenant=tenant_for(user_id)
         )
-    except ValidationError:
+        return IngestionJobResponse(**job)
+    except (ValidationError, PayloadTooLargeError):
         raise
     except Exception as e:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+        if isinstance(e, FinaAgentException):
+            raise HTTPException(status_code=e.status_code, detail=e.message)
         logger.error(f"Ingestion error: {e}")
         raise HTTPException(status_code=500, detail=f"Ingestion failed: {str(e)}")
-    finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+
+
+@router.get("/ingest/{job_id}", response_model=IngestionJobResponse, tags=["Data Ingestion"])
+async def get_ingestion_job(
+    job_id: str,
+    ingestion_jobs: IngestionJobsDep
+) -> IngestionJobResponse:
+    """Ingestion Status Endpoint: Reports progress of a background ingestion job.
+    
+    Args:
+        job_id: Identifier returned by POST /ingest
+        ingestion_jobs: Injected IngestionJobManager dependency
+        
+    Returns:
+        IngestionJobResponse with pages parsed, chunks embedded and ETA
+        
+    Raises:
+        HTTPException: If the job does not exist
+    """
+    job = await ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingestion job '{job_id}' not found")
+    return IngestionJobResponse(**job)
+
+
+@router.get("/ingest/{job_id}/events", tags=["Data Ingestion"])
+async def stream_ingestion_job(
+    job_id: str,
+    ingestion_jobs: IngestionJobsDep
+):
+    """
+    Ingestion Progress Stream: Returns a Server-Sent Events (SSE) stream
+    of job progress until the job finishes.
+
+    Raises:
+        HTTPException: If the job does not exist
+    """
+    if await ingestion_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Ingestion job '{job_id}' not found")
+    return StreamingResponse(
+        ingestion_jobs.events(job_id),
+        media_type="text/event-stream"
+    )
+
+
+@router.delete("/ingest/{file_hash}", response_model=DocumentDeletionResponse, tags=["Data Ingestion"])
+async def delete_document(
+    file_hash: str,
+    ingest_service: IngestionServiceDep,
+    user_id: str = Query(..., min_length=1, max_length=100)
+) -> DocumentDeletionResponse:
+    """Document Removal Endpoint: Deletes an ingested PDF's vectors by hash.
+    
+    Args:
+        file_hash: SHA256 hash returned when the document was ingested
+        ingest_service: Injected IngestionService dependency
+        user_id: Owner of the document (selects the vector store)
+        
+    Returns:
+        DocumentDeletionResponse with the number of chunks removed
+        
+    Raises:
+        HTTPException: If the document is unknown or removal fails
+    """
+    try:
+        chunks = await ingest_service.delete_document(file_hash, tenant=tenant_for(user_id))
+        return DocumentDeletionResponse(
+            status="deleted",
+            file_hash=file_hash,
+            chunks_deleted=chunks
+        )
+    except FinaAgentException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
@@ -0,0 +1,74 @@
+"""Streaming persistence of uploaded files.
+
+Uploads are copied to disk in fixed-size chunks without blocking the event
+loop, hashed incrementally while they are written, and rejected as soon as
+they exceed the configured size limit.
+"""
+
+import asyncio
+import hashlib
+import os
+import uuid
+from typing import NamedTuple
+
+from fastapi import UploadFile
+
+from app.core.exceptions import PayloadTooLargeError
+from app.core.logger import get_logger
+from app.core.settings import settings
+
+logger = get_logger("UPLOADS")
+
+
+class StoredUpload(NamedTuple):
+    """An upload persisted to a temporary file."""
+
+    path: str
+    sha256: str
+    size: int
+
+
+def max_upload_bytes() -> int:
+    """Configured upload size limit in bytes."""
+    return settings.MAX_PDF_SIZE_MB * 1024 * 1024
+
+
+async def save_upload_stream(file: UploadFile, directory: str = None) -> StoredUpload:
+    """Write an upload to a uniquely named temporary file.
+
+    Args:
+        file: Uploaded file
+        directory: Destination directory (defaults to settings.DATA_DIR)
+
+    Returns:
+        StoredUpload with the temp path, SHA256 and size in bytes
+
+    Raises:
+        PayloadTooLargeError: If the upload exceeds settings.MAX_PDF_SIZE_MB
+    """
+    limit = max_upload_bytes()
+    if file.size is not None and file.size > limit:
+        raise PayloadTooLargeError(settings.MAX_PDF_SIZE_MB)
+
+    directory = directory or settings.DATA_DIR
+    os.makedirs(directory, exist_ok=True)
+    # Unique names: concurrent uploads of the same filename never collide
+    path = os.path.join(directory, f"temp_{uuid.uuid4().hex}.pdf")
+
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with open(path, "wb") as buffer:
+            while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > limit:
+                    raise PayloadTooLargeError(settings.MAX_PDF_SIZE_MB)
+                hasher.update(chunk)
+                await asyncio.to_thread(buffer.write, chunk)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    logger.info(f"Upload stored ({size} bytes, Hash: {hasher.hexdigest()[:10]})")
+    return StoredUpload(path, hasher.hexdigest(), size)
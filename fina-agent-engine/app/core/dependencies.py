@@ -11,6 +11,7 @@ from fastapi import Depends
 from app.graph.builder import graph_manager
 from app.service.approval_service import ApprovalService
 from app.service.chat_service import ChatService
+from app.service.ingestion_jobs import IngestionJobManager, ingestion_jobs
 from app.service.ingestion_service import IngestionService
 from app.service.mcp_client import MCPClient
 from app.service.thread_service import ThreadService
@@ -61,9 +62,19 @@ def get_ingestion_service() -> IngestionService:
     return IngestionService()
 
 
+def get_ingestion_jobs() -> IngestionJobManager:
+    """Provide the process-wide IngestionJobManager.
+    
+    Returns:
+        Shared IngestionJobManager started by the app lifespan
+    """
+    return ingestion_jobs
+
+
 # Type annotations for dependency injection
 ChatServiceDep = Annotated[ChatService, Depends(get_chat_service)]
 ApprovalServiceDep = Annotated[ApprovalService, Depends(get_approval_service)]
 ThreadServiceDep = Annotated[ThreadService, Depends(get_thread_service)]
 MCPClientDep = Annotated[MCPClient, Depends(get_mcp_client)]
 IngestionServiceDep = Annotated[IngestionService, Depends(get_ingestion_service)]
+IngestionJobsDep = Annotated[IngestionJobManager, Depends(get_ingestion_jobs)]
@@ -43,6 +43,18 @@ class MCPConnectionError(FinaAgentException):
         super().__init__(message, status_code=503)
 
 
+class CircuitOpenError(MCPConnectionError):
+    """Calls to the MCP server are failing fast.
+    
+    Raised while the circuit breaker is open after repeated failures,
+    instead of waiting on an unhealthy server.
+    """
+    
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"MCP server unavailable, circuit open (retry in {retry_after:.1f}s)")
+
+
 class IngestionError(FinaAgentException):
     """PDF ingestion or vector database error.
     
@@ -54,6 +66,27 @@ class IngestionError(FinaAgentException):
         super().__init__(message, status_code=422)
 
 
+class ReadOnlyDocstoreError(FinaAgentException):
+    """Write attempted on a resident, read-only docstore.
+    
+    Raised when chunks are deleted from a snapshot that is memory-mapped
+    for search instead of a writable copy of it.
+    """
+    
+    def __init__(self):
+        super().__init__("Resident docstores are read-only; load a writable copy", status_code=500)
+
+
+class IngestionQueueFullError(FinaAgentException):
+    """Ingestion job queue is at capacity.
+    
+    Raised when a new upload cannot be queued for background processing.
+    """
+    
+    def __init__(self):
+        super().__init__("Ingestion queue is full, retry later", status_code=503)
+
+
 class AuthorizationError(FinaAgentException):
     """Authorization/governance error.
     
@@ -75,6 +108,16 @@ class ValidationError(FinaAgentException):
         super().__init__(message, status_code=400)
 
 
+class PayloadTooLargeError(FinaAgentException):
+    """Uploaded file exceeds the configured size limit.
+    
+    Raised while streaming an upload as soon as the limit is crossed.
+    """
+    
+    def __init__(self, max_size_mb: int):
+        super().__init__(f"File exceeds the {max_size_mb} MB upload limit", status_code=413)
+
+
 class ThreadNotFoundError(FinaAgentException):
     """Thread ID not found in database.
     
@@ -85,6 +128,16 @@ class ThreadNotFoundError(FinaAgentException):
         super().__init__(f"Thread ID '{thread_id}' not found", status_code=404)
 
 
+class DocumentNotFoundError(FinaAgentException):
+    """Document hash not found in the vector database registry.
+    
+    Raised when attempting to remove a document that was never ingested.
+    """
+    
+    def __init__(self, file_hash: str):
+        super().__init__(f"Document '{file_hash}' not found", status_code=404)
+
+
 class ConflictOfInterestError(AuthorizationError):
     """Conflict of interest in approval process.
     
@@ -1,3 +1,4 @@
+import json
 import os
 from typing import Dict
 
@@ -43,6 +44,33 @@ class Settings:
     # MCP Server configuration
     MCP_HOST: str = "mcp-data-server"
     MCP_PORT: int = 8001
+    # 'sse' (GET /sse stream + POST /messages) or 'streamable_http' (POST /mcp)
+    MCP_TRANSPORT: str = os.getenv("MCP_TRANSPORT", "sse")
+    # Warm, initialized sessions shared by all tool calls to Node B
+    MCP_POOL_SIZE: int = int(os.getenv("MCP_POOL_SIZE", "4"))
+    MCP_POOL_WARM_SESSIONS: int = 1
+    MCP_MAX_IN_FLIGHT_PER_SESSION: int = 8
+    # Identical concurrent tool calls share one request
+    MCP_SINGLE_FLIGHT: bool = os.getenv("MCP_SINGLE_FLIGHT", "true").lower() == "true"
+    # Deadline per attempt and for a call including its retries
+    MCP_CALL_TIMEOUT_SECONDS: float = float(os.getenv("MCP_CALL_TIMEOUT_SECONDS", "5"))
+    MCP_CALL_DEADLINE_SECONDS: float = float(os.getenv("MCP_CALL_DEADLINE_SECONDS", "12"))
+    MCP_MAX_RETRIES: int = 2
+    MCP_RETRY_BACKOFF_SECONDS: float = 0.2
+    MCP_RETRY_BACKOFF_MAX_SECONDS: float = 2.0
+    # Consecutive failures that open the circuit, and its cool-down
+    MCP_BREAKER_FAILURE_THRESHOLD: int = 5
+    MCP_BREAKER_RESET_SECONDS: float = float(os.getenv("MCP_BREAKER_RESET_SECONDS", "30"))
+    # Hedge an attempt slower than this latency percentile of recent calls (0 disables)
+    MCP_HEDGE_PERCENTILE: float = float(os.getenv("MCP_HEDGE_PERCENTILE", "0"))
+    MCP_HEDGE_MIN_SAMPLES: int = 20
+    MCP_HEDGE_WINDOW: int = 200
+    MCP_HEALTH_TIMEOUT_SECONDS: float = float(os.getenv("MCP_HEALTH_TIMEOUT_SECONDS", "2"))
+    # Per-user portfolio cache; entries are dropped when Node B pushes a change
+    PORTFOLIO_CACHE_MAX_USERS: int = int(os.getenv("PORTFOLIO_CACHE_MAX_USERS", "1000"))
+    PORTFOLIO_CACHE_TTL_SECONDS: float = float(os.getenv("PORTFOLIO_CACHE_TTL_SECONDS", "300"))
+    # Node B's interval between checks for writes; entries older than this are revalidated
+    PORTFOLIO_WATCH_INTERVAL_SECONDS: float = float(os.getenv("PORTFOLIO_WATCH_INTERVAL", "0.5"))
     
     # LLM Configuration
     LLM_MODEL: str = "llama-3.1-8b-instant" #"llama-3.3-70b-versatile"
@@ -55,14 +83,124 @@ class Settings:
     HUGGINGFACEHUB_API_TOKEN: str = os.getenv("HUGGINGFACEHUB_API_TOKEN", "")
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
     
+    # Embedding cache (content-addressed, SQLite-backed with in-memory LRU)
+    EMBEDDING_CACHE_ENABLED: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_PATH: str = "data/embedding_cache.sqlite"
+    EMBEDDING_CACHE_LRU_SIZE: int = 10000
+    
+    # Embedding pipeline (batching, bounded parallelism and retry on 429/5xx)
+    EMBEDDING_BATCH_SIZE: int = 32
+    # Concurrent embedding requests across all ingestion jobs of the process
+    EMBEDDING_MAX_IN_FLIGHT: int = 4
+    EMBEDDING_MAX_RETRIES: int = 5
+    EMBEDDING_RETRY_BASE_DELAY: float = 0.5
+    EMBEDDING_RETRY_MAX_DELAY: float = 30.0
+    
+    # Background ingestion jobs
+    INGESTION_JOBS_DB_PATH: str = "data/ingestion_jobs.sqlite"
+    INGESTION_WORKERS: int = 2
+    INGESTION_QUEUE_SIZE: int = 100
+    INGESTION_PROGRESS_INTERVAL: float = 1.0
+    
     # Chunking configuration
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
     
+    # Token-aware chunking: "token" sizes chunks by the embedding model's
+    # input limit and follows headings, tables and pages; "character" uses
+    # CHUNK_SIZE/CHUNK_OVERLAP
+    CHUNKING_STRATEGY: str = os.getenv("CHUNKING_STRATEGY", "token")
+    EMBEDDING_MAX_TOKENS: int = 256
+    CHUNK_OVERLAP_TOKENS: int = 16
+    
+    # Near-duplicate chunks (disclaimers, risk factors, legal notices repeated
+    # across reports) are linked to the chunk already indexed instead of being
+    # embedded again: MinHash over word shingles, with LSH bands for lookup
+    NEAR_DUPLICATE_DEDUP: bool = os.getenv("NEAR_DUPLICATE_DEDUP", "true").lower() == "true"
+    NEAR_DUPLICATE_THRESHOLD: float = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.9"))
+    NEAR_DUPLICATE_NUM_PERM: int = 64
+    NEAR_DUPLICATE_BANDS: int = 16
+    NEAR_DUPLICATE_SHINGLE_WORDS: int = 5
+    NEAR_DUPLICATE_MIN_WORDS: int = 20
+    
+    # PDF parsing process pool (keeps CPU-bound work off the event loop)
+    PDF_PARSER_WORKERS: int = int(os.getenv("PDF_PARSER_WORKERS", min(4, os.cpu_count() or 1)))
+    PDF_PAGES_PER_TASK: int = 16
+    
+    # Vector index type as a FAISS factory string: "Flat" (exact), or an
+    # approximate index such as "IVF1024,PQ16", "HNSW32" or "SQ8". Stores stay
+    # flat until they hold enough vectors to train the configured index
+    VECTOR_INDEX_FACTORY: str = os.getenv("VECTOR_INDEX_FACTORY", "Flat")
+    ANN_NPROBE: int = int(os.getenv("ANN_NPROBE", 16))
+    ANN_EF_SEARCH: int = int(os.getenv("ANN_EF_SEARCH", 64))
+    ANN_EVAL_QUERIES: int = 200
+    
+    # Retrieval: "hybrid" fuses dense results with a BM25 index using
+    # reciprocal-rank fusion, "dense" uses the vector index only
+    RETRIEVAL_MODE: str = os.getenv("RETRIEVAL_MODE", "hybrid")
+    HYBRID_CANDIDATES: int = 20
+    RRF_K: int = 60
+    BM25_K1: float = 1.5
+    BM25_B: float = 0.75
+    
+    # Filtered search scores selections up to this many chunks exactly;
+    # larger selections are searched in the index behind a bitmap selector
+    FILTER_EXACT_MAX: int = 4096
+    
+    # Search context: up to CONTEXT_MAX_K chunks are retrieved, those scoring
+    # below CONTEXT_SCORE_THRESHOLD x the best are dropped, and the rest are
+    # trimmed to the sentences around query matches within a token budget
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "600"))
+    CONTEXT_MAX_K: int = 8
+    CONTEXT_MIN_K: int = 1
+    CONTEXT_SCORE_THRESHOLD: float = 0.5
+    CONTEXT_SENTENCE_WINDOW: int = 1
+    
+    # Multi-query search: sub-queries passed by the model, or derived from a
+    # compound question ("AAPL and NVDA", "...? ...?"), run concurrently in
+    # one tool call and their results are merged
+    SEARCH_DECOMPOSE_QUERIES: bool = os.getenv("SEARCH_DECOMPOSE_QUERIES", "true").lower() == "true"
+    SEARCH_MAX_SUB_QUERIES: int = 4
+    
+    # Concurrent searches arriving within this window share one embedding
+    # call and one batched index.search (0 disables waiting)
+    SEARCH_BATCH_WINDOW_MS: float = float(os.getenv("SEARCH_BATCH_WINDOW_MS", "3"))
+    SEARCH_BATCH_MAX: int = 32
+    
+    # Vector search runs in its own thread pool; FAISS OpenMP threads per
+    # search (0 = CPU cores divided by SEARCH_THREADS)
+    SEARCH_THREADS: int = int(os.getenv("SEARCH_THREADS", "4"))
+    FAISS_OMP_THREADS: int = int(os.getenv("FAISS_OMP_THREADS", "0"))
+    # Event loop lag sampling; wake-ups later than the threshold count as blocking
+    LOOP_MONITOR_INTERVAL_MS: float = 100
+    LOOP_BLOCK_THRESHOLD_MS: float = 50
+    
+    # Convert vector stores written with a pickled docstore (index.pkl) to the
+    # SQLite layout on first load; the pickle is removed afterwards
+    LEGACY_PICKLE_MIGRATION: bool = os.getenv("LEGACY_PICKLE_MIGRATION", "true").lower() == "true"
+    
     # Data paths
     DATA_DIR: str = "data"
     VECTOR_DB_PATH: str = "data/vector_db"
     
+    # Vector store tenancy: "user" gives every user (or their organization,
+    # from TENANT_ORGANIZATIONS = JSON {"user_id": "org_id"}) its own store
+    # under VECTOR_DB_PATH/tenants; "shared" keeps one store for everyone.
+    # Documents in the shared store are not migrated, so existing deployments
+    # stay on "shared" until they opt in
+    VECTOR_TENANCY: str = os.getenv("VECTOR_TENANCY", "shared")
+    TENANT_ORGANIZATIONS: str = os.getenv("TENANT_ORGANIZATIONS", "{}")
+    # Resident tenant indexes; the least recently used are unloaded past these caps
+    TENANT_CACHE_MAX_BYTES: int = int(os.getenv("TENANT_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+    TENANT_CACHE_MAX_TENANTS: int = 64
+    # Superseded index snapshots are deleted once unused and at least this old,
+    # so other workers can finish opening the snapshot they just read
+    SNAPSHOT_GC_GRACE_SECONDS: float = float(os.getenv("SNAPSHOT_GC_GRACE_SECONDS", "60"))
+    
+    # Ingestion mode: "append" adds documents to the existing index,
+    # "overwrite" rebuilds it from each upload
+    INGESTION_MODE: str = os.getenv("INGESTION_MODE", "append")
+    
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     
@@ -79,8 +217,13 @@ class Settings:
             return ["*"]
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",") if origin.strip()]
     
+    def get_tenant_organizations(self) -> dict[str, str]:
+        """Parse the user -> organization mapping of TENANT_ORGANIZATIONS."""
+        return json.loads(self.TENANT_ORGANIZATIONS or "{}")
+    
     # File upload limits
     MAX_PDF_SIZE_MB: int = 50
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
     ALLOWED_FILE_EXTENSIONS: list[str] = [".pdf"]
 
 
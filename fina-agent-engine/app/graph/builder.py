@@ -4,7 +4,7 @@ from langgraph.graph import END, StateGraph
 
 from app.core.logger import get_logger
 from app.core.settings import settings
-from app.graph.nodes import call_model, tool_node
+from app.graph.nodes import call_model, call_tools
 from app.graph.state import AgentState
 
 logger = get_logger("BUILDER_WORKFLOW")
@@ -31,7 +31,7 @@ class FinancialGraphManager:
             # Nodes
             workflow.add_node("guardrail_input", input_guardrail)
             workflow.add_node("agent", call_model)
-            workflow.add_node("tools", tool_node)
+            workflow.add_node("tools", call_tools)
             workflow.add_node("human_review_gate", self.gatekeeper_node)
             workflow.add_node("guardrail_output", output_guardrail)
 
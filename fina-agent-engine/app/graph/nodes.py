@@ -1,4 +1,5 @@
 from langchain_core.messages import SystemMessage
+from langchain_core.runnables import RunnableConfig
 from langchain_groq import ChatGroq
 from langgraph.prebuilt import ToolNode
 
@@ -7,6 +8,7 @@ from app.core.logger import get_logger
 from app.core.settings import settings
 from app.graph.state import AgentState
 from app.service.agent_tools import FINA_TOOLS
+from app.service.context_builder import usage_from_report
 
 logger = get_logger("GRAPH_NODES")
 
@@ -68,4 +70,17 @@ async def call_model(state: AgentState) -> dict:
 # Setup the Tools Node
 # This is a prebuilt LangGraph node that automatically executes
 # the tools requested by the model with error handling enabled.
-tool_node = ToolNode(FINA_TOOLS, handle_tool_errors=True)
\ No newline at end of file
+tool_node = ToolNode(FINA_TOOLS, handle_tool_errors=True)
+
+
+async def call_tools(state: AgentState, config: RunnableConfig) -> dict:
+    """Tools Node: runs the requested tools and books search context savings."""
+    result = await tool_node.ainvoke(state, config)
+    usage = {}
+    for message in result["messages"]:
+        for key, value in usage_from_report(getattr(message, "artifact", None)).items():
+            usage[key] = usage.get(key, 0) + value
+    if usage:
+        logger.info(f"Search context: {usage['context_tokens']} tokens, {usage['context_tokens_saved']} saved")
+        result["usage"] = usage
+    return result
\ No newline at end of file
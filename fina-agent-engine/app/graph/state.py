@@ -10,7 +10,11 @@ def reduce_usage(current: dict, new: dict) -> dict:
         "prompt_tokens": current.get("prompt_tokens", 0) + new.get("prompt_tokens", 0),
         "completion_tokens": current.get("completion_tokens", 0) + new.get("completion_tokens", 0),
         "total_tokens": current.get("total_tokens", 0) + new.get("total_tokens", 0),
-        "estimated_cost": current.get("estimated_cost", 0.0) + new.get("estimated_cost", 0.0)
+        "estimated_cost": current.get("estimated_cost", 0.0) + new.get("estimated_cost", 0.0),
+        # Search context sent to the LLM and prompt tokens saved by trimming it
+        "context_tokens": current.get("context_tokens", 0) + new.get("context_tokens", 0),
+        "context_tokens_saved": current.get("context_tokens_saved", 0) + new.get("context_tokens_saved", 0),
+        "context_cost_saved": current.get("context_cost_saved", 0.0) + new.get("context_cost_saved", 0.0)
     }
 
 class AgentState(TypedDict):
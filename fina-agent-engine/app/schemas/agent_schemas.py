@@ -1,4 +1,8 @@
-from pydantic import BaseModel, Field
+from datetime import date
+from typing import Annotated, Optional
+
+from langgraph.prebuilt import InjectedState
+from pydantic import BaseModel, Field, model_validator
 
 
 class PortfolioSchema(BaseModel):
@@ -12,7 +16,43 @@ class PortfolioSchema(BaseModel):
     )
 
 
-class SearchSchema(BaseModel):
+class DocumentFilter(BaseModel):
+    """Optional metadata restrictions for document search."""
+    
+    file_hash: Optional[str] = Field(
+        None,
+        min_length=64,
+        max_length=64,
+        description="SHA256 hash of a single ingested document to search in."
+    )
+    filename: Optional[str] = Field(
+        None,
+        max_length=255,
+        description="Exact filename of the document to search in, e.g. 'NVDA_Q3_2024.pdf'."
+    )
+    page_start: Optional[int] = Field(None, ge=1, description="First page to search (1-based, inclusive).")
+    page_end: Optional[int] = Field(None, ge=1, description="Last page to search (1-based, inclusive).")
+    issuer: Optional[str] = Field(
+        None,
+        max_length=100,
+        description="Issuer or ticker the report belongs to, e.g. 'NVDA'."
+    )
+    report_date_from: Optional[date] = Field(None, description="Earliest report date (YYYY-MM-DD).")
+    report_date_to: Optional[date] = Field(None, description="Latest report date (YYYY-MM-DD).")
+
+    @model_validator(mode="after")
+    def check_ranges(self):
+        if self.page_start and self.page_end and self.page_start > self.page_end:
+            raise ValueError("page_start must not be after page_end")
+        if self.report_date_from and self.report_date_to and self.report_date_from > self.report_date_to:
+            raise ValueError("report_date_from must not be after report_date_to")
+        return self
+
+    def is_empty(self) -> bool:
+        return not self.model_dump(exclude_none=True)
+
+
+class SearchSchema(DocumentFilter):
     """Schema for document search requests."""
     
     query: str = Field(
@@ -21,3 +61,14 @@ class SearchSchema(BaseModel):
         max_length=1000,
         description="The specific financial question or topic to search in the PDF documents."
     )
+    sub_queries: Optional[list[Annotated[str, Field(min_length=1, max_length=1000)]]] = Field(
+        None,
+        max_length=4,
+        description=(
+            "Independent searches to run together in this one call, e.g. "
+            "['AAPL risk outlook', 'NVDA risk outlook'] when comparing holdings."
+        )
+    )
+    # Filled from the graph state, never by the model: searches stay in the
+    # caller's vector store
+    user_id: Annotated[str, InjectedState("user_id")]
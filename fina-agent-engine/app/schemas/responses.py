@@ -13,6 +13,9 @@ class UsageStats(BaseModel):
     completion_tokens: int
     total_tokens: int
     estimated_cost: float
+    context_tokens: int = Field(0, description="Prompt tokens of search context returned to the agent")
+    context_tokens_saved: int = Field(0, description="Tokens saved against joining the top 3 chunks")
+    context_cost_saved: float = Field(0.0, description="Prompt cost of the saved tokens, per turn they are re-sent")
 
 class ChatResponse(BaseModel):
     """Response from chat endpoint."""
@@ -49,6 +52,122 @@ class ThreadStatusResponse(BaseModel):
     usage: Optional[UsageStats] = Field(None, description="Usage statistics")
 
 
+class VectorIndexStats(BaseModel):
+    """Statistics of the resident vector index."""
+
+    loaded: bool = Field(..., description="Whether an index is resident in memory")
+    version: Optional[str] = Field(None, description="Published index version")
+    loaded_at: Optional[str] = Field(None, description="ISO timestamp of the last load")
+    load_time_ms: Optional[float] = Field(None, description="Time spent loading the index")
+    vectors: Optional[int] = Field(None, description="Number of vectors in the index")
+    dimension: Optional[int] = Field(None, description="Embedding dimension")
+    disk_bytes: Optional[int] = Field(None, description="Size of the index files on disk")
+    index_type: Optional[str] = Field(None, description="FAISS index class, e.g. IndexFlat or IndexHNSWFlat")
+    search_params: Optional[dict[str, int]] = Field(None, description="Query-time nprobe/efSearch in effect")
+    ann_report: Optional[dict] = Field(None, description="Recall-versus-latency report recorded when the index was trained")
+
+
+class TenantIndexStats(BaseModel):
+    """Resident per-tenant vector indexes."""
+
+    tenancy: str = Field(..., description="'user' (per user or organization) or 'shared'")
+    resident_tenants: int = Field(..., description="Tenant indexes currently loaded")
+    resident_bytes: int = Field(..., description="Size of the loaded tenant indexes")
+    max_bytes: int = Field(..., description="Memory cap before cold tenants are unloaded")
+    max_tenants: int = Field(..., description="Loaded tenant cap")
+    evictions: int = Field(..., description="Tenant indexes unloaded so far")
+
+
+class EmbeddingCacheStats(BaseModel):
+    """Hit/miss counters of the embedding cache."""
+
+    memory_hits: int = Field(..., description="Lookups served from the in-memory LRU")
+    disk_hits: int = Field(..., description="Lookups served from the SQLite store")
+    misses: int = Field(..., description="Lookups that required an embedding call")
+    hit_rate: float = Field(..., description="Fraction of lookups served from cache")
+    lru_entries: int = Field(..., description="Vectors currently held in memory")
+
+
+class SearchBatchingStats(BaseModel):
+    """Batch size and queueing delay of micro-batched vector searches."""
+
+    window_ms: float = Field(..., description="Batching window")
+    batches: int = Field(..., description="Batched searches executed")
+    queries: int = Field(..., description="Queries served")
+    avg_batch_size: float = Field(..., description="Mean queries per batch")
+    max_batch_size: int = Field(..., description="Largest batch so far")
+    avg_queue_delay_ms: float = Field(..., description="Mean wait before a query's batch started")
+    max_queue_delay_ms: float = Field(..., description="Longest wait before a query's batch started")
+
+
+class SearchPoolStats(BaseModel):
+    """Vector search thread pool and event loop blocking counters."""
+
+    threads: int = Field(..., description="Search pool threads")
+    omp_threads: int = Field(..., description="FAISS OpenMP threads per search")
+    tasks: int = Field(..., description="Search steps run in the pool")
+    avg_queue_wait_ms: float = Field(..., description="Mean wait for a free search thread")
+    max_queue_wait_ms: float = Field(..., description="Longest wait for a free search thread")
+    avg_run_ms: float = Field(..., description="Mean time of a search step")
+    loop_max_lag_ms: float = Field(..., description="Longest event loop stall observed")
+    loop_avg_lag_ms: float = Field(..., description="Mean event loop wake-up delay")
+    loop_blocked_events: int = Field(..., description="Stalls above the blocking threshold")
+    loop_blocked_ms_total: float = Field(..., description="Total time of those stalls")
+
+
+class MCPPoolStats(BaseModel):
+    """Pooled MCP sessions to Node B and their latency."""
+
+    transport: str = Field("sse", description="MCP transport: 'sse' or 'streamable_http'")
+    sessions: int = Field(..., description="Open, initialized sessions")
+    max_sessions: int = Field(..., description="Pool size limit")
+    max_in_flight_per_session: int = Field(..., description="Concurrent calls allowed per session")
+    in_flight: int = Field(..., description="Tool calls currently running or queued")
+    calls: int = Field(..., description="Completed tool calls")
+    connects: int = Field(..., description="Sessions opened (SSE connect + handshake)")
+    reconnects: int = Field(..., description="Calls retried on a fresh session")
+    failures: int = Field(..., description="Sessions lost during a call")
+    subscriptions: int = Field(0, description="Resources whose updates are pushed to the pool")
+    notifications: int = Field(0, description="Resource update notifications received")
+    coalesced_calls: int = Field(0, description="Calls that shared an identical in-flight call")
+    in_flight_keys: int = Field(0, description="Distinct tool calls currently in flight")
+    avg_connect_ms: float = Field(..., description="Mean SSE connect time")
+    avg_handshake_ms: float = Field(..., description="Mean MCP initialize handshake time")
+    avg_call_ms: float = Field(..., description="Mean tool call time on a warm session")
+    max_call_ms: float = Field(..., description="Slowest tool call")
+
+
+class MCPBreakerStats(BaseModel):
+    """Circuit breaker state and resilience counters of calls to Node B."""
+
+    state: str = Field(..., description="Circuit state: 'closed', 'open' or 'half_open'")
+    consecutive_failures: int = Field(..., description="Failed attempts since the last success")
+    opens: int = Field(..., description="Times the circuit opened")
+    rejected: int = Field(..., description="Calls failed fast while the circuit was open")
+    retry_after_s: float = Field(..., description="Seconds until a probe call is allowed")
+    calls: int = Field(..., description="Calls made through the resilience layer")
+    retries: int = Field(..., description="Attempts retried after a timeout or lost connection")
+    timeouts: int = Field(..., description="Attempts that exceeded their deadline")
+    hedges: int = Field(..., description="Hedged requests sent")
+    hedge_wins: int = Field(..., description="Hedged requests that answered first")
+    hedge_after_ms: Optional[float] = Field(None, description="Latency after which attempts are hedged")
+
+
+class PortfolioCacheStats(BaseModel):
+    """Per-user portfolio cache counters."""
+
+    enabled: bool = Field(..., description="Whether portfolios are cached")
+    entries: int = Field(..., description="Portfolios currently cached")
+    max_users: int = Field(..., description="Cache size limit")
+    ttl_seconds: float = Field(..., description="Age up to which a subscribed portfolio skips revalidation")
+    hits: int = Field(..., description="Lookups served without calling Node B")
+    revalidations: int = Field(..., description="Lookups that sent the cached version to Node B")
+    not_modified: int = Field(..., description="Revalidations answered without the rows")
+    misses: int = Field(..., description="Lookups with nothing cached")
+    invalidations: int = Field(..., description="Entries dropped after a change or a lost subscription")
+    evictions: int = Field(..., description="Entries dropped to respect the size limit")
+
+
 class HealthResponse(BaseModel):
     """Response from health check endpoint."""
     
@@ -57,15 +176,80 @@ class HealthResponse(BaseModel):
     node_b_connected: bool = Field(..., description="MCP server connectivity")
     api_keys_set: dict[str, bool] = Field(..., description="API key validation status")
     vector_db: str = Field(..., description="Vector database status")
+    vector_index: Optional[VectorIndexStats] = Field(None, description="Resident vector index statistics")
+    tenant_indexes: Optional[TenantIndexStats] = Field(None, description="Per-tenant vector index cache")
+    embedding_cache: Optional[EmbeddingCacheStats] = Field(None, description="Embedding cache counters")
+    search_batching: Optional[SearchBatchingStats] = Field(None, description="Vector search micro-batching counters")
+    search_pool: Optional[SearchPoolStats] = Field(None, description="Search thread pool and event loop lag")
+    mcp_pool: Optional[MCPPoolStats] = Field(None, description="Pooled MCP sessions to Node B")
+    mcp_breaker: Optional[MCPBreakerStats] = Field(None, description="Node B circuit breaker and retries")
+    portfolio_cache: Optional[PortfolioCacheStats] = Field(None, description="Per-user portfolio cache")
+
+
+class ChunkingReport(BaseModel):
+    """Chunks produced for a document compared with the character splitter."""
+    
+    strategy: str = Field(..., description="Chunking strategy: 'token' or 'character'")
+    chunks: int = Field(..., description="Chunks produced")
+    baseline_chunks: int = Field(..., description="Chunks the character splitter would produce")
+    baseline_truncated_chunks: int = Field(0, description="Baseline chunks longer than the embedding model's token limit")
+    chunks_saved: int = Field(..., description="Fewer chunks than the baseline (negative if more)")
+    vectors_saved: int = Field(..., description="Fewer vectors stored in the index than the baseline")
+    index_bytes_saved: int = Field(0, description="Raw vector bytes saved in the index")
+
+
+class DeduplicationReport(BaseModel):
+    """Near-duplicate chunks linked to indexed chunks instead of being embedded."""
+    
+    enabled: bool = Field(..., description="Whether near-duplicate detection ran")
+    chunks_checked: int = Field(..., description="Chunks compared against the index")
+    near_duplicates: int = Field(..., description="Chunks linked to an indexed chunk")
+    embeddings_saved: int = Field(..., description="Embedding computations avoided")
+    index_bytes_saved: int = Field(0, description="Raw vector bytes kept out of the index")
 
 
 class IngestionResponse(BaseModel):
     """Response from PDF ingestion endpoint."""
     
-    status: str = Field(..., description="Ingestion status")
+    status: str = Field(..., description="Ingestion status: 'success' or 'skipped'")
     filename: str = Field(..., description="Name of processed file")
+    file_hash: Optional[str] = Field(None, description="SHA256 hash of the processed file")
     chunks_processed: int = Field(..., description="Number of chunks created")
     storage_mode: str = Field(..., description="Storage mode description")
+    chunking: Optional[ChunkingReport] = Field(None, description="Chunking savings versus the character splitter")
+    deduplication: Optional[DeduplicationReport] = Field(None, description="Near-duplicate chunks skipped")
+
+
+class IngestionJobResponse(BaseModel):
+    """Status of a background ingestion job."""
+    
+    job_id: str = Field(..., description="Unique job identifier")
+    status: str = Field(..., description="Status: 'queued', 'running', 'succeeded', 'skipped' or 'failed'")
+    filename: str = Field(..., description="Name of the uploaded file")
+    file_hash: Optional[str] = Field(None, description="SHA256 hash of the uploaded file")
+    issuer: Optional[str] = Field(None, description="Issuer or ticker recorded for filtered search")
+    report_date: Optional[str] = Field(None, description="Report date recorded for filtered search")
+    tenant: Optional[str] = Field(None, description="Vector store namespace the document is ingested into")
+    pages_total: int = Field(0, description="Pages in the document")
+    pages_parsed: int = Field(0, description="Pages parsed so far")
+    chunks_parsed: int = Field(0, description="Chunks produced so far")
+    chunks_embedded: int = Field(0, description="Chunks embedded so far")
+    chunks_processed: Optional[int] = Field(None, description="Chunks added to the index once finished")
+    eta_seconds: Optional[float] = Field(None, description="Estimated time to completion while running")
+    chunking: Optional[ChunkingReport] = Field(None, description="Chunking savings once finished")
+    deduplication: Optional[DeduplicationReport] = Field(None, description="Near-duplicate chunks skipped once finished")
+    error: Optional[str] = Field(None, description="Failure reason")
+    created_at: str = Field(..., description="ISO timestamp of submission")
+    started_at: Optional[str] = Field(None, description="ISO timestamp when processing started")
+    finished_at: Optional[str] = Field(None, description="ISO timestamp when processing finished")
+
+
+class DocumentDeletionResponse(BaseModel):
+    """Response from document deletion endpoint."""
+    
+    status: str = Field(..., description="Deletion status")
+    file_hash: str = Field(..., description="SHA256 hash of the removed document")
+    chunks_deleted: int = Field(..., description="Number of chunks removed from the index")
 
 class StreamEvent(BaseModel):
     type: str # 'token', 'tool', or 'final'
@@ -1,7 +1,11 @@
+from datetime import date
+from typing import Optional
+
 from langchain_core.tools import tool
 from app.service.mcp_client import MCPClient
 from app.service.ingestion_service import IngestionService
-from app.schemas.agent_schemas import PortfolioSchema, SearchSchema
+from app.service.vector_store import tenant_for
+from app.schemas.agent_schemas import DocumentFilter, PortfolioSchema, SearchSchema
 
 mcp_client = MCPClient()
 ingest_service = IngestionService()
@@ -14,12 +18,42 @@ async def get_user_portfolio(user_id: str):
     """
     return await mcp_client.fetch_portfolio(user_id)
 
-@tool("search_financial_docs", args_schema=SearchSchema)
-async def search_financial_docs(query: str):
+@tool("search_financial_docs", args_schema=SearchSchema, response_format="content_and_artifact")
+async def search_financial_docs(
+    query: str,
+    user_id: str,
+    sub_queries: Optional[list[str]] = None,
+    file_hash: Optional[str] = None,
+    filename: Optional[str] = None,
+    page_start: Optional[int] = None,
+    page_end: Optional[int] = None,
+    issuer: Optional[str] = None,
+    report_date_from: Optional[date] = None,
+    report_date_to: Optional[date] = None
+):
     """
     Searches within the uploaded financial PDF documents for specific
     advice, risk analysis, or market trends using the vector database.
+    Optionally restrict the search to one document, a page range, an
+    issuer or a report date range. Only the caller's own documents are searched.
+    To cover several companies or topics, pass them as sub_queries: they
+    are searched concurrently and returned as one merged context.
     """
-    return await ingest_service.search_in_vector_db(query)
+    filters = DocumentFilter(
+        file_hash=file_hash,
+        filename=filename,
+        page_start=page_start,
+        page_end=page_end,
+        issuer=issuer,
+        report_date_from=report_date_from,
+        report_date_to=report_date_to
+    )
+    # The artifact carries the context's token savings into the usage totals
+    return await ingest_service.retrieve_context(
+        query,
+        filters=None if filters.is_empty() else filters,
+        tenant=tenant_for(user_id),
+        sub_queries=sub_queries
+    )
 
 FINA_TOOLS = [get_user_portfolio, search_financial_docs]
\ No newline at end of file
@@ -0,0 +1,271 @@
+"""Approximate-nearest-neighbour index modes for the vector store.
+
+Indexes are described by FAISS factory strings (``Flat``, ``IVF256,PQ16``,
+``HNSW32``, ``SQ8``...). New stores start as an exact flat index; once
+enough vectors have been ingested to train the configured index, the
+flat vectors are used as the training set, the store is converted in
+place and a recall-versus-latency report against the flat baseline is
+written next to the index.
+"""
+
+import json
+import os
+import time
+from typing import Optional
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from app.core.logger import get_logger
+from app.core.settings import settings
+
+logger = get_logger("ANN_INDEX")
+
+REPORT_FILE = "ann_report.json"
+
+# Query-time parameters and the values swept by the recall report
+SEARCH_PARAMETERS = {
+    "nprobe": (1, 4, 8, 16, 32, 64, 128),
+    "efSearch": (16, 32, 64, 128, 256),
+}
+
+
+def is_flat(index: faiss.Index) -> bool:
+    """Whether an index performs exact brute-force search."""
+    return isinstance(index, faiss.IndexFlat)
+
+
+def min_training_vectors(factory: str, dimension: int) -> int:
+    """Vectors needed to train an index built from a factory string.
+
+    Follows the FAISS guideline of at least 39 points per k-means
+    centroid; quantizers without clustering need one full codebook.
+    """
+    index = faiss.index_factory(dimension, factory)
+    if index.is_trained:
+        return 0
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return max(39 * ivf.nlist, 256)
+    return 256
+
+
+def build_index(factory: str, vectors: np.ndarray) -> faiss.Index:
+    """Create, train and fill an index from a factory string.
+
+    Args:
+        factory: FAISS index factory string
+        vectors: float32 matrix of shape (n, dimension)
+
+    Returns:
+        The populated index
+    """
+    index = faiss.index_factory(vectors.shape[1], factory)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+def configure_search(index: faiss.Index, nprobe: int = None, ef_search: int = None) -> dict:
+    """Apply query-time parameters that the index supports.
+
+    Args:
+        index: FAISS index
+        nprobe: IVF lists visited per query (defaults to settings.ANN_NPROBE)
+        ef_search: HNSW candidate list size (defaults to settings.ANN_EF_SEARCH)
+
+    Returns:
+        The parameters that were applied
+    """
+    values = {
+        "nprobe": nprobe or settings.ANN_NPROBE,
+        "efSearch": ef_search or settings.ANN_EF_SEARCH,
+    }
+    space = faiss.ParameterSpace()
+    applied = {}
+    for name, value in values.items():
+        try:
+            space.set_index_parameter(index, name, value)
+            applied[name] = value
+        except RuntimeError:
+            # Not a parameter of this index type
+            continue
+    return applied
+
+
+def search_parameters(index: faiss.Index) -> dict:
+    """Query-time parameters currently set on an index."""
+    params = {}
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        params["nprobe"] = ivf.nprobe
+    hnsw = getattr(faiss.downcast_index(index), "hnsw", None)
+    if hnsw is not None:
+        params["efSearch"] = hnsw.efSearch
+    return params
+
+
+def ensure_direct_map(index: faiss.Index) -> None:
+    """Give an IVF index the position lookup that reconstruct needs.
+
+    Building it mutates the index, so it is done once, before the index is
+    shared between search threads.
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and ivf.direct_map.type == faiss.DirectMap.NoMap:
+        ivf.make_direct_map()
+
+
+def all_vectors(index: faiss.Index) -> np.ndarray:
+    """Reconstruct every stored vector (approximate for compressed indexes)."""
+    ensure_direct_map(index)
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def _search_ms(index: faiss.Index, queries: np.ndarray, k: int) -> tuple[np.ndarray, float]:
+    start = time.perf_counter()
+    _, ids = index.search(queries, k)
+    return ids, (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def recall_latency_report(
+    vectors: np.ndarray,
+    factory: str,
+    k: int = 10,
+    queries: Optional[np.ndarray] = None,
+    index: Optional[faiss.Index] = None
+) -> dict:
+    """Measure recall@k and per-query latency of an index against Flat.
+
+    Every supported query-time parameter is swept so the operating point
+    (nprobe/efSearch) can be chosen from the report.
+
+    Args:
+        vectors: Exact float32 vectors the index holds
+        factory: Factory string of the index under test
+        k: Neighbours compared per query
+        queries: Query vectors (defaults to a sample of the vectors)
+        index: Already built index; built from vectors if omitted
+
+    Returns:
+        Report with the flat baseline latency and one row per parameter value
+    """
+    if queries is None:
+        rng = np.random.default_rng(0)
+        sample = rng.choice(len(vectors), size=min(settings.ANN_EVAL_QUERIES, len(vectors)), replace=False)
+        queries = vectors[sample]
+    k = min(k, len(vectors))
+
+    flat = faiss.IndexFlatL2(vectors.shape[1])
+    flat.add(vectors)
+    truth, flat_ms = _search_ms(flat, queries, k)
+    index = index if index is not None else build_index(factory, vectors)
+
+    def recall(ids: np.ndarray) -> float:
+        hits = sum(len(set(found) & set(expected)) for found, expected in zip(ids, truth))
+        return round(hits / truth.size, 4)
+
+    rows = []
+    space = faiss.ParameterSpace()
+    for name, values in SEARCH_PARAMETERS.items():
+        for value in values:
+            try:
+                space.set_index_parameter(index, name, value)
+            except RuntimeError:
+                break
+            ids, ms = _search_ms(index, queries, k)
+            rows.append({"param": name, "value": value, "recall": recall(ids), "latency_ms": round(ms, 4)})
+    if not rows:
+        ids, ms = _search_ms(index, queries, k)
+        rows.append({"param": None, "value": None, "recall": recall(ids), "latency_ms": round(ms, 4)})
+    configure_search(index)
+
+    return {
+        "factory": factory,
+        "vectors": int(len(vectors)),
+        "queries": int(len(queries)),
+        "k": k,
+        "flat_latency_ms": round(flat_ms, 4),
+        "results": rows,
+    }
+
+
+def read_report(db_path: str) -> Optional[dict]:
+    """Recall report written when the index at db_path was trained."""
+    try:
+        with open(os.path.join(db_path, REPORT_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def write_report(db_path: str, report: dict) -> None:
+    os.makedirs(db_path, exist_ok=True)
+    with open(os.path.join(db_path, REPORT_FILE), "w", encoding="utf-8") as f:
+        json.dump(report, f)
+
+
+def ensure_index_type(store: FAISS, factory: str = None) -> Optional[dict]:
+    """Convert a flat store to the configured index once it can be trained.
+
+    Stores keep the exact flat index until they hold enough vectors to
+    train the configured factory; the flat vectors then become the
+    training set. Already converted stores are left untouched.
+
+    Args:
+        store: LangChain FAISS store, modified in place
+        factory: Factory string (defaults to settings.VECTOR_INDEX_FACTORY)
+
+    Returns:
+        Recall-versus-latency report if the index was converted, else None
+    """
+    factory = factory or settings.VECTOR_INDEX_FACTORY
+    index = store.index
+    if factory == "Flat" or not is_flat(index):
+        configure_search(index)
+        return None
+    needed = min_training_vectors(factory, index.d)
+    if index.ntotal < needed:
+        logger.info(f"Keeping flat index until {needed} vectors are available ({index.ntotal} so far)")
+        return None
+
+    start = time.perf_counter()
+    vectors = all_vectors(index)
+    trained = build_index(factory, vectors)
+    configure_search(trained)
+    logger.info(
+        f"Trained {factory} index on {len(vectors)} vectors "
+        f"({(time.perf_counter() - start) * 1000:.0f} ms)"
+    )
+    report = recall_latency_report(vectors, factory, index=trained)
+    store.index = trained
+    return report
+
+
+def remove_vectors(store: FAISS, ids: list[str]) -> None:
+    """Delete documents from a store whatever its index type.
+
+    Flat indexes use LangChain's delete. IVF indexes keep their original
+    positions on removal and HNSW indexes cannot remove at all, so other
+    types are refilled with the remaining vectors, keeping their training.
+    """
+    if is_flat(store.index):
+        store.delete(ids)
+        return
+
+    doomed = set(ids)
+    keep = [pos for pos, doc_id in sorted(store.index_to_docstore_id.items()) if doc_id not in doomed]
+    vectors = all_vectors(store.index)
+    index = faiss.clone_index(store.index)
+    index.reset()
+    if keep:
+        index.add(vectors[keep])
+    configure_search(index)
+
+    store.index_to_docstore_id = {
+        new: store.index_to_docstore_id[old] for new, old in enumerate(keep)
+    }
+    store.docstore.delete(list(doomed))
+    store.index = index
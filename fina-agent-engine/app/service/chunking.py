@@ -0,0 +1,271 @@
+"""Chunking strategies for PDF ingestion.
+
+The token-aware chunker sizes chunks by the embedding model's tokenizer so
+no part of a chunk is silently truncated by the model (all-MiniLM-L6-v2
+stops at 256 word pieces), and it follows the structure of financial
+filings: headings start new chunks, table rows stay together and chunks
+never cross a page boundary. The character chunker keeps the previous
+RecursiveCharacterTextSplitter behaviour and serves as a baseline.
+
+Chunkers are picklable so they can be shipped to the PDF parser's
+worker processes; tokenizers are loaded lazily once per process.
+"""
+
+import math
+import re
+from functools import lru_cache
+from typing import Optional
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.core.logger import get_logger
+from app.core.settings import settings
+
+logger = get_logger("CHUNKING")
+
+# Special tokens ([CLS]/[SEP]) added by the embedding model to every input
+_SPECIAL_TOKENS = 2
+
+_WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?;])\s+(?=[A-Z0-9(\"'])")
+_NUMBERED_HEADING = re.compile(
+    r"^(?:(?:item|note|section|part)\s+\d+[a-z]?\b|\d+(?:\.\d+)*\.?\s+[A-Z])",
+    re.IGNORECASE
+)
+_NUMERIC_CELL = re.compile(r"^\(?[-+$€£]?\d[\d,.]*%?\)?$")
+
+
+@lru_cache(maxsize=4)
+def _load_tokenizer(model_name: str):
+    """Load a HuggingFace tokenizer, or None if it is unavailable offline."""
+    try:
+        from tokenizers import Tokenizer
+        return Tokenizer.from_pretrained(model_name)
+    except Exception as e:
+        logger.warning(f"Tokenizer for {model_name} unavailable, using estimate: {str(e)}")
+        return None
+
+
+def _is_heading(line: str) -> bool:
+    if len(line) > 80 or line.endswith((".", ",", ";", ":")) and not _NUMBERED_HEADING.match(line):
+        return False
+    letters = [c for c in line if c.isalpha()]
+    if len(letters) >= 3 and all(c.isupper() for c in letters):
+        return True
+    return bool(_NUMBERED_HEADING.match(line)) and len(line.split()) <= 12
+
+
+def _is_table_row(line: str) -> bool:
+    cells = line.split()
+    numeric = sum(1 for c in cells if _NUMERIC_CELL.match(c))
+    return numeric >= 2 and numeric * 2 >= len(cells) - 1 or "  " in line.strip() and numeric >= 1
+
+
+def split_blocks(text: str) -> list[tuple[str, str]]:
+    """Split page text into (kind, text) blocks.
+
+    Kinds are "heading", "table" (consecutive numeric rows) and
+    "paragraph" (consecutive prose lines, separated by blank lines).
+    """
+    blocks: list[tuple[str, str]] = []
+    kind, lines = None, []
+
+    def flush():
+        nonlocal kind, lines
+        if lines:
+            joiner = "\n" if kind == "table" else " "
+            blocks.append((kind, joiner.join(lines)))
+        kind, lines = None, []
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            flush()
+        elif _is_heading(line):
+            flush()
+            blocks.append(("heading", line))
+        else:
+            line_kind = "table" if _is_table_row(raw) else "paragraph"
+            if line_kind != kind:
+                flush()
+                kind = line_kind
+            lines.append(line)
+    flush()
+    return blocks
+
+
+class CharacterChunker:
+    """Fixed-size character splitter (the original ingestion behaviour)."""
+
+    strategy = "character"
+
+    def __init__(self, chunk_size: int = None, chunk_overlap: int = None):
+        self.chunk_size = chunk_size or settings.CHUNK_SIZE
+        self.chunk_overlap = chunk_overlap if chunk_overlap is not None else settings.CHUNK_OVERLAP
+
+    def split_pages(self, pages: list[Document]) -> list[Document]:
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap
+        )
+        return splitter.split_documents(pages)
+
+
+class TokenAwareChunker:
+    """Structure-aware chunker sized by the embedding model's token limit."""
+
+    strategy = "token"
+
+    def __init__(
+        self,
+        max_tokens: int = None,
+        overlap_tokens: int = None,
+        tokenizer_name: Optional[str] = None
+    ):
+        """Initialize the chunker.
+
+        Args:
+            max_tokens: Model input limit including special tokens
+                (defaults to settings.EMBEDDING_MAX_TOKENS)
+            overlap_tokens: Trailing sentences carried into the next chunk of
+                the same section, up to this many tokens
+                (defaults to settings.CHUNK_OVERLAP_TOKENS)
+            tokenizer_name: HuggingFace tokenizer to count with; None uses a
+                word-piece estimate
+        """
+        self.max_tokens = max_tokens or settings.EMBEDDING_MAX_TOKENS
+        self.overlap_tokens = (
+            overlap_tokens if overlap_tokens is not None else settings.CHUNK_OVERLAP_TOKENS
+        )
+        self.tokenizer_name = tokenizer_name
+        self.budget = self.max_tokens - _SPECIAL_TOKENS
+
+    def _spans(self, text: str) -> list[tuple[int, int]]:
+        """Character spans of the tokens in text."""
+        tokenizer = _load_tokenizer(self.tokenizer_name) if self.tokenizer_name else None
+        if tokenizer is not None:
+            return list(tokenizer.encode(text, add_special_tokens=False).offsets)
+        # Estimate: long words are split into several word pieces
+        spans = []
+        for match in _WORD_PATTERN.finditer(text):
+            start, end = match.span()
+            pieces = max(1, math.ceil((end - start) / 6))
+            step = math.ceil((end - start) / pieces)
+            spans.extend((s, min(s + step, end)) for s in range(start, end, step))
+        return spans
+
+    def count_tokens(self, text: str) -> int:
+        """Tokens the embedding model sees for text, excluding special tokens."""
+        return len(self._spans(text))
+
+    def _split_oversized(self, text: str, kind: str) -> list[str]:
+        """Break a block that exceeds the budget into pieces that fit."""
+        if kind == "table":
+            units = text.split("\n")
+        else:
+            units = _SENTENCE_PATTERN.split(text)
+        pieces: list[str] = []
+        for unit in units:
+            if self.count_tokens(unit) <= self.budget:
+                pieces.append(unit)
+                continue
+            # A single sentence or row longer than the budget: cut on token spans
+            spans = self._spans(unit)
+            for i in range(0, len(spans), self.budget):
+                window = spans[i:i + self.budget]
+                pieces.append(unit[window[0][0]:window[-1][1]])
+        return pieces
+
+    def split_text(self, text: str) -> list[dict]:
+        """Split one page of text into chunks.
+
+        Returns:
+            Dicts with the chunk text, its section heading, whether it holds
+            table rows and its token count
+        """
+        chunks: list[dict] = []
+        section: Optional[str] = None
+        current: list[str] = []
+        current_tokens = 0
+        has_table = False
+
+        def emit(carry_overlap: bool) -> None:
+            nonlocal current, current_tokens, has_table
+            if not current:
+                return
+            content = "\n".join(current)
+            chunks.append({
+                "text": content,
+                "section": section,
+                "table": has_table,
+                "tokens": self.count_tokens(content),
+            })
+            overlap: list[str] = []
+            if carry_overlap and self.overlap_tokens and not has_table:
+                tail = _SENTENCE_PATTERN.split(current[-1])
+                while tail and self.count_tokens(" ".join([tail[-1], *overlap])) <= self.overlap_tokens:
+                    overlap.insert(0, tail.pop())
+            current = [" ".join(overlap)] if overlap else []
+            current_tokens = self.count_tokens(current[0]) if current else 0
+            has_table = False
+
+        for kind, block in split_blocks(text):
+            if kind == "heading":
+                # Headings open a new chunk instead of dangling at the end of one
+                emit(carry_overlap=False)
+                section = block
+                current, current_tokens = [block], self.count_tokens(block)
+                continue
+
+            pieces = (
+                [block] if self.count_tokens(block) <= self.budget
+                else self._split_oversized(block, kind)
+            )
+            joiner = "\n" if kind == "table" else " "
+            for piece in pieces:
+                tokens = self.count_tokens(piece)
+                if current and current_tokens + tokens + 1 > self.budget:
+                    emit(carry_overlap=kind != "table")
+                    if current and current_tokens + tokens + 1 > self.budget:
+                        current, current_tokens = [], 0
+                if current and kind == "paragraph" and not has_table and current[-1] != section:
+                    current[-1] = current[-1] + joiner + piece
+                else:
+                    current.append(piece)
+                current_tokens = self.count_tokens("\n".join(current))
+                has_table = has_table or kind == "table"
+
+        emit(carry_overlap=False)
+        return chunks
+
+    def split_pages(self, pages: list[Document]) -> list[Document]:
+        """Split page documents; chunks never cross a page boundary."""
+        documents = []
+        for page in pages:
+            for chunk in self.split_text(page.page_content):
+                metadata = dict(page.metadata)
+                metadata["section"] = chunk["section"]
+                metadata["table"] = chunk["table"]
+                metadata["tokens"] = chunk["tokens"]
+                documents.append(Document(page_content=chunk["text"], metadata=metadata))
+        return documents
+
+
+def build_chunker():
+    """Chunker configured by settings.CHUNKING_STRATEGY."""
+    if settings.CHUNKING_STRATEGY == "character":
+        return CharacterChunker()
+    return TokenAwareChunker(tokenizer_name=settings.EMBEDDING_MODEL)
+
+
+def chunking_baseline(pages: list[Document], chunker: TokenAwareChunker) -> tuple[int, int]:
+    """Compare with the character splitter on the same pages.
+
+    Returns:
+        (chunks the character splitter would produce, how many of those
+        exceed the embedding model's token limit and would be truncated)
+    """
+    baseline = CharacterChunker().split_pages(pages)
+    truncated = sum(1 for d in baseline if chunker.count_tokens(d.page_content) > chunker.budget)
+    return len(baseline), truncated
@@ -0,0 +1,165 @@
+"""Token-budgeted context assembly for retrieved chunks.
+
+Search results are re-sent as prompt tokens on every later agent turn,
+so the context handed back by ``search_financial_docs`` is kept small:
+candidates scoring well below the best one are dropped (adaptive k),
+text repeated by overlapping chunks is emitted once, each chunk is cut
+down to the sentences around query matches, and the result is filled
+up to a token budget in score order.
+"""
+
+import math
+import re
+from typing import Optional
+
+from langchain_core.documents import Document
+
+from app.core.settings import settings
+from app.service.sparse_index import tokenize
+
+# Fixed k of the plain "\n\n".join(...) context this builder replaced
+BASELINE_K = 3
+
+ELISION = " ... "
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from has have how in is it its of on or "
+    "that the their this to was were what when which who why will with".split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Prompt tokens of a text, using the ~4 characters per token heuristic."""
+    return math.ceil(len(text) / 4)
+
+
+def split_sentences(text: str) -> list[str]:
+    """Sentences and table rows of a chunk."""
+    return [s.strip() for s in _SENTENCE_BREAK.split(text) if s.strip()]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _query_terms(query: str) -> set[str]:
+    return {term for term in tokenize(query) if term not in _STOPWORDS}
+
+
+def select_candidates(
+    scored: list[tuple[Document, float]],
+    threshold: float = None,
+    min_k: int = None
+) -> list[tuple[Document, float]]:
+    """Adaptive k: keep candidates scoring at least threshold x the best score.
+
+    Args:
+        scored: (document, score) pairs, best first, higher is better
+        threshold: Relative score cut-off (defaults to settings.CONTEXT_SCORE_THRESHOLD)
+        min_k: Candidates always kept (defaults to settings.CONTEXT_MIN_K)
+    """
+    if not scored:
+        return []
+    threshold = settings.CONTEXT_SCORE_THRESHOLD if threshold is None else threshold
+    min_k = min_k or settings.CONTEXT_MIN_K
+    best = scored[0][1]
+    return [
+        (doc, score) for rank, (doc, score) in enumerate(scored)
+        if rank < min_k or score >= threshold * best
+    ]
+
+
+def _excerpt(sentences: list[str], terms: set[str], window: int) -> list[int]:
+    """Indexes of the sentences around query matches, in document order."""
+    matches = [i for i, sentence in enumerate(sentences) if terms & set(tokenize(sentence))]
+    if not matches:
+        # Dense-only hit: the opening of the chunk is the best guess
+        matches = [0]
+    keep = set()
+    for i in matches:
+        keep.update(range(max(0, i - window), min(len(sentences), i + window + 1)))
+    return sorted(keep)
+
+
+def build_context(
+    query: str,
+    scored: list[tuple[Document, float]],
+    budget: int = None,
+    window: int = None
+) -> tuple[str, dict]:
+    """Assemble the context returned to the agent for a query.
+
+    Args:
+        query: Search query, used to find the sentences worth keeping
+        scored: Retrieved (document, score) pairs, best first, higher is better
+        budget: Token budget (defaults to settings.CONTEXT_TOKEN_BUDGET)
+        window: Sentences kept on each side of a match
+            (defaults to settings.CONTEXT_SENTENCE_WINDOW)
+
+    Returns:
+        The context text and a report of the tokens it used and saved
+        against joining the top BASELINE_K chunks
+    """
+    budget = budget or settings.CONTEXT_TOKEN_BUDGET
+    window = settings.CONTEXT_SENTENCE_WINDOW if window is None else window
+    terms = _query_terms(query)
+
+    baseline = "\n\n".join(doc.page_content for doc, _ in scored[:BASELINE_K])
+    selected = select_candidates(scored)
+
+    seen: list[str] = []
+    parts: list[str] = []
+    used = 0
+    duplicates = 0
+    trimmed = 0
+    for doc, _ in selected:
+        sentences = split_sentences(doc.page_content)
+        kept: list[int] = []
+        for i in _excerpt(sentences, terms, window):
+            normalized = _normalize(sentences[i])
+            # Overlapping chunks repeat whole sentences or the fragment
+            # at their boundary: both are already in the context
+            if any(normalized in text for text in seen):
+                duplicates += 1
+                continue
+            cost = estimate_tokens(sentences[i]) + 1
+            if used + cost > budget:
+                break
+            kept.append(i)
+            seen.append(normalized)
+            used += cost
+        trimmed += len(sentences) - len(kept)
+        if kept:
+            excerpt = sentences[kept[0]]
+            for previous, i in zip(kept, kept[1:]):
+                excerpt += (" " if i == previous + 1 else ELISION) + sentences[i]
+            parts.append(excerpt)
+        if used >= budget:
+            break
+
+    text = "\n\n".join(parts)
+    context_tokens = estimate_tokens(text)
+    baseline_tokens = estimate_tokens(baseline)
+    return text, {
+        "context_tokens": context_tokens,
+        "baseline_tokens": baseline_tokens,
+        "context_tokens_saved": baseline_tokens - context_tokens,
+        "chunks_retrieved": len(scored),
+        "chunks_used": len(parts),
+        "duplicate_sentences": duplicates,
+        "sentences_trimmed": trimmed,
+    }
+
+
+def usage_from_report(report: Optional[dict]) -> dict:
+    """Usage entry for a context report (see app.graph.state.reduce_usage)."""
+    if not report:
+        return {}
+    saved = report["context_tokens_saved"]
+    return {
+        "context_tokens": report["context_tokens"],
+        "context_tokens_saved": saved,
+        "context_cost_saved": saved * settings.PRICE_1K_PROMPT / 1000,
+    }
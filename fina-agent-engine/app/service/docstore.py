@@ -0,0 +1,157 @@
+"""SQLite docstore for the vector index.
+
+Chunk text and metadata live in one SQLite file next to ``index.faiss``,
+keyed by FAISS position and docstore ID. Readers fetch rows lazily by
+ID instead of unpickling the whole docstore into every process, so
+workers share the file through the OS page cache.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from collections.abc import Mapping
+from typing import Iterable, Iterator, Union
+
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+
+from app.core.exceptions import IngestionError, ReadOnlyDocstoreError
+
+_SCHEMA = """
+CREATE TABLE chunks (
+    position INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL UNIQUE,
+    page_content TEXT NOT NULL,
+    metadata TEXT NOT NULL
+)
+"""
+
+# SQLite limits the number of bound parameters per statement
+_BATCH = 500
+
+
+def write_docstore(path: str, index_to_docstore_id: Mapping, docstore: Docstore) -> None:
+    """Write every chunk of a store to a new SQLite file, then rename it into place.
+
+    Readers that opened the previous file keep reading it until they are
+    replaced, so an index and its docstore always stay consistent.
+    """
+    def rows() -> Iterator[tuple[int, str, str, str]]:
+        for position, doc_id in index_to_docstore_id.items():
+            doc = docstore.search(doc_id)
+            if not isinstance(doc, Document):
+                # Docstores report a missing ID as a string, not an exception
+                raise IngestionError(f"Chunk {doc_id} at position {position} is missing from the docstore")
+            yield position, doc_id, doc.page_content, json.dumps(doc.metadata)
+
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute(_SCHEMA)
+        conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?)", rows())
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+
+class _Reader:
+    """Read-only connection shared by the threads searching one snapshot."""
+
+    def __init__(self, path: str):
+        # Opened eagerly: the snapshot keeps reading this file even after a
+        # newer one is renamed over the path
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def query(self, sql: str, params: Iterable = ()) -> list[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class SQLiteDocstore(Docstore):
+    """Read-only docstore that fetches chunks from SQLite on demand.
+
+    It is not addable, so LangChain refuses add_texts before the index
+    is touched.
+    """
+
+    def __init__(self, reader: _Reader):
+        self._reader = reader
+
+    def search(self, search: str) -> Union[str, Document]:
+        rows = self._reader.query(
+            "SELECT page_content, metadata FROM chunks WHERE doc_id = ?", (search,)
+        )
+        if not rows:
+            # Same contract as InMemoryDocstore
+            return f"ID {search} not found."
+        page_content, metadata = rows[0]
+        return Document(id=search, page_content=page_content, metadata=json.loads(metadata))
+
+    def delete(self, ids: list) -> None:
+        raise ReadOnlyDocstoreError()
+
+    def metadata_rows(self) -> Iterator[tuple[int, str, dict]]:
+        """(position, docstore ID, metadata) of every chunk, in one query."""
+        for position, doc_id, metadata in self._reader.query("SELECT position, doc_id, metadata FROM chunks"):
+            yield position, doc_id, json.loads(metadata)
+
+
+class PositionMap(Mapping):
+    """FAISS position -> docstore ID, resolved in SQLite instead of memory."""
+
+    def __init__(self, reader: _Reader):
+        self._reader = reader
+        self._size = reader.query("SELECT COUNT(*) FROM chunks")[0][0]
+
+    def __getitem__(self, position: int) -> str:
+        rows = self._reader.query("SELECT doc_id FROM chunks WHERE position = ?", (int(position),))
+        if not rows:
+            raise KeyError(position)
+        return rows[0][0]
+
+    def __iter__(self) -> Iterator[int]:
+        for (position,) in self._reader.query("SELECT position FROM chunks ORDER BY position"):
+            yield position
+
+    def __len__(self) -> int:
+        return self._size
+
+    def many(self, positions: Iterable[int]) -> list[str]:
+        """Docstore IDs of many positions with batched queries."""
+        positions = [int(p) for p in positions]
+        found = {}
+        for i in range(0, len(positions), _BATCH):
+            batch = positions[i:i + _BATCH]
+            found.update(self._reader.query(
+                f"SELECT position, doc_id FROM chunks WHERE position IN ({', '.join('?' * len(batch))})",
+                batch
+            ))
+        return [found[p] for p in positions]
+
+
+def open_docstore(path: str) -> tuple[SQLiteDocstore, PositionMap]:
+    """Open a docstore file for lazy, read-only access."""
+    reader = _Reader(path)
+    return SQLiteDocstore(reader), PositionMap(reader)
+
+
+def load_docstore(path: str) -> tuple[InMemoryDocstore, dict[int, str]]:
+    """Read a docstore file fully into memory, for writers."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT position, doc_id, page_content, metadata FROM chunks").fetchall()
+    finally:
+        conn.close()
+    docstore = InMemoryDocstore({
+        doc_id: Document(id=doc_id, page_content=text, metadata=json.loads(metadata))
+        for _, doc_id, text, metadata in rows
+    })
+    return docstore, {position: doc_id for position, doc_id, _, _ in rows}
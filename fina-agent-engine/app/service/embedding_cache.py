@@ -0,0 +1,218 @@
+"""Persistent, content-addressed embedding cache.
+
+Embeddings are keyed by (model name, SHA256 of the normalized text) and
+stored as float32 blobs in SQLite, with an in-memory LRU in front. Both
+chunk embeddings at ingestion time and query embeddings at search time go
+through the cache, so repeated texts never trigger a remote round-trip.
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core.logger import get_logger
+from app.core.settings import settings
+
+logger = get_logger("EMBEDDING_CACHE")
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+
+
+def normalize_text(text: str) -> str:
+    """Normalize unicode and whitespace so trivially different texts share a key."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def text_key(text: str) -> str:
+    """Content address of a text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite-backed embedding store with an in-memory LRU front.
+
+    Safe to share between the event loop and executor threads.
+    """
+
+    def __init__(self, db_path: str = None, lru_size: int = None):
+        """Initialize the cache. The database is opened lazily on first use.
+
+        Args:
+            db_path: SQLite file path (defaults to settings.EMBEDDING_CACHE_PATH)
+            lru_size: Entries kept in memory (defaults to settings.EMBEDDING_CACHE_LRU_SIZE)
+        """
+        self.db_path = db_path or settings.EMBEDDING_CACHE_PATH
+        self.lru_size = lru_size if lru_size is not None else settings.EMBEDDING_CACHE_LRU_SIZE
+        self._lru: OrderedDict[tuple[str, str], list[float]] = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            logger.info(f"Embedding cache opened at {self.db_path}")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (model, text_hash)
+                ) WITHOUT ROWID
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, key: tuple[str, str], vector: list[float]) -> None:
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def get_many(self, model: str, hashes: list[str]) -> dict[str, list[float]]:
+        """Look up cached vectors, memory first and then disk.
+
+        Args:
+            model: Embedding model name
+            hashes: Text hashes to look up
+
+        Returns:
+            Mapping of found hashes to their vectors
+        """
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            pending = []
+            for h in dict.fromkeys(hashes):
+                vector = self._lru.get((model, h))
+                if vector is not None:
+                    self._lru.move_to_end((model, h))
+                    found[h] = vector
+                    self.memory_hits += 1
+                else:
+                    pending.append(h)
+
+            conn = self._connection()
+            disk_found = 0
+            for i in range(0, len(pending), _LOOKUP_BATCH):
+                batch = pending[i:i + _LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for h, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32).tolist()
+                    found[h] = vector
+                    self._remember((model, h), vector)
+                    disk_found += 1
+
+            self.disk_hits += disk_found
+            self.misses += len(pending) - disk_found
+        return found
+
+    def put_many(self, model: str, items: dict[str, list[float]]) -> None:
+        """Store freshly computed vectors on disk and in memory."""
+        if not items:
+            return
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                [
+                    (model, h, np.asarray(v, dtype=np.float32).tobytes())
+                    for h, v in items.items()
+                ],
+            )
+            conn.commit()
+            for h, v in items.items():
+                self._remember((model, h), v)
+
+    def stats(self) -> dict:
+        """Hit/miss counters for health reporting."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "lru_entries": len(self._lru),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that consults an EmbeddingCache before the model."""
+
+    def __init__(self, inner: Embeddings, model_name: str, cache: EmbeddingCache):
+        """Wrap an embeddings object.
+
+        Args:
+            inner: Embeddings used on cache misses
+            model_name: Model identifier, part of the cache key
+            cache: Shared cache instance
+        """
+        self.inner = inner
+        self.model_name = model_name
+        self.cache = cache
+
+    def _split(self, texts: list[str]) -> tuple[list[str], dict, list[tuple[str, str]]]:
+        hashes = [text_key(t) for t in texts]
+        cached = self.cache.get_many(self.model_name, hashes)
+        missing: dict[str, str] = {}
+        for h, t in zip(hashes, texts):
+            if h not in cached:
+                missing.setdefault(h, t)
+        return hashes, cached, list(missing.items())
+
+    def _merge(self, hashes, cached, missing, vectors) -> list[list[float]]:
+        computed = {h: v for (h, _), v in zip(missing, vectors)}
+        self.cache.put_many(self.model_name, computed)
+        cached.update(computed)
+        return [cached[h] for h in hashes]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        hashes, cached, missing = self._split(texts)
+        vectors = self.inner.embed_documents([t for _, t in missing]) if missing else []
+        return self._merge(hashes, cached, missing, vectors)
+
+    def embed_query(self, text: str) -> list[float]:
+        hashes, cached, missing = self._split([text])
+        vectors = [self.inner.embed_query(text)] if missing else []
+        return self._merge(hashes, cached, missing, vectors)[0]
+
+    # The async variants keep SQLite reads and commits off the event loop
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        hashes, cached, missing = await asyncio.to_thread(self._split, texts)
+        vectors = await self.inner.aembed_documents([t for _, t in missing]) if missing else []
+        return await asyncio.to_thread(self._merge, hashes, cached, missing, vectors)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        hashes, cached, missing = await asyncio.to_thread(self._split, [text])
+        vectors = [await self.inner.aembed_query(text)] if missing else []
+        return (await asyncio.to_thread(self._merge, hashes, cached, missing, vectors))[0]
+
+
+# Singleton Instance
+embedding_cache = EmbeddingCache()
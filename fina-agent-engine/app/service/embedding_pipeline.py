@@ -0,0 +1,148 @@
+"""Batched, concurrent embedding stage for document ingestion.
+
+Splits the chunks of a document into fixed-size batches and keeps a
+bounded number of them in flight against the embedding endpoint at once.
+The bound is shared by every pipeline in the process, so concurrent
+ingestion jobs don't multiply the load on the endpoint.
+Rate-limit (429) and server (5xx) errors are retried with jittered
+exponential backoff, honouring Retry-After when the endpoint sends it.
+"""
+
+import asyncio
+import random
+from typing import Callable, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from app.core.logger import get_logger
+from app.core.settings import settings
+
+logger = get_logger("EMBEDDING_PIPELINE")
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """Extract an HTTP status code from requests/httpx/aiohttp style errors."""
+    response = getattr(error, "response", None)
+    for source in (response, error):
+        for attr in ("status_code", "status"):
+            code = getattr(source, attr, None)
+            if isinstance(code, int):
+                return code
+    return None
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an embedding error is transient (rate limited or server side)."""
+    code = _status_code(error)
+    if code is not None:
+        return code == 429 or code >= 500
+    return isinstance(error, (TimeoutError, ConnectionError))
+
+
+class EmbeddingPipeline:
+    """Embeds large lists of texts in bounded-parallel batches."""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        batch_size: int = None,
+        max_in_flight: int = None,
+        max_retries: int = None,
+        base_delay: float = None,
+        max_delay: float = None,
+        progress: Optional[ProgressCallback] = None,
+    ):
+        """Initialize the pipeline. Unset options fall back to settings.
+
+        Args:
+            embeddings: Embeddings object used for each batch
+            batch_size: Texts per embedding request
+            max_in_flight: Maximum concurrent batch requests of this pipeline
+                alone; by default the process-wide embedding_slots are shared
+            max_retries: Retries per batch on transient errors
+            base_delay: First backoff delay in seconds
+            max_delay: Upper bound for a single backoff delay in seconds
+            progress: Called with (texts embedded, texts submitted) after each batch
+        """
+        self.embeddings = embeddings
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.max_in_flight = max_in_flight or settings.EMBEDDING_MAX_IN_FLIGHT
+        self.max_retries = max_retries if max_retries is not None else settings.EMBEDDING_MAX_RETRIES
+        self.base_delay = base_delay if base_delay is not None else settings.EMBEDDING_RETRY_BASE_DELAY
+        self.max_delay = max_delay if max_delay is not None else settings.EMBEDDING_RETRY_MAX_DELAY
+        self.progress = progress
+        # Shared by concurrent embed() calls, and by default across pipelines
+        self._semaphore = asyncio.Semaphore(max_in_flight) if max_in_flight else embedding_slots
+        self.submitted = 0
+        self.embedded = 0
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        delay = min(self.base_delay * (2 ** attempt), self.max_delay)
+        # Full jitter avoids synchronized retries across batches
+        return random.uniform(0, delay)
+
+    async def _embed_batch(self, batch: list[str]) -> list[list[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self.embeddings.aembed_documents(batch)
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                delay = self._backoff(attempt, e)
+                logger.warning(
+                    f"Embedding batch failed ({_status_code(e) or type(e).__name__}), "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+        raise RuntimeError("unreachable")
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts, preserving input order.
+
+        May be called concurrently, e.g. once per parsed page range; all
+        calls share the in-flight limit and the pipeline's progress counters.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One vector per input text
+        """
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results: list[Optional[list[list[float]]]] = [None] * len(batches)
+        self.submitted += len(texts)
+
+        async def run(index: int, batch: list[str]) -> None:
+            async with self._semaphore:
+                results[index] = await self._embed_batch(batch)
+            self.embedded += len(batch)
+            if self.progress:
+                self.progress(self.embedded, self.submitted)
+
+        tasks = [asyncio.create_task(run(i, b)) for i, b in enumerate(batches)]
+        try:
+            await asyncio.gather(*tasks)
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        return [vector for batch in results for vector in batch]
+
+
+# Singleton Instance
+# In-flight embedding requests of all ingestion jobs in this process
+embedding_slots = asyncio.Semaphore(settings.EMBEDDING_MAX_IN_FLIGHT)
@@ -0,0 +1,320 @@
+"""Background ingestion jobs.
+
+Uploads are queued as jobs and processed by a bounded pool of worker
+tasks built around IngestionService, so the HTTP request returns as soon
+as the file is stored. Job state lives in a small SQLite table and is
+recovered on restart: unfinished jobs whose upload is still on disk are
+re-queued, the rest are marked as failed.
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncGenerator, Optional
+
+import aiosqlite
+
+from app.core.exceptions import IngestionError, IngestionQueueFullError
+from app.core.logger import get_logger
+from app.core.settings import settings
+from app.service.ingestion_service import IngestionProgress, IngestionService
+
+logger = get_logger("INGESTION_JOBS")
+
+TERMINAL_STATUSES = ("succeeded", "skipped", "failed")
+
+_COLUMNS = (
+    "job_id", "status", "filename", "file_path", "file_hash", "issuer", "report_date", "tenant",
+    "pages_total", "pages_parsed", "chunks_parsed", "chunks_embedded",
+    "chunks_processed", "chunking", "deduplication", "error", "created_at", "started_at", "finished_at",
+)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class IngestionJobManager:
+    """Queues uploads and processes them with a bounded worker pool."""
+
+    def __init__(self, db_path: str = None, workers: int = None, queue_size: int = None):
+        """Initialize the manager. Workers are started by start().
+
+        Args:
+            db_path: SQLite file for job state (defaults to settings.INGESTION_JOBS_DB_PATH)
+            workers: Concurrent jobs (defaults to settings.INGESTION_WORKERS)
+            queue_size: Maximum queued jobs (defaults to settings.INGESTION_QUEUE_SIZE)
+        """
+        self.db_path = db_path or settings.INGESTION_JOBS_DB_PATH
+        self.workers = workers or settings.INGESTION_WORKERS
+        self.queue_size = queue_size or settings.INGESTION_QUEUE_SIZE
+        self.service: Optional[IngestionService] = None
+        self._db: Optional[aiosqlite.Connection] = None
+        # Unbounded, so every recovered job fits; queue_size limits new
+        # submissions through _queued, which submit() reserves synchronously
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued = 0
+        self._tasks: list[asyncio.Task] = []
+        # Jobs being processed: progress is served from memory, flushed periodically
+        self._live: dict[str, dict] = {}
+        self._started_monotonic: dict[str, float] = {}
+
+    async def start(self, service: IngestionService) -> None:
+        """Open the job table, recover unfinished jobs and start the workers."""
+        self.service = service
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._db = await aiosqlite.connect(self.db_path)
+        self._db.row_factory = aiosqlite.Row
+        await self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ingestion_jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                file_hash TEXT,
+                issuer TEXT,
+                report_date TEXT,
+                tenant TEXT,
+                pages_total INTEGER DEFAULT 0,
+                pages_parsed INTEGER DEFAULT 0,
+                chunks_parsed INTEGER DEFAULT 0,
+                chunks_embedded INTEGER DEFAULT 0,
+                chunks_processed INTEGER,
+                chunking TEXT,
+                deduplication TEXT,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                started_at TEXT,
+                finished_at TEXT
+            )
+            """
+        )
+        await self._db.commit()
+        self._queue = asyncio.Queue()
+        self._queued = 0
+        await self._recover()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Ingestion job manager started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        """Stop the workers. Interrupted jobs are resumed on next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+    async def _recover(self) -> None:
+        async with self._db.execute(
+            "SELECT job_id, file_path FROM ingestion_jobs "
+            "WHERE status IN ('queued', 'running') ORDER BY created_at"
+        ) as cursor:
+            pending = await cursor.fetchall()
+
+        for row in pending:
+            if os.path.exists(row["file_path"]):
+                await self._update(
+                    row["job_id"], status="queued", pages_parsed=0,
+                    chunks_parsed=0, chunks_embedded=0, started_at=None
+                )
+                self._queued += 1
+                self._queue.put_nowait(row["job_id"])
+            else:
+                await self._update(
+                    row["job_id"], status="failed", finished_at=_now(),
+                    error="Upload was lost during a restart"
+                )
+        if pending:
+            logger.info(f"Recovered {len(pending)} unfinished ingestion jobs")
+
+    async def _update(self, job_id: str, **fields) -> None:
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        await self._db.execute(
+            f"UPDATE ingestion_jobs SET {assignments} WHERE job_id = ?",
+            [*fields.values(), job_id]
+        )
+        await self._db.commit()
+
+    async def submit(
+        self,
+        file_path: str,
+        filename: str,
+        file_hash: str = None,
+        issuer: str = None,
+        report_date: str = None,
+        tenant: str = None
+    ) -> dict:
+        """Queue an uploaded file for ingestion.
+
+        Args:
+            file_path: Temporary path of the upload; removed once processed
+            filename: Original name of the uploaded file
+            file_hash: SHA256 computed during upload
+            issuer: Issuer or ticker of the report, for filtered search
+            report_date: ISO date of the report, for filtered search
+            tenant: Vector store namespace to ingest into (None: shared store)
+
+        Returns:
+            The new job record
+
+        Raises:
+            IngestionQueueFullError: If the queue is at capacity
+            IngestionError: If the manager has not been started
+        """
+        if self._queue is None:
+            raise IngestionError("Ingestion workers are not running")
+        if self._queued >= self.queue_size:
+            raise IngestionQueueFullError()
+        # Reserve the slot before the first await so racing submits cannot both take it
+        self._queued += 1
+
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "status": "queued",
+            "filename": filename,
+            "file_path": file_path,
+            "file_hash": file_hash,
+            "issuer": issuer,
+            "report_date": report_date,
+            "tenant": tenant,
+            "created_at": _now(),
+        }
+        try:
+            await self._db.execute(
+                f"INSERT INTO ingestion_jobs ({', '.join(job)}) VALUES ({', '.join('?' * len(job))})",
+                list(job.values())
+            )
+            await self._db.commit()
+        except BaseException:
+            self._queued -= 1
+            raise
+        self._queue.put_nowait(job["job_id"])
+        logger.info(f"Queued ingestion job {job['job_id']} ({filename})")
+        return await self.get(job["job_id"])
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        """Current state of a job, including an ETA while it is running."""
+        job = self._live.get(job_id)
+        if job is None:
+            async with self._db.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM ingestion_jobs WHERE job_id = ?", (job_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            if row is None:
+                return None
+            job = dict(row)
+        job = dict(job)
+        job.pop("file_path", None)
+        for report in ("chunking", "deduplication"):
+            if isinstance(job.get(report), str):
+                job[report] = json.loads(job[report])
+        job["eta_seconds"] = self._eta(job_id, job)
+        return job
+
+    def _eta(self, job_id: str, job: dict) -> Optional[float]:
+        started = self._started_monotonic.get(job_id)
+        if job["status"] != "running" or started is None or not job["chunks_embedded"]:
+            return None
+        elapsed = time.monotonic() - started
+        # Until every page is parsed, extrapolate the chunk total from parsed pages
+        expected_chunks = job["chunks_parsed"]
+        if job["pages_parsed"] and job["pages_parsed"] < job["pages_total"]:
+            expected_chunks = job["chunks_parsed"] * job["pages_total"] / job["pages_parsed"]
+        remaining = max(expected_chunks - job["chunks_embedded"], 0)
+        return round(remaining * elapsed / job["chunks_embedded"], 1)
+
+    async def events(self, job_id: str) -> AsyncGenerator[str, None]:
+        """Server-Sent Events stream of a job's progress until it finishes."""
+        last = None
+        while True:
+            job = await self.get(job_id)
+            if job is None:
+                yield f"data: {json.dumps({'type': 'error', 'content': 'Job not found'})}\n\n"
+                return
+            snapshot = {k: v for k, v in job.items() if k != "eta_seconds"}
+            if snapshot != last:
+                last = snapshot
+                yield f"data: {json.dumps({'type': 'progress', 'job': job})}\n\n"
+            if job["status"] in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(settings.INGESTION_PROGRESS_INTERVAL)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self._queued -= 1
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Ingestion job {job_id} crashed: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _flush_progress(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(settings.INGESTION_PROGRESS_INTERVAL)
+            live = self._live[job_id]
+            await self._update(job_id, **{
+                k: live[k] for k in IngestionProgress().as_dict()
+            })
+
+    async def _run(self, job_id: str) -> None:
+        async with self._db.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM ingestion_jobs WHERE job_id = ?", (job_id,)
+        ) as cursor:
+            job = dict(await cursor.fetchone())
+
+        job.update(status="running", started_at=_now(), **IngestionProgress().as_dict())
+        self._live[job_id] = job
+        self._started_monotonic[job_id] = time.monotonic()
+        await self._update(job_id, status="running", started_at=job["started_at"])
+
+        def on_progress(counters: IngestionProgress) -> None:
+            job.update(counters.as_dict())
+
+        flusher = asyncio.create_task(self._flush_progress(job_id))
+        try:
+            result = await self.service.process_pdf(
+                job["file_path"],
+                filename=job["filename"],
+                progress=on_progress,
+                file_hash=job["file_hash"],
+                issuer=job["issuer"],
+                report_date=job["report_date"],
+                tenant=job["tenant"]
+            )
+            outcome = {
+                "status": "succeeded" if result.status == "success" else result.status,
+                "file_hash": result.file_hash,
+                "chunks_processed": result.chunks_processed,
+                "chunking": result.chunking.model_dump_json() if result.chunking else None,
+                "deduplication": (
+                    result.deduplication.model_dump_json() if result.deduplication else None
+                ),
+            }
+        except Exception as e:
+            outcome = {"status": "failed", "error": str(e)}
+        finally:
+            flusher.cancel()
+
+        await self._update(
+            job_id,
+            finished_at=_now(),
+            **{k: job[k] for k in IngestionProgress().as_dict()},
+            **outcome
+        )
+        self._live.pop(job_id, None)
+        self._started_monotonic.pop(job_id, None)
+        if os.path.exists(job["file_path"]):
+            os.remove(job["file_path"])
+        logger.info(f"Ingestion job {job_id} finished: {outcome['status']}")
+
+
+# Singleton Instance
+ingestion_jobs = IngestionJobManager()
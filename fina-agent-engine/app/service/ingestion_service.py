@@ -1,97 +1,593 @@
-import hashlib
+import asyncio
 import os
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Optional
 
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
 from langchain_huggingface import HuggingFaceEndpointEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-from app.core.exceptions import IngestionError
+from app.core.exceptions import DocumentNotFoundError, IngestionError
 from app.core.logger import get_logger
 from app.core.settings import settings
+from app.schemas.agent_schemas import DocumentFilter
+from app.schemas.responses import ChunkingReport, DeduplicationReport, IngestionResponse
+from app.service.ann_index import ensure_index_type, read_report, remove_vectors
+from app.service.context_builder import BASELINE_K, build_context, estimate_tokens
+from app.service.embedding_cache import CachedEmbeddings, embedding_cache
+from app.service.embedding_pipeline import EmbeddingPipeline
+from app.service.metadata_filter import search_positions, selected_ids
+from app.service.near_duplicates import MinHashIndex
+from app.service.pdf_parser import PDFParser, hash_file, pdf_parser
+from app.service.query_batcher import QueryBatcher, query_batcher
+from app.service.query_fanout import merge_results, plan_queries
+from app.service.search_pool import search_pool
+from app.service.sparse_index import BM25Index, reciprocal_rank_fusion
+from app.service.vector_store import (
+    TenantIndexes,
+    VectorIndexHolder,
+    collect_snapshots,
+    current_snapshot,
+    load_store,
+    migrate_legacy_store,
+    read_registry,
+    tenant_indexes,
+    vector_index,
+    write_snapshot,
+)
 
 logger = get_logger("INGESTION_SERVICE")
 
 
-class IngestionService:
+class IngestionProgress:
+    """Live counters of a document moving through the ingestion pipeline."""
+
     def __init__(self):
+        self.pages_total = 0
+        self.pages_parsed = 0
+        self.chunks_parsed = 0
+        self.chunks_embedded = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "pages_total": self.pages_total,
+            "pages_parsed": self.pages_parsed,
+            "chunks_parsed": self.chunks_parsed,
+            "chunks_embedded": self.chunks_embedded,
+        }
+
+
+ProgressCallback = Callable[[IngestionProgress], None]
+
+
+class IngestionService:
+    storage_mode = "Cloud API (Zero Disk Impact)"
+
+    def __init__(
+        self,
+        index_holder: VectorIndexHolder = None,
+        parser: PDFParser = None,
+        batcher: QueryBatcher = None,
+        tenants: TenantIndexes = None
+    ):
         # Cloud API: 0 bytes of model downloads
         self.embeddings = HuggingFaceEndpointEmbeddings(
             model=settings.EMBEDDING_MODEL,
             huggingfacehub_api_token=settings.HUGGINGFACEHUB_API_TOKEN
         )
-        self.db_path = settings.VECTOR_DB_PATH
+        if settings.EMBEDDING_CACHE_ENABLED:
+            # Repeated chunks and queries are served without a remote call
+            self.embeddings = CachedEmbeddings(
+                self.embeddings, settings.EMBEDDING_MODEL, embedding_cache
+            )
+        self.vector_index = index_holder or vector_index
+        self.parser = parser or pdf_parser
+        self.batcher = batcher or query_batcher
+        self.db_path = self.vector_index.db_path
+        # Per-tenant stores live next to the shared one
+        self.tenants = tenants or (
+            tenant_indexes if index_holder is None else TenantIndexes(self.vector_index)
+        )
 
     def _calculate_hash(self, file_path: str) -> str:
         """Calculate SHA256 hash of file for deduplication."""
-        hasher = hashlib.sha256()
-        with open(file_path, 'rb') as f:
-            hasher.update(f.read())
-        return hasher.hexdigest()
+        return hash_file(file_path)
 
-    async def process_pdf(self, file_path: str) -> int:
+    @staticmethod
+    def _read_registry(db_path: str) -> dict:
+        """Document registry of the snapshot currently published in db_path."""
+        snapshot = current_snapshot(db_path)
+        return read_registry(snapshot) if snapshot else {}
+
+    def _load_writable_index(self, holder: VectorIndexHolder):
+        """Load a private copy of a holder's on-disk index for modification.
+
+        Writers never mutate the resident index that readers are searching;
+        the modified copy is published once it has been saved.
+        """
+        snapshot = current_snapshot(holder.db_path)
+        if snapshot is None:
+            return None
+        migrate_legacy_store(snapshot, self.embeddings)
+        return load_store(snapshot, self.embeddings, writable=True)
+
+    def _load_writable_sparse(self, snapshot: Optional[str], vector_db) -> BM25Index:
+        """Private copy of the BM25 index matching a writable FAISS copy."""
+        sparse = BM25Index.load(snapshot) if snapshot else None
+        if sparse is None and vector_db is not None:
+            sparse = BM25Index.from_docstore(vector_db.index_to_docstore_id, vector_db.docstore)
+        return sparse or BM25Index()
+
+    @staticmethod
+    def _load_near_duplicates(snapshot: Optional[str], vector_db=None) -> MinHashIndex:
+        """Private copy of the MinHash signatures matching a snapshot."""
+        signatures = MinHashIndex.load(snapshot) if snapshot else None
+        if signatures is None and vector_db is not None:
+            signatures = MinHashIndex.from_docstore(vector_db.index_to_docstore_id, vector_db.docstore)
+        return signatures or MinHashIndex()
+
+    def _skipped(self, filename: str, file_hash: str) -> IngestionResponse:
+        return IngestionResponse(
+            status="skipped",
+            filename=filename,
+            file_hash=file_hash,
+            chunks_processed=0,
+            storage_mode=self.storage_mode
+        )
+
+    async def process_pdf(
+        self,
+        file_path: str,
+        filename: str = None,
+        progress: Optional[ProgressCallback] = None,
+        file_hash: str = None,
+        issuer: str = None,
+        report_date: str = None,
+        tenant: Optional[str] = None
+    ) -> IngestionResponse:
         """Process PDF file and store in vector database.
         
+        In append mode the new chunks are added to the existing index and
+        documents already present in the registry are skipped without any
+        embedding calls. In overwrite mode the index is rebuilt from this
+        document only. Chunks that nearly duplicate an indexed chunk, or an
+        earlier chunk of the same document, are linked to it in the
+        registry instead of being embedded (settings.NEAR_DUPLICATE_DEDUP).
+        
         Args:
             file_path: Path to the PDF file
+            filename: Original name of the uploaded file
+            progress: Called with the IngestionProgress after each parsed page
+                range and each embedded batch
+            file_hash: SHA256 computed while the file was uploaded, if available
+            issuer: Issuer or ticker of the report, stored for filtered search
+            report_date: ISO date of the report, stored for filtered search
+            tenant: Vector store namespace (see tenant_for); None is the shared store
             
         Returns:
-            Number of chunks processed
+            IngestionResponse with the number of chunks processed
             
         Raises:
             IngestionError: If PDF processing fails
         """
+        filename = filename or os.path.basename(file_path)
+        append = settings.INGESTION_MODE == "append"
+        holder = self.tenants.holder(tenant)
+        db_path = holder.db_path
         try:
-            file_hash = self._calculate_hash(file_path)
+            file_hash = file_hash or await self.parser.hash_file(file_path)
             logger.info(f"Processing PDF (Hash: {file_hash[:10]})")
 
-            loader = PyPDFLoader(file_path)
-            docs = loader.load()
+            if append and file_hash in self._read_registry(db_path):
+                logger.info(f"PDF already ingested, skipping (Hash: {file_hash[:10]})")
+                return self._skipped(filename, file_hash)
 
-            splitter = RecursiveCharacterTextSplitter(
-                chunk_size=settings.CHUNK_SIZE,
-                chunk_overlap=settings.CHUNK_OVERLAP
-            )
-            chunks = splitter.split_documents(docs)
+            dedup = settings.NEAR_DUPLICATE_DEDUP
+            seen = MinHashIndex()
+            if dedup and append:
+                seen = await asyncio.to_thread(self._load_near_duplicates, current_snapshot(db_path))
+            signatures = {}
+            linked: dict[str, str] = {}
+            duplicates: dict[str, Document] = {}
 
-            # Save to FAISS (lightweight and fast)
-            vector_db = FAISS.from_documents(chunks, self.embeddings)
-            vector_db.save_local(self.db_path)
+            # Parsing and splitting run in the process pool; each page range
+            # is handed to the embedding stage as soon as it is parsed
+            counters = IngestionProgress()
 
-            return len(chunks)
+            def on_embedded(done: int, submitted: int) -> None:
+                counters.chunks_embedded = done
+                if progress:
+                    progress(counters)
+
+            pipeline = EmbeddingPipeline(self.embeddings, progress=on_embedded)
+            chunks, ids, embed_tasks = [], [], []
+            baseline_chunks = baseline_truncated = 0
+            try:
+                async for parsed in self.parser.iter_chunks(file_path):
+                    group = parsed.chunks
+                    counters.pages_total = parsed.total_pages
+                    counters.pages_parsed += parsed.end - parsed.start
+                    counters.chunks_parsed += len(group)
+                    baseline_chunks += parsed.baseline_chunks
+                    baseline_truncated += parsed.baseline_truncated
+                    if progress:
+                        progress(counters)
+                    if dedup:
+                        group_signatures = await asyncio.to_thread(
+                            lambda: [seen.signature(chunk.page_content) for chunk in group]
+                        )
+                    else:
+                        group_signatures = [None] * len(group)
+                    per_page = Counter()
+                    kept = []
+                    for chunk, signature in zip(group, group_signatures):
+                        page = chunk.metadata.get("page", 0)
+                        chunk.metadata["file_hash"] = file_hash
+                        chunk.metadata["filename"] = filename
+                        if issuer:
+                            chunk.metadata["issuer"] = issuer
+                        if report_date:
+                            chunk.metadata["report_date"] = report_date
+                        chunk_id = f"{file_hash}:{page}:{per_page[page]}"
+                        per_page[page] += 1
+                        canonical = seen.find(signature)
+                        if canonical is not None:
+                            linked[chunk_id] = canonical
+                            duplicates[chunk_id] = chunk
+                            continue
+                        seen.add(chunk_id, signature)
+                        if signature is not None:
+                            signatures[chunk_id] = signature
+                        ids.append(chunk_id)
+                        kept.append(chunk)
+                    chunks.extend(kept)
+                    if kept:
+                        embed_tasks.append(asyncio.create_task(
+                            pipeline.embed([chunk.page_content for chunk in kept])
+                        ))
+                vectors = [v for group in await asyncio.gather(*embed_tasks) for v in group]
+            except BaseException:
+                for task in embed_tasks:
+                    task.cancel()
+                raise
+
+            async with holder.write_lock:
+                vector_db = None
+                registry = {}
+                snapshot = None
+                if append:
+                    snapshot = current_snapshot(db_path)
+                    registry = self._read_registry(db_path)
+                    if file_hash in registry:
+                        # A concurrent job for the same file published first
+                        logger.info(f"PDF ingested concurrently, skipping (Hash: {file_hash[:10]})")
+                        return self._skipped(filename, file_hash)
+                    vector_db = await asyncio.to_thread(self._load_writable_index, holder)
+                sparse = await asyncio.to_thread(self._load_writable_sparse, snapshot, vector_db)
+                near_duplicates = await asyncio.to_thread(self._load_near_duplicates, snapshot, vector_db)
+                for chunk_id, signature in signatures.items():
+                    near_duplicates.add(chunk_id, signature)
+
+                # A concurrent delete may have removed a chunk that duplicates
+                # were linked to: those are embedded after all
+                orphans = [
+                    chunk_id for chunk_id, canonical in linked.items()
+                    if canonical not in near_duplicates
+                ]
+                if orphans:
+                    orphan_chunks = [duplicates[chunk_id] for chunk_id in orphans]
+                    vectors += await pipeline.embed([chunk.page_content for chunk in orphan_chunks])
+                    chunks.extend(orphan_chunks)
+                    ids.extend(orphans)
+                    for chunk_id, chunk in zip(orphans, orphan_chunks):
+                        del linked[chunk_id]
+                        near_duplicates.add(chunk_id, near_duplicates.signature(chunk.page_content))
+
+                texts = [chunk.page_content for chunk in chunks]
+                text_embeddings = list(zip(texts, vectors))
+                metadatas = [chunk.metadata for chunk in chunks]
+                sparse.add(ids, texts)
+
+                # Save to FAISS (lightweight and fast)
+                if vector_db is None:
+                    vector_db = FAISS.from_embeddings(
+                        text_embeddings, self.embeddings, metadatas=metadatas, ids=ids
+                    )
+                elif text_embeddings:
+                    vector_db.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+                # Trains the configured ANN index once enough vectors exist
+                ann_report = await asyncio.to_thread(ensure_index_type, vector_db)
+                if ann_report is None and snapshot:
+                    ann_report = read_report(snapshot)
+
+                registry[file_hash] = {
+                    "filename": filename,
+                    "issuer": issuer,
+                    "report_date": report_date,
+                    "ingested_at": datetime.now(timezone.utc).isoformat(),
+                    "ids": ids,
+                    "linked": linked,
+                }
+                # Readers keep searching the previous snapshot until it is published
+                version, path = await asyncio.to_thread(
+                    write_snapshot, db_path, vector_db, sparse, registry, ann_report, near_duplicates,
+                    file_hash=file_hash, index_type=type(vector_db.index).__name__
+                )
+                dimension = vector_db.index.d
+                holder.publish(vector_db, version, sparse=sparse, path=path)
+            self.tenants.touch(tenant)
+            await asyncio.to_thread(collect_snapshots, db_path)
+
+            chunks_parsed = counters.chunks_parsed
+            saved = baseline_chunks - chunks_parsed
+            report = ChunkingReport(
+                strategy=self.parser.chunker.strategy,
+                chunks=chunks_parsed,
+                baseline_chunks=baseline_chunks,
+                baseline_truncated_chunks=baseline_truncated,
+                chunks_saved=saved,
+                vectors_saved=saved,
+                index_bytes_saved=saved * dimension * 4
+            )
+            deduplication = DeduplicationReport(
+                enabled=dedup,
+                chunks_checked=chunks_parsed,
+                near_duplicates=len(linked),
+                embeddings_saved=len(linked),
+                index_bytes_saved=len(linked) * dimension * 4
+            )
+            logger.info(
+                f"Chunked into {chunks_parsed} chunks vs {baseline_chunks} with the character "
+                f"splitter ({baseline_truncated} of those would be truncated by the model); "
+                f"{len(linked)} near-duplicates linked instead of embedded"
+            )
+
+            return IngestionResponse(
+                status="success",
+                filename=filename,
+                file_hash=file_hash,
+                chunks_processed=len(chunks),
+                storage_mode=self.storage_mode,
+                chunking=report,
+                deduplication=deduplication
+            )
         except Exception as e:
             logger.error(f"PDF processing failed: {str(e)}")
             raise IngestionError(f"Failed to process PDF: {str(e)}")
 
-    async def search_in_vector_db(self, query: str, k: int = 3) -> str:
-        """Search for relevant document chunks in FAISS vector database.
+    async def delete_document(self, file_hash: str, tenant: Optional[str] = None) -> int:
+        """Remove every vector belonging to a previously ingested PDF.
+        
+        Chunks that other documents link to as near-duplicates are kept and
+        handed over to the first of those documents.
+        
+        Args:
+            file_hash: SHA256 hash of the ingested file
+            tenant: Vector store namespace the document was ingested into
+            
+        Returns:
+            Number of chunks removed
+            
+        Raises:
+            DocumentNotFoundError: If no document with that hash was ingested
+            IngestionError: If the index cannot be updated
+        """
+        holder = self.tenants.holder(tenant)
+        db_path = holder.db_path
+        async with holder.write_lock:
+            snapshot = current_snapshot(db_path)
+            registry = self._read_registry(db_path)
+            entry = registry.get(file_hash)
+            if entry is None:
+                raise DocumentNotFoundError(file_hash)
+
+            del registry[file_hash]
+            removed = self._release_chunks(registry, entry["ids"])
+            try:
+                vector_db = await asyncio.to_thread(self._load_writable_index, holder)
+                sparse = await asyncio.to_thread(self._load_writable_sparse, snapshot, vector_db)
+                near_duplicates = await asyncio.to_thread(self._load_near_duplicates, snapshot, vector_db)
+                if removed:
+                    remove_vectors(vector_db, removed)
+                    sparse.remove(removed)
+                    near_duplicates.remove(removed)
+
+                version, path = await asyncio.to_thread(
+                    write_snapshot, db_path, vector_db, sparse, registry, read_report(snapshot),
+                    near_duplicates, deleted_hash=file_hash
+                )
+                holder.publish(vector_db, version, sparse=sparse, path=path)
+            except Exception as e:
+                logger.error(f"Document deletion failed: {str(e)}")
+                raise IngestionError(f"Failed to delete document: {str(e)}")
+        await asyncio.to_thread(collect_snapshots, db_path)
+
+        logger.info(f"Deleted {len(removed)} chunks (Hash: {file_hash[:10]})")
+        return len(removed)
+
+    @staticmethod
+    def _release_chunks(registry: dict, ids: list[str]) -> list[str]:
+        """Chunk IDs of a deleted document that no other document links to.
+
+        Each linked chunk is adopted by the first remaining document that
+        links to it, which then owns it like its own chunks.
+        """
+        owned = set(ids)
+        adopted = set()
+        for entry in registry.values():
+            linked = entry.get("linked", {})
+            for chunk_id, canonical in list(linked.items()):
+                if canonical in owned and canonical not in adopted:
+                    entry["ids"].append(canonical)
+                    adopted.add(canonical)
+                    del linked[chunk_id]
+        return [chunk_id for chunk_id in ids if chunk_id not in adopted]
+
+    async def _dense_search(self, loaded, query: str, k: int, positions=None) -> list[tuple[str, Document, float]]:
+        """Nearest chunks as (docstore ID, document, score), optionally pre-filtered.
+
+        Embedding and unfiltered search go through the query batcher, so
+        concurrent searches share one embedding call and one index.search.
+        Scores are 1 / (1 + L2 distance), higher is better.
+        """
+        vector, hits, distances = await self.batcher.search(
+            loaded.store, self.embeddings, query, k if positions is None else 0
+        )
+        return await search_pool.run(self._resolve_hits, loaded.store, vector, hits, distances, positions, k)
+
+    @staticmethod
+    def _resolve_hits(store, vector, hits, distances, positions, k: int) -> list[tuple[str, Document, float]]:
+        if positions is not None:
+            hits, distances = search_positions(store.index, vector, positions, k)
+        mapping = store.index_to_docstore_id
+        ids = mapping.many(hits) if hasattr(mapping, "many") else [mapping[p] for p in hits]
+        return [
+            (doc_id, store.docstore.search(doc_id), 1 / (1 + distance))
+            for doc_id, distance in zip(ids, distances)
+        ]
+
+    async def _hybrid_search(self, loaded, query: str, k: int, positions=None) -> list[tuple[Document, float]]:
+        """Fuse dense and BM25 candidates with reciprocal-rank fusion."""
+        candidates = max(k, settings.HYBRID_CANDIDATES)
+        dense = await self._dense_search(loaded, query, candidates, positions)
+        return await search_pool.run(self._fuse, loaded, query, dense, candidates, positions, k)
+
+    @staticmethod
+    def _fuse(loaded, query: str, dense, candidates: int, positions, k: int) -> list[tuple[Document, float]]:
+        allowed = selected_ids(loaded.store, positions)
+        sparse_ids = [doc_id for doc_id, _ in loaded.sparse.search(query, candidates, allowed)]
+        by_id = {doc_id: doc for doc_id, doc, _ in dense}
+        scored = []
+        for doc_id, score in reciprocal_rank_fusion([[doc_id for doc_id, _, _ in dense], sparse_ids])[:k]:
+            doc = by_id.get(doc_id) or loaded.store.docstore.search(doc_id)
+            if not isinstance(doc, str):  # the docstore returns a message for unknown IDs
+                scored.append((doc, score))
+        return scored
+
+    async def _search(self, loaded, query: str, k: int, positions=None) -> list[tuple[Document, float]]:
+        """Ranked (document, score) candidates of one query, higher is better."""
+        if settings.RETRIEVAL_MODE == "hybrid" and loaded.sparse is not None:
+            return await self._hybrid_search(loaded, query, k, positions)
+        return [(doc, score) for _, doc, score in await self._dense_search(loaded, query, k, positions)]
+
+    async def retrieve_context(
+        self,
+        query: str,
+        k: int = None,
+        filters: Optional[DocumentFilter] = None,
+        tenant: Optional[str] = None,
+        sub_queries: Optional[list[str]] = None
+    ) -> tuple[str, Optional[dict]]:
+        """Search the vector database and assemble a token-budgeted context.
+        
+        In hybrid mode (settings.RETRIEVAL_MODE) dense results are fused
+        with BM25 matches so exact tickers, codes and figures are found.
+        Filters are resolved to the matching chunk positions before any
+        vector is compared. Up to k candidates are retrieved; the context
+        builder keeps those close to the best score, drops repeated text
+        and trims each chunk to the sentences around query matches.
+        
+        Compound questions are searched as several sub-queries at once
+        (see app.service.query_fanout): they run concurrently, sharing
+        the query batcher's embedding call and index.search, and their
+        results are merged into one context.
         
         Args:
             query: Search query
-            k: Number of results to return
+            k: Maximum chunks considered per sub-query (defaults to settings.CONTEXT_MAX_K)
+            filters: Optional document, page, issuer and report date restrictions
+            tenant: Vector store namespace to search; None is the shared store
+            sub_queries: Sub-queries to run instead of query; if omitted,
+                query is decomposed when it is compound
             
         Returns:
-            Concatenated relevant document chunks
+            The context text and a report of the prompt tokens it saved,
+            or None when nothing was retrieved
             
         Raises:
             IngestionError: If vector database doesn't exist or search fails
         """
-        if not os.path.exists(settings.VECTOR_DB_PATH):
+        k = k or settings.CONTEXT_MAX_K
+        try:
+            # Resident index: only reloaded when a new version is published
+            loaded = await self.tenants.get_loaded(tenant, self.embeddings)
+        except Exception as e:
+            logger.error(f"Vector index load failed: {str(e)}")
+            raise IngestionError(f"Failed to search documents: {str(e)}")
+
+        if loaded is None:
             raise IngestionError("No documents uploaded to the system")
 
         try:
-            # Load vector database
-            vector_db = FAISS.load_local(
-                settings.VECTOR_DB_PATH,
-                self.embeddings,
-                allow_dangerous_deserialization=True
+            positions = None
+            if filters is not None:
+                positions = await search_pool.run(lambda: loaded.metadata_index().select(filters))
+                if len(positions) == 0:
+                    return "No documents match the requested filters", None
+
+            queries = plan_queries(query, sub_queries)
+            if len(queries) == 1:
+                return build_context(queries[0], await self._search(loaded, queries[0], k, positions))
+
+            results = await asyncio.gather(*(self._search(loaded, q, k, positions) for q in queries))
+            text, report = build_context(" ".join(queries), merge_results(results))
+            # Against one separate search per sub-query, each joining its top chunks
+            baseline_tokens = sum(
+                estimate_tokens("\n\n".join(doc.page_content for doc, _ in scored[:BASELINE_K]))
+                for scored in results
             )
+            report.update(
+                sub_queries=len(queries),
+                baseline_tokens=baseline_tokens,
+                context_tokens_saved=baseline_tokens - report["context_tokens"]
+            )
+            return text, report
+        except Exception as e:
+            logger.error(f"Vector search failed: {str(e)}")
+            raise IngestionError(f"Failed to search documents: {str(e)}")
+
+    async def search_in_vector_db(
+        self,
+        query: str,
+        k: int = None,
+        filters: Optional[DocumentFilter] = None,
+        tenant: Optional[str] = None
+    ) -> str:
+        """Search for relevant document chunks in FAISS vector database.
+        
+        Args:
+            query: Search query
+            k: Maximum chunks considered (defaults to settings.CONTEXT_MAX_K)
+            filters: Optional document, page, issuer and report date restrictions
+            tenant: Vector store namespace to search; None is the shared store
             
-            # Search for similar documents
-            docs = vector_db.similarity_search(query, k=k)
+        Returns:
+            Token-budgeted context built from the relevant chunks
             
-            # Concatenate and return results
-            return "\n\n".join([d.page_content for d in docs])
+        Raises:
+            IngestionError: If vector database doesn't exist or search fails
+        """
+        text, _ = await self.retrieve_context(query, k, filters, tenant)
+        return text
+
+    async def load_vector_index(self) -> None:
+        """Load the shared vector index at startup, if one is in use.
+
+        Tenant stores are loaded on their first search. Documents left in
+        the shared store are not moved into tenant stores, so they become
+        unreachable under per-user tenancy; that is logged.
+        """
+        if settings.VECTOR_TENANCY != "shared":
+            shared = self._read_registry(self.db_path)
+            if shared:
+                logger.warning(
+                    f"{len(shared)} documents in the shared store are not searchable with "
+                    f"VECTOR_TENANCY={settings.VECTOR_TENANCY}; re-ingest them per user "
+                    "or set VECTOR_TENANCY=shared"
+                )
+            return
+        try:
+            await self.vector_index.get(self.embeddings)
         except Exception as e:
-            logger.error(f"Vector search failed: {str(e)}")
-            raise IngestionError(f"Failed to search documents: {str(e)}")
\ No newline at end of file
+            logger.warning(f"Vector index could not be preloaded: {str(e)}")
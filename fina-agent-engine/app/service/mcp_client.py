@@ -1,32 +1,74 @@
-from mcp import ClientSession
-from mcp.client.sse import sse_client
+import time
 
 from app.core.exceptions import MCPConnectionError
 from app.core.logger import get_logger
 from app.core.settings import settings
+from app.service.mcp_pool import MCPSessionPool, mcp_session_pool, transport_url
+from app.service.portfolio_cache import PortfolioCache, portfolio_cache, portfolio_uri
+from app.service.resilience import ResilientCaller, mcp_resilience
+from app.service.single_flight import SingleFlight, call_key
 
 logger = get_logger("MCP_CLIENT")
 
+# Calls to the shared pool are coalesced across all clients
+mcp_single_flight = SingleFlight()
+
 
 class MCPClient:
     """Client for communicating with MCP (Model Context Protocol) server.
     
     Handles connection to remote MCP server and provides methods to
-    fetch portfolio data and check connection health.
+    fetch portfolio data and check connection health. Tool calls go
+    through a pool of long-lived sessions instead of a handshake per call,
+    and portfolios are cached per user until Node B reports a change.
+    Identical concurrent tool calls share one request, which runs under
+    deadlines, bounded retries and a circuit breaker.
     """
     
-    def __init__(self, host: str = None, port: int = None):
+    def __init__(
+        self,
+        host: str = None,
+        port: int = None,
+        transport: str = None,
+        pool: MCPSessionPool = None,
+        cache: PortfolioCache = None,
+        flights: SingleFlight = None,
+        resilience: ResilientCaller = None
+    ):
         """Initialize MCP Client.
         
         Args:
             host: MCP server hostname (defaults to settings.MCP_HOST)
             port: MCP server port (defaults to settings.MCP_PORT)
+            transport: 'sse' or 'streamable_http' (defaults to settings.MCP_TRANSPORT)
+            pool: Session pool to call through (defaults to the shared pool
+                for the configured server, or a new one for another server)
+            cache: Portfolio cache (defaults to the shared cache for the shared pool)
+            flights: Coalescing of identical in-flight calls (defaults to the
+                shared one for the shared pool)
+            resilience: Deadlines, retries and circuit breaker (defaults to the
+                shared one for the shared pool)
         """
         # Use provided values or fall back to settings
         self.host = host or settings.MCP_HOST
         self.port = port or settings.MCP_PORT
-        # The entry endpoint for the protocol is /sse
-        self.sse_url = f"http://{self.host}:{self.port}/sse"
+        self.transport = transport or settings.MCP_TRANSPORT
+        # The entry endpoint of the protocol: /sse or /mcp
+        self.url = transport_url(self.host, self.port, self.transport)
+        if pool is None:
+            pool = mcp_session_pool if mcp_session_pool.url == self.url else MCPSessionPool(self.url, transport=self.transport)
+        self.pool = pool
+        if cache is None:
+            cache = portfolio_cache if pool is mcp_session_pool else PortfolioCache()
+        self.cache = cache
+        if flights is None:
+            flights = mcp_single_flight if pool is mcp_session_pool else SingleFlight()
+        self.flights = flights
+        if resilience is None:
+            resilience = mcp_resilience if pool is mcp_session_pool else ResilientCaller()
+        self.resilience = resilience
+        # Node B pushes an update when a subscribed user's rows change
+        self.pool.add_listener(self.cache.invalidate_uri)
 
     async def check_connection(self) -> bool:
         """Verify if MCP server responds at network/health level.
@@ -37,16 +79,30 @@ class MCPClient:
         import httpx
         try:
             # Use the base host for health check
-            health_url = self.sse_url.replace("/sse", "/health")
+            health_url = f"http://{self.host}:{self.port}/health"
             async with httpx.AsyncClient() as client:
-                response = await client.get(health_url, timeout=30.0)
+                response = await client.get(health_url, timeout=settings.MCP_HEALTH_TIMEOUT_SECONDS)
                 return response.status_code == 200
         except Exception as e:
             logger.warning(f"MCP health check failed: {str(e)}")
             return False
 
+    async def call_tool(self, name: str, arguments: dict):
+        """Call a tool on Node B, sharing the request with identical concurrent calls."""
+        def call():
+            return self.resilience.call(lambda: self.pool.call_tool(name, arguments=arguments))
+
+        if not settings.MCP_SINGLE_FLIGHT:
+            return await call()
+        return await self.flights.do(call_key(name, arguments), call)
+
     async def fetch_portfolio(self, user_id: str = "user123") -> str:
-        """Establishes a real MCP session over SSE and calls the remote tool.
+        """Calls the remote tool on a pooled MCP session, through the portfolio cache.
+        
+        A cached portfolio is returned without a call while it is within
+        its TTL (at most Node B's watch interval) and subscribed to.
+        Otherwise its version is sent along and Node B only returns the
+        rows if they changed.
         
         Args:
             user_id: User identifier to fetch portfolio for
@@ -57,22 +113,41 @@ class MCPClient:
         Raises:
             MCPConnectionError: If unable to connect or call fails
         """
-        logger.info(f"Connecting to MCP Server via SSE: {self.sse_url}")
+        uri = portfolio_uri(user_id)
+        entry = self.cache.get(user_id) if self.cache.enabled else None
+        if entry is not None and self.cache.is_fresh(entry) and self.pool.is_subscribed(uri):
+            self.cache.hits += 1
+            return entry.text
+
+        logger.info(f"Calling MCP Server: {self.url}")
         try:
-            async with sse_client(self.sse_url) as (read_stream, write_stream):
-                async with ClientSession(read_stream, write_stream) as session:
-                    # Protocol initialization (Handshake)
-                    await session.initialize()
+            arguments = {"user_id": user_id}
+            ticket = self.cache.ticket(user_id)
+            # Node B reads the version after this point, so the entry is valid as of now
+            started = time.monotonic()
+            if self.cache.enabled:
+                # Subscribe before reading, so a write after the read is always pushed
+                await self.resilience.call(lambda: self.pool.subscribe(uri))
+                if entry is not None:
+                    arguments["known_version"] = entry.version
+                    self.cache.revalidations += 1
+                else:
+                    self.cache.misses += 1
 
-                    # Call the tool defined in MCP Server
-                    result = await session.call_tool(
-                        "fetch_portfolio",
-                        arguments={"user_id": user_id}
-                    )
+            # Call the tool defined in MCP Server
+            result = await self.call_tool("fetch_portfolio", arguments)
+            meta = result.meta or {}
+            if entry is not None and meta.get("not_modified"):
+                self.cache.not_modified += 1
+                self.cache.refresh(user_id, ticket, started)
+                return entry.text
 
-                    if result.content and len(result.content) > 0:
-                        return result.content[0].text
-                    return "[]"  # Return empty list as text if no content
+            text = "[]"  # Return empty list as text if no content
+            if result.content and len(result.content) > 0:
+                text = result.content[0].text
+            if meta.get("version") is not None and not result.isError:
+                self.cache.put(user_id, text, meta["version"], ticket, started)
+            return text
         except Exception as e:
             error_msg = f"MCP Communication failed: {str(e)}"
             logger.error(error_msg)
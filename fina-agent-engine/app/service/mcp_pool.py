@@ -0,0 +1,381 @@
+"""Pool of long-lived, initialized MCP sessions to Node B.
+
+Opening an SSE stream, waiting for the message endpoint and running the
+``initialize`` handshake costs several round trips; the pool pays them
+once per session instead of once per tool call. Each session lives in
+its own background task (the transport's task group must be entered and
+exited by the same task), calls are spread over the least busy session,
+in-flight calls per session are capped, and a session that dies is
+replaced transparently on the next call.
+
+Resource subscriptions are tracked per session. Listeners are told when a
+subscribed resource changes, and also when its session is lost, because
+updates sent after that point would never arrive.
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Optional
+
+import anyio
+import httpx
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamable_http_client
+from mcp.types import CONNECTION_CLOSED, CallToolResult, ResourceUpdatedNotification, ServerNotification
+from pydantic import AnyUrl
+
+from app.core.logger import get_logger
+from app.core.settings import settings
+
+try:
+    from mcp.shared.exceptions import McpError
+except ImportError:  # renamed in mcp 2.x
+    from mcp.shared.exceptions import MCPError as McpError
+
+logger = get_logger("MCP_POOL")
+
+# Endpoint of each transport on Node B
+TRANSPORT_PATHS = {
+    "sse": "/sse",
+    "streamable_http": "/mcp",
+}
+
+
+def transport_url(host: str, port: int, transport: str) -> str:
+    """Endpoint URL of an MCP server for a transport."""
+    if transport not in TRANSPORT_PATHS:
+        raise ValueError(f"Unknown MCP transport '{transport}', expected one of {sorted(TRANSPORT_PATHS)}")
+    return f"http://{host}:{port}{TRANSPORT_PATHS[transport]}"
+
+# Failures of the session itself, as opposed to errors returned by a tool
+CONNECTION_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    httpx.TransportError,
+    ConnectionError,
+)
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """Whether an error means the session is gone rather than the call failed."""
+    if isinstance(error, BaseExceptionGroup):
+        # Transport task groups wrap the underlying failure
+        return any(is_connection_error(e) for e in error.exceptions)
+    if isinstance(error, McpError):
+        # Pending requests of a session whose stream closed
+        return error.error.code == CONNECTION_CLOSED
+    return isinstance(error, CONNECTION_ERRORS)
+
+
+class _Timing:
+    __slots__ = ("count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float) -> None:
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    @property
+    def avg_ms(self) -> float:
+        return round(self.total_ms / self.count, 3) if self.count else 0.0
+
+
+class _PooledSession:
+    """One initialized ClientSession, owned by a background task."""
+
+    def __init__(self, pool: "MCPSessionPool"):
+        self.pool = pool
+        self.session: Optional[ClientSession] = None
+        self.semaphore = asyncio.Semaphore(pool.max_in_flight)
+        self.reserved = 0
+        self.alive = False
+        self.subscriptions: set[str] = set()
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._error: Optional[BaseException] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def closed(self) -> bool:
+        """Whether the session finished opening and can no longer take calls."""
+        return self._ready.is_set() and not self.alive
+
+    async def ready(self) -> None:
+        """Wait until a session opened by another caller can take calls."""
+        await self._ready.wait()
+        if not self.alive:
+            raise ConnectionError(f"MCP session to {self.pool.url} closed during setup")
+
+    async def open(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        try:
+            await self._ready.wait()
+        except asyncio.CancelledError:
+            # Caller hit its deadline: do not leave the connection behind
+            self._closing.set()
+            raise
+        if self._error is not None:
+            raise self._error
+        if not self.alive:
+            raise ConnectionError(f"MCP session to {self.pool.url} closed during setup")
+
+    async def _run(self) -> None:
+        try:
+            start = time.perf_counter()
+            async with self.pool.connect_transport() as streams:
+                read_stream, write_stream = streams[0], streams[1]
+                connected = time.perf_counter()
+                async with ClientSession(
+                    read_stream, write_stream, message_handler=self.pool._on_message
+                ) as session:
+                    await session.initialize()
+                    self.pool.connect.record((connected - start) * 1000)
+                    self.pool.handshake.record((time.perf_counter() - connected) * 1000)
+                    self.session = session
+                    self.alive = True
+                    self._ready.set()
+                    await self._closing.wait()
+        except Exception as e:
+            if not self._ready.is_set():
+                self._error = e
+            else:
+                logger.warning(f"MCP session to {self.pool.url} ended: {str(e)}")
+        finally:
+            self.alive = False
+            self._ready.set()
+            self.pool._session_closed(self)
+
+    async def close(self) -> None:
+        self.alive = False
+        self._closing.set()
+        if self._task is not None:
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+class MCPSessionPool:
+    """Warm MCP sessions shared by every tool call to one server."""
+
+    def __init__(self, url: str = None, size: int = None, max_in_flight: int = None, transport: str = None):
+        """Initialize the pool (sessions open on start() or first use).
+
+        Args:
+            url: Transport endpoint of the MCP server (defaults to settings.MCP_HOST/MCP_PORT)
+            size: Maximum sessions (defaults to settings.MCP_POOL_SIZE)
+            max_in_flight: Concurrent calls per session
+                (defaults to settings.MCP_MAX_IN_FLIGHT_PER_SESSION)
+            transport: 'sse' or 'streamable_http' (defaults to settings.MCP_TRANSPORT)
+        """
+        self.transport = transport or settings.MCP_TRANSPORT
+        self.url = url or transport_url(settings.MCP_HOST, settings.MCP_PORT, self.transport)
+        self.size = size or settings.MCP_POOL_SIZE
+        self.max_in_flight = max_in_flight or settings.MCP_MAX_IN_FLIGHT_PER_SESSION
+        self._sessions: list[_PooledSession] = []
+        self._lock = asyncio.Lock()
+        self._subscribed: dict[str, _PooledSession] = {}
+        self._listeners: list[Callable[[str], None]] = []
+        # Cleared when the server rejects resources/subscribe
+        self.push_supported = True
+        self.notifications = 0
+
+        self.connect = _Timing()
+        self.handshake = _Timing()
+        self.call = _Timing()
+        self.reconnects = 0
+        self.failures = 0
+
+    def connect_transport(self):
+        """Async context manager yielding the read and write streams of a new connection."""
+        if self.transport == "streamable_http":
+            return streamable_http_client(self.url)
+        return sse_client(self.url)
+
+    async def start(self, warm: int = None) -> None:
+        """Open warm sessions; Node B being down is not fatal at startup."""
+        warm = settings.MCP_POOL_WARM_SESSIONS if warm is None else warm
+        for _ in range(min(warm, self.size)):
+            async with self._lock:
+                if len(self._sessions) >= self.size:
+                    break
+                session = self._reserve_session()
+            try:
+                await self._open(session)
+            except Exception as e:
+                logger.warning(f"Could not pre-open MCP session to {self.url}: {str(e)}")
+                break
+
+    def _reserve_session(self) -> _PooledSession:
+        """Take a pool slot for a new session; called under _lock."""
+        session = _PooledSession(self)
+        self._sessions.append(session)
+        return session
+
+    async def _open(self, session: _PooledSession) -> None:
+        """Open a reserved session without holding _lock, so other calls proceed."""
+        try:
+            await session.open()
+        except BaseException:
+            # Synchronous, so no other task sees the slot between failure and release
+            if session in self._sessions:
+                self._sessions.remove(session)
+            raise
+        logger.info(f"MCP session opened to {self.url} ({len(self._sessions)}/{self.size})")
+
+    async def _acquire(self) -> _PooledSession:
+        async with self._lock:
+            for dead in [s for s in self._sessions if s.closed]:
+                self._sessions.remove(dead)
+                asyncio.get_running_loop().create_task(dead.close())
+            free = [s for s in self._sessions if s.reserved < self.max_in_flight]
+            opening = not free and len(self._sessions) < self.size
+            if opening:
+                session = self._reserve_session()
+            else:
+                # Least busy session; if all are at their cap, the call queues on it
+                session = min(free or self._sessions, key=lambda s: s.reserved)
+            session.reserved += 1
+        try:
+            if opening:
+                await self._open(session)
+            else:
+                # The session may still be opening for another caller
+                await session.ready()
+        except BaseException:
+            session.reserved -= 1
+            raise
+        return session
+
+    async def _discard(self, session: _PooledSession) -> None:
+        async with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+        await session.close()
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]) -> CallToolResult:
+        """Call a tool on a pooled session.
+
+        A call that fails because its session died is retried once on a
+        fresh session. Errors returned by the tool itself are not retried.
+        """
+        try:
+            return await self._call(name, arguments)
+        except Exception as e:
+            if not is_connection_error(e):
+                raise
+            self.reconnects += 1
+            logger.warning(f"MCP session lost ({type(e).__name__}), reconnecting")
+            return await self._call(name, arguments)
+
+    async def _call(self, name: str, arguments: dict[str, Any]) -> CallToolResult:
+        session = await self._acquire()
+        try:
+            async with session.semaphore:
+                start = time.perf_counter()
+                result = await session.session.call_tool(name, arguments=arguments)
+                self.call.record((time.perf_counter() - start) * 1000)
+                return result
+        except Exception as e:
+            if is_connection_error(e):
+                self.failures += 1
+                await self._discard(session)
+            raise
+        finally:
+            session.reserved -= 1
+
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """Call callback(uri) when a subscribed resource changes or its subscription is lost."""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def _notify(self, uri: str) -> None:
+        for callback in self._listeners:
+            callback(uri)
+
+    async def _on_message(self, message) -> None:
+        if isinstance(message, ServerNotification) and isinstance(message.root, ResourceUpdatedNotification):
+            self.notifications += 1
+            self._notify(str(message.root.params.uri))
+
+    def _session_closed(self, session: _PooledSession) -> None:
+        for uri in session.subscriptions:
+            if self._subscribed.get(uri) is session:
+                del self._subscribed[uri]
+            self._notify(uri)
+        session.subscriptions.clear()
+
+    def is_subscribed(self, uri: str) -> bool:
+        """Whether updates of a resource are currently being pushed to the pool."""
+        session = self._subscribed.get(uri)
+        return session is not None and session.alive
+
+    async def subscribe(self, uri: str) -> bool:
+        """Subscribe to updates of a resource on a pooled session.
+
+        Best effort: returns False when the server does not support
+        subscriptions or the request fails. Only raises if no session can
+        be opened at all.
+        """
+        if not self.push_supported:
+            return False
+        if self.is_subscribed(uri):
+            return True
+        session = await self._acquire()
+        try:
+            async with session.semaphore:
+                await session.session.subscribe_resource(AnyUrl(uri))
+        except Exception as e:
+            if is_connection_error(e):
+                self.failures += 1
+                await self._discard(session)
+            elif isinstance(e, McpError):
+                self.push_supported = False
+                logger.info(f"MCP server at {self.url} does not push resource updates: {str(e)}")
+            else:
+                logger.warning(f"Could not subscribe to {uri}: {str(e)}")
+            return False
+        finally:
+            session.reserved -= 1
+        if not session.alive:
+            return False
+        session.subscriptions.add(uri)
+        self._subscribed[uri] = session
+        return True
+
+    async def close(self) -> None:
+        """Close every session."""
+        async with self._lock:
+            sessions, self._sessions = self._sessions, []
+        await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+
+    def stats(self) -> dict:
+        """Session counts and connect/handshake/call latency for health reporting."""
+        return {
+            "transport": self.transport,
+            "sessions": sum(1 for s in self._sessions if s.alive),
+            "max_sessions": self.size,
+            "max_in_flight_per_session": self.max_in_flight,
+            "in_flight": sum(s.reserved for s in self._sessions),
+            "calls": self.call.count,
+            "connects": self.connect.count,
+            "reconnects": self.reconnects,
+            "failures": self.failures,
+            "subscriptions": sum(1 for uri in self._subscribed if self.is_subscribed(uri)),
+            "notifications": self.notifications,
+            "avg_connect_ms": self.connect.avg_ms,
+            "avg_handshake_ms": self.handshake.avg_ms,
+            "avg_call_ms": self.call.avg_ms,
+            "max_call_ms": round(self.call.max_ms, 3),
+        }
+
+
+# Singleton Instance
+mcp_session_pool = MCPSessionPool()
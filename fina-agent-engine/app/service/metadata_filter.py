@@ -0,0 +1,203 @@
+"""Metadata pre-filtering in front of the FAISS index.
+
+Chunk metadata is grouped per document (file hash, filename, issuer,
+report date) with the FAISS positions and page numbers of its chunks.
+Chunks a document shares with another one through near-duplicate
+linking, or adopted from a deleted document, are attributed to it from
+the registry, so filtering on it still finds them.
+A filter resolves to a set of positions before any vector is compared:
+small selections are scored exactly over just those vectors, so their
+cost depends on the selection rather than the corpus; larger ones are
+searched in the index behind a bitmap ID selector.
+"""
+
+from typing import Optional
+
+import faiss
+import numpy as np
+
+from app.core.settings import settings
+from app.schemas.agent_schemas import DocumentFilter
+
+
+class _Document:
+    __slots__ = ("filename", "issuer", "report_date", "positions", "pages")
+
+    def __init__(self, metadata: dict):
+        self.filename = metadata.get("filename")
+        self.issuer = (metadata.get("issuer") or "").lower() or None
+        self.report_date = metadata.get("report_date")
+        self.positions: list[int] = []
+        self.pages: list[int] = []
+
+    def add(self, position: int, page: int) -> None:
+        self.positions.append(position)
+        self.pages.append(page)
+
+
+def _page_of(chunk_id: str) -> int:
+    """Page of a chunk ID of the form <file hash>:<page>:<n>."""
+    parts = chunk_id.split(":")
+    return int(parts[1]) if len(parts) == 3 and parts[1].isdigit() else 0
+
+
+def _shared_chunks(registry: dict) -> dict[str, list[tuple[str, int]]]:
+    """Chunks that documents reference without owning them in the docstore.
+
+    Maps each such chunk ID to (file hash, page) pairs of the documents
+    that reference it: near-duplicates are linked to a canonical chunk of
+    another document, and a deleted document's chunks are adopted by a
+    document that linked to them.
+    """
+    shared: dict[str, list[tuple[str, int]]] = {}
+    for key, entry in registry.items():
+        for chunk_id, canonical in entry.get("linked", {}).items():
+            shared.setdefault(canonical, []).append((key, _page_of(chunk_id)))
+        for chunk_id in entry.get("ids", []):
+            if ":" in chunk_id and not chunk_id.startswith(f"{key}:"):
+                shared.setdefault(chunk_id, []).append((key, _page_of(chunk_id)))
+    return shared
+
+
+class MetadataIndex:
+    """Chunk positions of each ingested document, for pre-filtering."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.documents: dict[str, _Document] = {}
+
+    @classmethod
+    def from_store(cls, store, registry: Optional[dict] = None) -> "MetadataIndex":
+        """Build the index from a LangChain FAISS store's docstore.
+
+        Args:
+            store: LangChain FAISS store
+            registry: Document registry of the same snapshot; its linked and
+                adopted chunks are added to the documents that reference them
+        """
+        index = cls(store.index.ntotal)
+        shared = _shared_chunks(registry or {})
+        if hasattr(store.docstore, "metadata_rows"):
+            # SQLite docstore: one scan instead of a lookup per chunk
+            rows = store.docstore.metadata_rows()
+        else:
+            rows = (
+                (position, doc_id, store.docstore.search(doc_id).metadata)
+                for position, doc_id in store.index_to_docstore_id.items()
+            )
+        shared_positions: dict[str, int] = {}
+        for position, doc_id, metadata in rows:
+            key = metadata.get("file_hash") or metadata.get("source") or ""
+            index._document(key, metadata).add(position, metadata.get("page", 0))
+            if doc_id in shared:
+                shared_positions[doc_id] = position
+        for chunk_id, references in shared.items():
+            position = shared_positions.get(chunk_id)
+            if position is None:
+                continue
+            for key, page in references:
+                index._document(key, registry[key]).add(position, page)
+        for document in index.documents.values():
+            document.positions = np.asarray(document.positions, dtype=np.int64)
+            document.pages = np.asarray(document.pages, dtype=np.int64)
+        return index
+
+    def _document(self, key: str, metadata: dict) -> _Document:
+        document = self.documents.get(key)
+        if document is None:
+            document = self.documents[key] = _Document(metadata)
+        return document
+
+    def _matches(self, key: str, document: _Document, f: DocumentFilter) -> bool:
+        if f.file_hash and key != f.file_hash:
+            return False
+        if f.filename and document.filename != f.filename:
+            return False
+        if f.issuer and document.issuer != f.issuer.lower():
+            return False
+        if f.report_date_from or f.report_date_to:
+            if document.report_date is None:
+                return False
+            if f.report_date_from and document.report_date < f.report_date_from.isoformat():
+                return False
+            if f.report_date_to and document.report_date > f.report_date_to.isoformat():
+                return False
+        return True
+
+    def select(self, f: DocumentFilter) -> np.ndarray:
+        """FAISS positions of the chunks matching a filter, sorted."""
+        selected = []
+        for key, document in self.documents.items():
+            if not self._matches(key, document, f):
+                continue
+            mask = np.ones(len(document.positions), dtype=bool)
+            # Filters use 1-based page numbers; metadata stores 0-based pages
+            if f.page_start is not None:
+                mask &= document.pages >= f.page_start - 1
+            if f.page_end is not None:
+                mask &= document.pages <= f.page_end - 1
+            selected.append(document.positions[mask])
+        if not selected:
+            return np.empty(0, dtype=np.int64)
+        # A shared chunk can match through several documents
+        return np.unique(np.concatenate(selected))
+
+
+def _search_parameters(index: faiss.Index, selector: faiss.IDSelector) -> faiss.SearchParameters:
+    """Search parameters carrying the selector and the index's current tuning."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+    hnsw = getattr(faiss.downcast_index(index), "hnsw", None)
+    if hnsw is not None:
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def search_positions(
+    index: faiss.Index,
+    query: np.ndarray,
+    positions: np.ndarray,
+    k: int
+) -> tuple[list[int], list[float]]:
+    """Nearest neighbours of a query restricted to the given positions.
+
+    Args:
+        index: FAISS index (L2); IVF indexes need their direct map
+            (ann_index.ensure_direct_map, done when a snapshot is loaded)
+        query: Query vector
+        positions: Allowed FAISS positions, from MetadataIndex.select
+        k: Number of results
+
+    Returns:
+        Positions of the closest allowed vectors, best first, and their
+        L2 distances
+    """
+    if len(positions) == 0:
+        return [], []
+    query = np.asarray(query, dtype=np.float32).reshape(1, -1)
+
+    if len(positions) <= settings.FILTER_EXACT_MAX:
+        # Score only the selected vectors: cost follows the selection size
+        vectors = index.reconstruct_batch(positions)
+        distances = ((vectors - query) ** 2).sum(axis=1)
+        order = np.argsort(distances)[:k]
+        return positions[order].tolist(), distances[order].tolist()
+
+    mask = np.zeros(index.ntotal, dtype=bool)
+    mask[positions] = True
+    bitmap = np.packbits(mask, bitorder="little")
+    selector = faiss.IDSelectorBitmap(index.ntotal, faiss.swig_ptr(bitmap))
+    distances, ids = index.search(query, k, params=_search_parameters(index, selector))
+    found = ids[0] >= 0
+    return ids[0][found].tolist(), distances[0][found].tolist()
+
+
+def selected_ids(store, positions: Optional[np.ndarray]) -> Optional[set[str]]:
+    """Docstore IDs for a set of FAISS positions."""
+    if positions is None:
+        return None
+    mapping = store.index_to_docstore_id
+    if hasattr(mapping, "many"):
+        return set(mapping.many(positions))
+    return {mapping[int(p)] for p in positions}
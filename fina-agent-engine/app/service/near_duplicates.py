@@ -0,0 +1,165 @@
+"""Near-duplicate chunk detection with MinHash and LSH banding.
+
+Quarterly reports of the same issuer repeat disclaimers, risk factors and
+legal notices almost verbatim. Every chunk gets a MinHash signature of its
+word shingles; chunks whose estimated Jaccard similarity to an indexed
+chunk reaches the threshold are linked to that chunk instead of being
+embedded and indexed again. LSH bands keep the lookup to a handful of
+candidates rather than a scan of the whole store.
+"""
+
+import io
+import os
+import uuid
+import zlib
+from collections import defaultdict
+from typing import Iterable, Optional
+
+import numpy as np
+
+from app.core.settings import settings
+from app.service.sparse_index import tokenize
+
+NEAR_DUPLICATE_INDEX_FILE = "minhash.npz"
+
+_PRIME = np.uint64((1 << 61) - 1)
+# Fixed seed: signatures are persisted and compared across processes
+_SEED = 1
+
+
+class MinHashIndex:
+    """MinHash signatures of indexed chunks, bucketed by LSH band."""
+
+    def __init__(
+        self,
+        num_perm: int = None,
+        bands: int = None,
+        threshold: float = None,
+        shingle_words: int = None,
+        min_words: int = None
+    ):
+        """Initialize an empty index.
+
+        Args:
+            num_perm: Hash permutations per signature (defaults to settings.NEAR_DUPLICATE_NUM_PERM)
+            bands: LSH bands; num_perm must be a multiple (defaults to settings.NEAR_DUPLICATE_BANDS)
+            threshold: Estimated Jaccard similarity of a near-duplicate
+                (defaults to settings.NEAR_DUPLICATE_THRESHOLD)
+            shingle_words: Words per shingle (defaults to settings.NEAR_DUPLICATE_SHINGLE_WORDS)
+            min_words: Shorter chunks are never treated as duplicates
+                (defaults to settings.NEAR_DUPLICATE_MIN_WORDS)
+        """
+        self.num_perm = num_perm or settings.NEAR_DUPLICATE_NUM_PERM
+        self.bands = bands or settings.NEAR_DUPLICATE_BANDS
+        if self.num_perm % self.bands:
+            raise ValueError(f"num_perm ({self.num_perm}) must be a multiple of bands ({self.bands})")
+        self.threshold = threshold if threshold is not None else settings.NEAR_DUPLICATE_THRESHOLD
+        self.shingle_words = shingle_words or settings.NEAR_DUPLICATE_SHINGLE_WORDS
+        self.min_words = settings.NEAR_DUPLICATE_MIN_WORDS if min_words is None else min_words
+
+        rng = np.random.default_rng(_SEED)
+        # a * h + b stays below 2**64 for 32-bit shingle hashes
+        self._a = rng.integers(1, 1 << 31, self.num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, self.num_perm, dtype=np.uint64)
+
+        self.signatures: dict[str, np.ndarray] = {}
+        self._buckets: dict[tuple[int, bytes], set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.signatures
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of a text, or None if it is too short to compare."""
+        words = tokenize(text)
+        if len(words) < max(self.min_words, 1):
+            return None
+        size = min(self.shingle_words, len(words))
+        hashes = np.fromiter(
+            {zlib.crc32(" ".join(words[i:i + size]).encode()) for i in range(len(words) - size + 1)},
+            dtype=np.uint64
+        )
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> list[tuple[int, bytes]]:
+        rows = self.num_perm // self.bands
+        return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands)]
+
+    def find(self, signature: Optional[np.ndarray]) -> Optional[str]:
+        """Most similar indexed chunk at or above the threshold, if any."""
+        if signature is None:
+            return None
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates |= self._buckets.get(key, set())
+        best, best_similarity = None, self.threshold
+        for doc_id in candidates:
+            similarity = float(np.mean(self.signatures[doc_id] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = doc_id, similarity
+        return best
+
+    def add(self, doc_id: str, signature: Optional[np.ndarray]) -> None:
+        """Index a chunk's signature; chunks without one are ignored."""
+        if signature is None:
+            return
+        if doc_id in self.signatures:
+            self.remove([doc_id])
+        self.signatures[doc_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets[key].add(doc_id)
+
+    def remove(self, ids: Iterable[str]) -> None:
+        """Drop chunk IDs from the index; unknown IDs are ignored."""
+        for doc_id in ids:
+            signature = self.signatures.pop(doc_id, None)
+            if signature is None:
+                continue
+            for key in self._band_keys(signature):
+                bucket = self._buckets[key]
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def save(self, db_path: str) -> None:
+        """Write the signatures next to the FAISS files (tmp file + rename)."""
+        os.makedirs(db_path, exist_ok=True)
+        path = os.path.join(db_path, NEAR_DUPLICATE_INDEX_FILE)
+        ids = list(self.signatures)
+        signatures = (
+            np.stack([self.signatures[doc_id] for doc_id in ids])
+            if ids else np.empty((0, self.num_perm), dtype=np.uint32)
+        )
+        buffer = io.BytesIO()
+        np.savez(buffer, ids=np.asarray(ids, dtype=str), signatures=signatures)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, db_path: str) -> Optional["MinHashIndex"]:
+        """Read saved signatures, or None if the directory has none."""
+        try:
+            with np.load(os.path.join(db_path, NEAR_DUPLICATE_INDEX_FILE)) as data:
+                ids, signatures = data["ids"], data["signatures"]
+        except FileNotFoundError:
+            return None
+        index = cls(num_perm=signatures.shape[1] or None)
+        for doc_id, signature in zip(ids.tolist(), signatures):
+            index.add(doc_id, signature)
+        return index
+
+    @classmethod
+    def from_docstore(cls, index_to_docstore_id: dict, docstore) -> "MinHashIndex":
+        """Build signatures from a LangChain FAISS docstore.
+
+        Used for stores written before near-duplicate detection existed.
+        """
+        index = cls()
+        for doc_id in index_to_docstore_id.values():
+            index.add(doc_id, index.signature(docstore.search(doc_id).page_content))
+        return index
@@ -0,0 +1,148 @@
+"""CPU-bound PDF parsing, splitting and hashing in a process pool.
+
+Text extraction, chunk splitting and file hashing run in worker processes
+so a large upload never stalls the event loop serving chat traffic. Large
+documents are split into page ranges that are parsed in parallel and
+streamed back to the caller as each range finishes.
+"""
+
+import asyncio
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, NamedTuple, Optional
+
+from langchain_core.documents import Document
+from pypdf import PdfReader
+
+from app.core.logger import get_logger
+from app.core.settings import settings
+from app.service.chunking import TokenAwareChunker, build_chunker, chunking_baseline
+
+logger = get_logger("PDF_PARSER")
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class ParsedRange(NamedTuple):
+    """Chunks of the pages [start, end) of a document."""
+
+    start: int
+    end: int
+    total_pages: int
+    chunks: list[Document]
+    # Chunks the character splitter would have produced for the same pages,
+    # and how many of those exceed the embedding model's token limit
+    baseline_chunks: int = 0
+    baseline_truncated: int = 0
+
+
+def hash_file(file_path: str) -> str:
+    """SHA256 of a file, read in fixed-size blocks."""
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def count_pages(file_path: str) -> int:
+    """Number of pages in a PDF."""
+    return len(PdfReader(file_path).pages)
+
+
+def parse_page_range(file_path: str, start: int, end: int, chunker) -> ParsedRange:
+    """Extract and split pages [start, end) of a PDF.
+
+    Runs inside a worker process, so it only takes picklable arguments.
+    Chunks never span two pages and carry the 0-based page number.
+    """
+    reader = PdfReader(file_path)
+    total_pages = len(reader.pages)
+    pages = []
+    for number in range(start, min(end, total_pages)):
+        text = reader.pages[number].extract_text() or ""
+        if text.strip():
+            pages.append(Document(
+                page_content=text,
+                metadata={"source": file_path, "page": number, "total_pages": total_pages}
+            ))
+
+    chunks = chunker.split_pages(pages)
+    if not isinstance(chunker, TokenAwareChunker):
+        return ParsedRange(start, end, total_pages, chunks, len(chunks), 0)
+    return ParsedRange(start, end, total_pages, chunks, *chunking_baseline(pages, chunker))
+
+
+class PDFParser:
+    """Runs PDF parsing work in a lazily created process pool."""
+
+    def __init__(self, max_workers: int = None, pages_per_task: int = None, chunker=None):
+        """Initialize the parser.
+
+        Args:
+            max_workers: Worker processes (defaults to settings.PDF_PARSER_WORKERS)
+            pages_per_task: Pages parsed per task (defaults to settings.PDF_PAGES_PER_TASK)
+            chunker: Picklable chunker (defaults to settings.CHUNKING_STRATEGY)
+        """
+        self.max_workers = max_workers or settings.PDF_PARSER_WORKERS
+        self.pages_per_task = pages_per_task or settings.PDF_PAGES_PER_TASK
+        self.chunker = chunker or build_chunker()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that already runs threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"PDF parser pool started with {self.max_workers} workers")
+        return self._executor
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), fn, *args)
+
+    async def hash_file(self, file_path: str) -> str:
+        """SHA256 of a file, computed in the pool."""
+        return await self._run(hash_file, file_path)
+
+    async def iter_chunks(self, file_path: str) -> AsyncIterator[ParsedRange]:
+        """Parse and split a PDF, yielding chunks per page range as they finish.
+
+        Page ranges complete out of order; every chunk carries its page
+        number in metadata.
+
+        Args:
+            file_path: Path to the PDF file
+
+        Yields:
+            ParsedRange with the chunks of one page range
+        """
+        total_pages = await self._run(count_pages, file_path)
+        ranges = [
+            (start, min(start + self.pages_per_task, total_pages))
+            for start in range(0, total_pages, self.pages_per_task)
+        ]
+
+        futures = [
+            asyncio.ensure_future(self._run(parse_page_range, file_path, start, end, self.chunker))
+            for start, end in ranges
+        ]
+        try:
+            for future in asyncio.as_completed(futures):
+                yield await future
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Singleton Instance
+pdf_parser = PDFParser()
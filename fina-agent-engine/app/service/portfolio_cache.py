@@ -0,0 +1,127 @@
+"""Per-user read-through cache of portfolio lookups from Node B.
+
+Node B versions each user's portfolio rows and publishes them as the
+``portfolio://<user_id>`` resource. A cached portfolio is served without
+a round trip only while the pool holds a live subscription to that
+resource, so any write Node B reports evicts it, and while it was
+validated less than the TTL ago. Node B checks subscribed portfolios for
+writes every PORTFOLIO_WATCH_INTERVAL seconds, and the TTL is capped at
+that interval, so a write is never hidden for longer than a push could
+take to report it, even if the push is delayed or lost. Otherwise the
+lookup is revalidated: the cached version is sent with the call and
+Node B answers "not modified" without reading the rows.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.settings import settings
+
+PORTFOLIO_URI_PREFIX = "portfolio://"
+
+
+def portfolio_uri(user_id: str) -> str:
+    """Resource URI under which Node B publishes a user's portfolio."""
+    return f"{PORTFOLIO_URI_PREFIX}{user_id}"
+
+
+class CachedPortfolio:
+    __slots__ = ("text", "version", "validated_at")
+
+    def __init__(self, text: str, version: int, validated_at: float):
+        self.text = text
+        self.version = version
+        self.validated_at = validated_at
+
+
+class PortfolioCache:
+    """Bounded LRU of portfolio lookups keyed by user id."""
+
+    def __init__(self, max_users: int = None, ttl_seconds: float = None, watch_interval_seconds: float = None):
+        """Initialize the cache.
+
+        Args:
+            max_users: Portfolios kept (defaults to settings.PORTFOLIO_CACHE_MAX_USERS, 0 disables)
+            ttl_seconds: Age up to which a subscribed portfolio is served without
+                revalidation (defaults to settings.PORTFOLIO_CACHE_TTL_SECONDS)
+            watch_interval_seconds: Node B's polling interval for writes, which caps
+                the TTL (defaults to settings.PORTFOLIO_WATCH_INTERVAL_SECONDS)
+        """
+        self.max_users = max_users if max_users is not None else settings.PORTFOLIO_CACHE_MAX_USERS
+        if watch_interval_seconds is None:
+            watch_interval_seconds = settings.PORTFOLIO_WATCH_INTERVAL_SECONDS
+        if ttl_seconds is None:
+            ttl_seconds = settings.PORTFOLIO_CACHE_TTL_SECONDS
+        self.ttl_seconds = min(ttl_seconds, watch_interval_seconds)
+        self._entries: OrderedDict[str, CachedPortfolio] = OrderedDict()
+        # Bumped on every invalidation; a fetch started before one is not stored
+        self._generations: dict[str, int] = {}
+        self.hits = 0
+        self.revalidations = 0
+        self.not_modified = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_users > 0
+
+    def get(self, user_id: str) -> Optional[CachedPortfolio]:
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            self._entries.move_to_end(user_id)
+        return entry
+
+    def is_fresh(self, entry: CachedPortfolio) -> bool:
+        return time.monotonic() - entry.validated_at < self.ttl_seconds
+
+    def ticket(self, user_id: str) -> int:
+        """Taken before a fetch; put() and refresh() ignore results older than an invalidation."""
+        return self._generations.get(user_id, 0)
+
+    def put(self, user_id: str, text: str, version: int, ticket: int, validated_at: float = None) -> None:
+        """Store a fetched portfolio; validated_at is when the fetch started (defaults to now)."""
+        if not self.enabled or ticket != self.ticket(user_id):
+            return
+        self._entries[user_id] = CachedPortfolio(text, version, validated_at or time.monotonic())
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def refresh(self, user_id: str, ticket: int, validated_at: float = None) -> None:
+        """Restart the TTL of an entry Node B confirmed as current."""
+        entry = self._entries.get(user_id)
+        if entry is not None and ticket == self.ticket(user_id):
+            entry.validated_at = validated_at or time.monotonic()
+
+    def invalidate(self, user_id: str) -> None:
+        if self._entries.pop(user_id, None) is not None:
+            self.invalidations += 1
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def invalidate_uri(self, uri: str) -> None:
+        """Pool listener: a resource changed or its subscription was lost."""
+        if uri.startswith(PORTFOLIO_URI_PREFIX):
+            self.invalidate(uri[len(PORTFOLIO_URI_PREFIX):])
+
+    def stats(self) -> dict:
+        """Cache counters for health reporting."""
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_users": self.max_users,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "revalidations": self.revalidations,
+            "not_modified": self.not_modified,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+        }
+
+
+# Singleton Instance
+portfolio_cache = PortfolioCache()
@@ -0,0 +1,164 @@
+"""Micro-batching of concurrent vector searches.
+
+Queries that arrive within a few milliseconds of each other are embedded
+with one embedding call and searched with one batched ``index.search``
+instead of one round trip and one FAISS scan each. Every caller awaits
+its own future and gets back its own query vector and nearest positions.
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from typing import Optional
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+from app.core.logger import get_logger
+from app.core.settings import settings
+from app.service.search_pool import SearchPool, search_pool
+
+logger = get_logger("QUERY_BATCHER")
+
+
+class _Request:
+    __slots__ = ("store", "embeddings", "query", "k", "future", "queued_at")
+
+    def __init__(self, store: FAISS, embeddings: Embeddings, query: str, k: int, future: asyncio.Future):
+        self.store = store
+        self.embeddings = embeddings
+        self.query = query
+        self.k = k
+        self.future = future
+        self.queued_at = time.perf_counter()
+
+
+class QueryBatcher:
+    """Collects queries for a short window and searches them together."""
+
+    def __init__(self, window_ms: float = None, max_batch: int = None, pool: SearchPool = None):
+        """Initialize the batcher.
+
+        Args:
+            window_ms: How long the first query of a batch waits for others
+                (defaults to settings.SEARCH_BATCH_WINDOW_MS; 0 disables waiting)
+            max_batch: Queries that trigger an immediate flush
+                (defaults to settings.SEARCH_BATCH_MAX)
+            pool: Executor running index.search (embedding calls are awaited
+                on the event loop)
+        """
+        self.window_ms = window_ms if window_ms is not None else settings.SEARCH_BATCH_WINDOW_MS
+        self.max_batch = max_batch or settings.SEARCH_BATCH_MAX
+        self.pool = pool or search_pool
+        self._pending: list[_Request] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.queries = 0
+        self.max_batch_size = 0
+        self.queue_delay_ms_total = 0.0
+        self.queue_delay_ms_max = 0.0
+
+    async def search(
+        self,
+        store: FAISS,
+        embeddings: Embeddings,
+        query: str,
+        k: int
+    ) -> tuple[np.ndarray, list[int], list[float]]:
+        """Embed a query and find its nearest index positions.
+
+        Args:
+            store: LangChain FAISS store to search
+            embeddings: Embedding function of the store
+            query: Search query
+            k: Number of neighbours; 0 only embeds the query
+
+        Returns:
+            The query vector, the nearest positions (best first) and
+            their L2 distances
+        """
+        loop = asyncio.get_running_loop()
+        request = _Request(store, embeddings, query, k, loop.create_future())
+        self._pending.append(request)
+        if len(self._pending) >= self.max_batch or self.window_ms <= 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_ms / 1000, self._flush)
+        return await request.future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[_Request]) -> None:
+        started = time.perf_counter()
+        delays = [(started - r.queued_at) * 1000 for r in batch]
+        self.batches += 1
+        self.queries += len(batch)
+        self.max_batch_size = max(self.max_batch_size, len(batch))
+        self.queue_delay_ms_total += sum(delays)
+        self.queue_delay_ms_max = max(self.queue_delay_ms_max, max(delays))
+
+        # A snapshot swap mid-window splits the batch per store
+        groups: dict[tuple[int, int], list[_Request]] = defaultdict(list)
+        for request in batch:
+            groups[(id(request.store), id(request.embeddings))].append(request)
+        await asyncio.gather(*(self._run_group(requests) for requests in groups.values()))
+
+    async def _run_group(self, requests: list[_Request]) -> None:
+        """One embedding call and one index.search for queries on the same store."""
+        try:
+            vectors = np.asarray(
+                await requests[0].embeddings.aembed_documents([r.query for r in requests]),
+                dtype=np.float32
+            )
+            positions = await self.pool.run(
+                _search_index, requests[0].store.index, vectors, max(r.k for r in requests)
+            )
+        except Exception as e:
+            logger.error(f"Batched search of {len(requests)} queries failed: {str(e)}")
+            for request in requests:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+        for request, vector, (hits, distances) in zip(requests, vectors, positions):
+            if not request.future.done():
+                request.future.set_result((vector, hits[:request.k], distances[:request.k]))
+
+    def stats(self) -> dict:
+        """Batch size and queueing delay counters for health reporting."""
+        return {
+            "window_ms": self.window_ms,
+            "batches": self.batches,
+            "queries": self.queries,
+            "avg_batch_size": round(self.queries / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "avg_queue_delay_ms": round(self.queue_delay_ms_total / self.queries, 3) if self.queries else 0.0,
+            "max_queue_delay_ms": round(self.queue_delay_ms_max, 3),
+        }
+
+
+def _search_index(index, vectors: np.ndarray, k: int) -> list[tuple[list[int], list[float]]]:
+    """Nearest positions and distances of every query vector, in one index.search."""
+    k = min(k, index.ntotal)
+    if k <= 0:
+        return [([], []) for _ in vectors]
+    distances, ids = index.search(vectors, k)
+    return [
+        ([int(i) for i in row if i >= 0], [float(d) for d, i in zip(dist, row) if i >= 0])
+        for dist, row in zip(distances, ids)
+    ]
+
+
+# Singleton Instance
+query_batcher = QueryBatcher()
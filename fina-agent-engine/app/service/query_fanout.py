@@ -0,0 +1,104 @@
+"""Multi-query retrieval: decomposition and merging of sub-query results.
+
+A question such as "compare the risk outlook for my AAPL and NVDA
+holdings" needs one search per company. Instead of one agent turn per
+search, ``search_financial_docs`` runs every sub-query concurrently in a
+single call; their results are merged into one deduplicated candidate
+list for the context builder.
+"""
+
+import re
+from typing import Optional
+
+from langchain_core.documents import Document
+
+from app.core.settings import settings
+
+# Ticker-like words: 1-5 capitals, optionally with a share class ("BRK.B")
+_TICKER = r"[A-Z]{1,5}(?:\.[A-Z])?"
+# "AAPL and NVDA", "AAPL, MSFT or NVDA", "AAPL vs NVDA"
+_ENUMERATION = re.compile(
+    rf"\b{_TICKER}(?:(?:\s*,\s*(?:and\s+|or\s+)?|\s+(?:and|or|vs\.?|versus)\s+){_TICKER})+\b"
+)
+_QUESTION_BREAK = re.compile(r"(?<=\?)\s+|\s*;\s*")
+
+
+def decompose_query(query: str, max_queries: int = None) -> list[str]:
+    """Split a compound question into independent sub-queries.
+
+    Separate questions ("...? ...?" or "...; ...") become one sub-query
+    each, and an enumeration of tickers is expanded into one sub-query per
+    ticker. Anything else is returned unchanged as a single query.
+
+    Args:
+        query: Question as asked
+        max_queries: Upper bound on sub-queries (defaults to settings.SEARCH_MAX_SUB_QUERIES)
+    """
+    max_queries = max_queries or settings.SEARCH_MAX_SUB_QUERIES
+    queries = []
+    for part in _QUESTION_BREAK.split(query.strip()):
+        if not part:
+            continue
+        match = _ENUMERATION.search(part)
+        if match is None:
+            queries.append(part)
+            continue
+        for ticker in re.findall(_TICKER, match.group(0)):
+            queries.append(part[:match.start()] + ticker + part[match.end():])
+    return unique_queries(queries, max_queries) or [query]
+
+
+def unique_queries(queries: list[str], max_queries: int = None) -> list[str]:
+    """Non-empty queries without case-insensitive repeats, in order, capped."""
+    max_queries = max_queries or settings.SEARCH_MAX_SUB_QUERIES
+    seen = set()
+    unique = []
+    for query in queries:
+        key = " ".join(query.lower().split())
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(query.strip())
+    return unique[:max_queries]
+
+
+def merge_results(results: list[list[tuple[Document, float]]]) -> list[tuple[Document, float]]:
+    """Merge the ranked results of several sub-queries.
+
+    Scores are divided by the best score of their own sub-query, so every
+    sub-query's top hit competes on equal terms in the context builder's
+    adaptive cut-off. A chunk found by several sub-queries is kept once,
+    with its highest normalised score.
+
+    Args:
+        results: (document, score) pairs per sub-query, best first, higher is better
+
+    Returns:
+        Deduplicated (document, normalised score) pairs, best first
+    """
+    best: dict[str, tuple[Document, float]] = {}
+    order: dict[str, int] = {}
+    for scored in results:
+        if not scored:
+            continue
+        top = scored[0][1] or 1.0
+        for rank, (doc, score) in enumerate(scored):
+            key = _key(doc)
+            normalised = score / top
+            if key not in best or normalised > best[key][1]:
+                best[key] = (doc, normalised)
+            # Ties keep the best rank any sub-query gave the chunk
+            order[key] = min(order.get(key, rank), rank)
+    return sorted(best.values(), key=lambda item: (-item[1], order[_key(item[0])]))
+
+
+def _key(doc: Document) -> str:
+    return doc.id or doc.page_content
+
+
+def plan_queries(query: str, sub_queries: Optional[list[str]] = None) -> list[str]:
+    """Queries to run for one search: the caller's sub-queries, or a decomposition."""
+    if sub_queries:
+        return unique_queries(sub_queries) or [query]
+    if settings.SEARCH_DECOMPOSE_QUERIES:
+        return decompose_query(query)
+    return [query]
@@ -0,0 +1,231 @@
+"""Deadlines, retries, hedging and a circuit breaker for calls to Node B.
+
+Each attempt runs under a deadline. Attempts that time out or lose their
+connection are retried a bounded number of times with full-jitter
+exponential backoff, all within an overall deadline. Errors returned by
+the tool itself are never retried. Optionally, an attempt still running
+after a high percentile of recent latencies is hedged with a second,
+identical request, and the first response wins.
+
+Consecutive failures open the circuit breaker. While it is open, calls
+fail immediately instead of queueing on a hung server. After a cool-down
+one probe call is let through, and the circuit closes if it succeeds.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+from app.core.exceptions import CircuitOpenError
+from app.core.logger import get_logger
+from app.core.settings import settings
+from app.service.mcp_pool import is_connection_error
+
+logger = get_logger("MCP_RESILIENCE")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts and lost connections are retried; errors returned by the tool are not."""
+    return isinstance(error, TimeoutError) or is_connection_error(error)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff before retry number `attempt` (1-based)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe."""
+
+    def __init__(self, failure_threshold: int = None, reset_seconds: float = None):
+        """Initialize the breaker in the closed state.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+                (defaults to settings.MCP_BREAKER_FAILURE_THRESHOLD)
+            reset_seconds: Cool-down before a probe call is allowed
+                (defaults to settings.MCP_BREAKER_RESET_SECONDS)
+        """
+        self.failure_threshold = failure_threshold or settings.MCP_BREAKER_FAILURE_THRESHOLD
+        self.reset_seconds = reset_seconds if reset_seconds is not None else settings.MCP_BREAKER_RESET_SECONDS
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self.rejected = 0
+        self._probing = False
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go to Node B now."""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                self._reject()
+            self.state = HALF_OPEN
+            self._probing = False
+        if self.state == HALF_OPEN:
+            if self._probing:
+                self._reject()
+            self._probing = True
+
+    def abandon(self) -> None:
+        """Let another call probe if the current probe was cancelled."""
+        if self.state == HALF_OPEN:
+            self._probing = False
+
+    def _reject(self) -> None:
+        self.rejected += 1
+        raise CircuitOpenError(self.retry_after())
+
+    def retry_after(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, round(self.reset_seconds - (time.monotonic() - self.opened_at), 3))
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            logger.info("Node B recovered, circuit closed")
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.opens += 1
+                logger.warning(
+                    f"Circuit to Node B opened after {self.consecutive_failures} consecutive failures"
+                )
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+    def stats(self) -> dict:
+        """Breaker state and counters for health reporting."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "opens": self.opens,
+            "rejected": self.rejected,
+            "retry_after_s": self.retry_after(),
+        }
+
+
+class ResilientCaller:
+    """Runs calls to Node B under deadlines, retries, hedging and a circuit breaker."""
+
+    def __init__(self, breaker: CircuitBreaker = None):
+        """Initialize the caller.
+
+        Args:
+            breaker: Circuit breaker to consult (defaults to a new one)
+        """
+        self.breaker = breaker or CircuitBreaker()
+        self._latencies: deque[float] = deque(maxlen=settings.MCP_HEDGE_WINDOW)
+        self.calls = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which an attempt is hedged, or None when hedging is off."""
+        percentile = settings.MCP_HEDGE_PERCENTILE
+        if not percentile or len(self._latencies) < settings.MCP_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+
+    async def call(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run call() resiliently and return its result.
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            TimeoutError: If every attempt timed out
+            Exception: The last error of call() otherwise
+        """
+        self.calls += 1
+        deadline = time.monotonic() + settings.MCP_CALL_DEADLINE_SECONDS
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            attempt += 1
+            remaining = deadline - time.monotonic()
+            try:
+                result = await self._attempt(call, min(settings.MCP_CALL_TIMEOUT_SECONDS, remaining))
+            except asyncio.CancelledError:
+                self.breaker.abandon()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    # Node B answered; the call itself was rejected
+                    self.breaker.record_success()
+                    raise
+                if isinstance(e, TimeoutError):
+                    self.timeouts += 1
+                self.breaker.record_failure()
+                delay = backoff_delay(attempt, settings.MCP_RETRY_BACKOFF_SECONDS, settings.MCP_RETRY_BACKOFF_MAX_SECONDS)
+                if attempt > settings.MCP_MAX_RETRIES or time.monotonic() + delay >= deadline:
+                    raise
+                self.retries += 1
+                logger.warning(f"Node B call failed ({type(e).__name__}), retry {attempt} in {delay:.3f}s")
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def _attempt(self, call: Callable[[], Awaitable[Any]], timeout: float) -> Any:
+        start = time.perf_counter()
+        delay = self.hedge_delay()
+        if delay is None or delay >= timeout:
+            result = await asyncio.wait_for(call(), timeout)
+        else:
+            result = await asyncio.wait_for(self._hedged(call, delay), timeout)
+        self._latencies.append(time.perf_counter() - start)
+        return result
+
+    async def _hedged(self, call: Callable[[], Awaitable[Any]], delay: float) -> Any:
+        primary = asyncio.ensure_future(call())
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                self.hedges += 1
+                pending.add(asyncio.ensure_future(call()))
+            error = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict:
+        """Breaker state plus retry, timeout and hedging counters."""
+        delay = self.hedge_delay()
+        return {
+            **self.breaker.stats(),
+            "calls": self.calls,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_after_ms": round(delay * 1000, 3) if delay is not None else None,
+        }
+
+
+# Singleton Instance
+mcp_resilience = ResilientCaller()
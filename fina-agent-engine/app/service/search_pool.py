@@ -0,0 +1,162 @@
+"""Dedicated thread pool for vector search.
+
+FAISS searches, docstore lookups and BM25 scoring are CPU and I/O work
+that would otherwise run on the event loop and stall SSE streams of
+every other user. They run in a sized pool instead, with the FAISS
+OpenMP thread count capped so concurrent searches don't oversubscribe
+the cores. A lag monitor measures how long the loop is still blocked.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+import faiss
+
+from app.core.logger import get_logger
+from app.core.settings import settings
+
+logger = get_logger("SEARCH_POOL")
+
+T = TypeVar("T")
+
+
+def faiss_omp_threads(pool_size: int) -> int:
+    """OpenMP threads per FAISS call (settings.FAISS_OMP_THREADS, 0 = share the cores)."""
+    if settings.FAISS_OMP_THREADS > 0:
+        return settings.FAISS_OMP_THREADS
+    return max(1, (os.cpu_count() or 1) // pool_size)
+
+
+class SearchPool:
+    """Sized executor for search work, with queueing and run-time counters."""
+
+    def __init__(self, max_workers: int = None):
+        """Initialize the pool (threads start on first use).
+
+        Args:
+            max_workers: Concurrent searches (defaults to settings.SEARCH_THREADS)
+        """
+        self.max_workers = max_workers or settings.SEARCH_THREADS
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.omp_threads = 0
+
+        self.tasks = 0
+        self.queue_wait_ms_total = 0.0
+        self.queue_wait_ms_max = 0.0
+        self.run_ms_total = 0.0
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self.omp_threads = faiss_omp_threads(self.max_workers)
+            # Process-wide: applies to every FAISS call from now on
+            faiss.omp_set_num_threads(self.omp_threads)
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="vector-search"
+            )
+            logger.info(
+                f"Search pool started with {self.max_workers} threads, "
+                f"{self.omp_threads} FAISS OpenMP threads each"
+            )
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """Run a blocking search step in the pool."""
+        queued = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    wait_ms = (started - queued) * 1000
+                    self.tasks += 1
+                    self.queue_wait_ms_total += wait_ms
+                    self.queue_wait_ms_max = max(self.queue_wait_ms_max, wait_ms)
+                    self.run_ms_total += (time.perf_counter() - started) * 1000
+
+        return await asyncio.get_running_loop().run_in_executor(self._pool(), timed)
+
+    def stats(self) -> dict:
+        """Pool sizing and timing counters for health reporting."""
+        return {
+            "threads": self.max_workers,
+            "omp_threads": self.omp_threads or faiss_omp_threads(self.max_workers),
+            "tasks": self.tasks,
+            "avg_queue_wait_ms": round(self.queue_wait_ms_total / self.tasks, 3) if self.tasks else 0.0,
+            "max_queue_wait_ms": round(self.queue_wait_ms_max, 3),
+            "avg_run_ms": round(self.run_ms_total / self.tasks, 3) if self.tasks else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up from a periodic sleep.
+
+    Any lateness is time the loop spent running something that did not
+    yield; lags above the threshold are counted as blocking.
+    """
+
+    def __init__(self, interval_ms: float = None, threshold_ms: float = None):
+        self.interval_ms = interval_ms or settings.LOOP_MONITOR_INTERVAL_MS
+        self.threshold_ms = threshold_ms or settings.LOOP_BLOCK_THRESHOLD_MS
+        self._task: Optional[asyncio.Task] = None
+
+        self.samples = 0
+        self.lag_ms_total = 0.0
+        self.lag_ms_max = 0.0
+        self.blocked_events = 0
+        self.blocked_ms_total = 0.0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self) -> None:
+        interval = self.interval_ms / 1000
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.record(max(0.0, (time.perf_counter() - start - interval) * 1000))
+
+    def record(self, lag_ms: float) -> None:
+        self.samples += 1
+        self.lag_ms_total += lag_ms
+        self.lag_ms_max = max(self.lag_ms_max, lag_ms)
+        if lag_ms >= self.threshold_ms:
+            self.blocked_events += 1
+            self.blocked_ms_total += lag_ms
+
+    def stats(self) -> dict:
+        """Event loop lag counters for health reporting."""
+        return {
+            "samples": self.samples,
+            "avg_lag_ms": round(self.lag_ms_total / self.samples, 3) if self.samples else 0.0,
+            "max_lag_ms": round(self.lag_ms_max, 3),
+            "blocked_events": self.blocked_events,
+            "blocked_ms_total": round(self.blocked_ms_total, 3),
+        }
+
+
+# Singleton Instances
+search_pool = SearchPool()
+loop_monitor = LoopLagMonitor()
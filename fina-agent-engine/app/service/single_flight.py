@@ -0,0 +1,51 @@
+"""Single-flight coalescing of identical concurrent calls.
+
+While a call for a key is in flight, later calls with the same key do not
+start their own: they wait for the first one and receive its result or
+exception. The shared call runs as its own task, so a caller that is
+cancelled does not cancel it for the others.
+"""
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Hashable
+
+
+def call_key(name: str, arguments: dict[str, Any]) -> tuple[str, str]:
+    """Key of a tool call: its name and canonical JSON arguments."""
+    return name, json.dumps(arguments, sort_keys=True, default=str)
+
+
+class SingleFlight:
+    """Shares one in-flight call among concurrent callers with the same key."""
+
+    def __init__(self):
+        self._flights: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run call() unless an identical one is in flight, and return its result."""
+        self.calls += 1
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller was cancelled
+            task.exception()
+
+    def stats(self) -> dict:
+        """Coalescing counters for health reporting."""
+        return {
+            "coalesced_calls": self.coalesced,
+            "in_flight_keys": len(self._flights),
+        }
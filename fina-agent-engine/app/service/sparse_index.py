@@ -0,0 +1,156 @@
+"""Sparse BM25 index and rank fusion for hybrid retrieval.
+
+Dense MiniLM embeddings blur exact tokens such as tickers, ISIN codes and
+figures ("EBITDA 2023"). A BM25 inverted index built alongside the FAISS
+index matches them literally, and reciprocal-rank fusion merges both
+result lists without having to calibrate their scores against each other.
+"""
+
+import json
+import math
+import os
+import re
+import uuid
+from collections import Counter, defaultdict
+from typing import Iterable, Optional
+
+from app.core.settings import settings
+
+SPARSE_INDEX_FILE = "bm25.json"
+
+# Keeps codes and figures whole: "US0378331005", "10-K", "2023", "12.5%"
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.,\-/][a-z0-9]+)*%?")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word, code and number tokens of a text."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 over chunk IDs, with incremental add and remove."""
+
+    def __init__(self, k1: float = None, b: float = None):
+        """Initialize an empty index.
+
+        Args:
+            k1: Term frequency saturation (defaults to settings.BM25_K1)
+            b: Length normalisation (defaults to settings.BM25_B)
+        """
+        self.k1 = k1 if k1 is not None else settings.BM25_K1
+        self.b = b if b is not None else settings.BM25_B
+        self.postings: dict[str, dict[str, int]] = defaultdict(dict)
+        self.doc_lengths: dict[str, int] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, ids: Iterable[str], texts: Iterable[str]) -> None:
+        """Index texts under their chunk IDs, replacing existing entries."""
+        for doc_id, text in zip(ids, texts):
+            if doc_id in self.doc_lengths:
+                self.remove([doc_id])
+            terms = Counter(tokenize(text))
+            for term, count in terms.items():
+                self.postings[term][doc_id] = count
+            length = sum(terms.values())
+            self.doc_lengths[doc_id] = length
+            self.total_length += length
+
+    def remove(self, ids: Iterable[str]) -> None:
+        """Drop chunk IDs from the index; unknown IDs are ignored."""
+        doomed = {doc_id for doc_id in ids if doc_id in self.doc_lengths}
+        if not doomed:
+            return
+        for term in list(self.postings):
+            docs = self.postings[term]
+            for doc_id in doomed & docs.keys():
+                del docs[doc_id]
+            if not docs:
+                del self.postings[term]
+        for doc_id in doomed:
+            self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def search(self, query: str, k: int, allowed: Optional[set[str]] = None) -> list[tuple[str, float]]:
+        """Top-k chunk IDs by BM25 score.
+
+        Args:
+            query: Free-text query
+            k: Number of results
+            allowed: If given, only these chunk IDs are scored
+
+        Returns:
+            (chunk ID, score) pairs, best first
+        """
+        n = len(self.doc_lengths)
+        if not n:
+            return []
+        average_length = self.total_length / n
+        scores: dict[str, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / average_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def save(self, db_path: str) -> None:
+        """Write the index next to the FAISS files (tmp file + rename)."""
+        os.makedirs(db_path, exist_ok=True)
+        path = os.path.join(db_path, SPARSE_INDEX_FILE)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "postings": self.postings, "doc_lengths": self.doc_lengths}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, db_path: str) -> Optional["BM25Index"]:
+        """Read a saved index, or None if the directory has none."""
+        try:
+            with open(os.path.join(db_path, SPARSE_INDEX_FILE), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        index = cls(k1=data["k1"], b=data["b"])
+        index.postings = defaultdict(dict, data["postings"])
+        index.doc_lengths = data["doc_lengths"]
+        index.total_length = sum(index.doc_lengths.values())
+        return index
+
+    @classmethod
+    def from_docstore(cls, index_to_docstore_id: dict, docstore) -> "BM25Index":
+        """Build an index from a LangChain FAISS docstore.
+
+        Used for stores written before the sparse index existed.
+        """
+        index = cls()
+        ids = list(index_to_docstore_id.values())
+        index.add(ids, (docstore.search(doc_id).page_content for doc_id in ids))
+        return index
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = None) -> list[tuple[str, float]]:
+    """Merge ranked ID lists with reciprocal-rank fusion.
+
+    Each list contributes 1 / (k + rank) to the IDs it contains, so items
+    ranked well by either retriever rise to the top.
+
+    Args:
+        rankings: Ranked lists of chunk IDs, best first
+        k: Rank constant (defaults to settings.RRF_K)
+
+    Returns:
+        (chunk ID, fused score) pairs, best first
+    """
+    k = k or settings.RRF_K
+    scores: dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
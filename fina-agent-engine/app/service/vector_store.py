@@ -0,0 +1,642 @@
+"""Process-wide resident FAISS index.
+
+Keeps the vector store loaded in memory between searches instead of
+deserializing it from disk on every tool call, and hot-swaps it when
+ingestion publishes a new version through the on-disk manifest.
+
+On disk a store is ``index.faiss`` (native FAISS format, memory-mapped by
+readers), ``docstore.sqlite`` (chunk text and metadata, fetched lazily by
+ID) and ``bm25.json``; nothing is pickled, so several workers share one
+page-cache copy of the index.
+
+Each write produces a complete, immutable snapshot directory under
+``snapshots/`` and publishes it by atomically replacing ``manifest.json``,
+which points at it. Readers keep the snapshot they loaded; snapshots no
+longer current or in use are garbage-collected.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+import weakref
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+import faiss
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+from app.core.logger import get_logger
+from app.core.settings import settings
+from app.service.ann_index import (
+    REPORT_FILE,
+    configure_search,
+    ensure_direct_map,
+    read_report,
+    search_parameters,
+    write_report,
+)
+from app.service.docstore import load_docstore, open_docstore, write_docstore
+from app.service.metadata_filter import MetadataIndex
+from app.service.near_duplicates import MinHashIndex
+from app.service.sparse_index import SPARSE_INDEX_FILE, BM25Index
+
+logger = get_logger("VECTOR_STORE")
+
+MANIFEST_FILE = "manifest.json"
+REGISTRY_FILE = "registry.json"
+DOCSTORE_FILE = "docstore.sqlite"
+INDEX_FILES = ("index.faiss", DOCSTORE_FILE, SPARSE_INDEX_FILE)
+# Maps flat codes as well as inverted lists; faiss before 1.10 only mmaps the latter
+MMAP_FLAG = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+# Pickled LangChain docstore of stores written before the SQLite layout
+LEGACY_DOCSTORE_FILE = "index.pkl"
+SNAPSHOTS_DIR = "snapshots"
+
+
+def _write_json_atomic(path: str, data: dict) -> None:
+    """Write JSON to a temporary file and rename it into place."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def new_version() -> str:
+    """Unique, time-ordered identifier of an index version."""
+    return f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+
+
+def write_manifest(db_path: str, version: str = None, **extra) -> str:
+    """Stamp the index directory with a new version.
+
+    The manifest is written to a temporary file and renamed into place so
+    readers never observe a half-written stamp.
+
+    Args:
+        db_path: Vector database directory
+        version: Version to publish (a new one by default)
+        **extra: Additional fields stored alongside the version
+
+    Returns:
+        The new version identifier
+    """
+    version = version or new_version()
+    manifest = {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        **extra,
+    }
+    _write_json_atomic(os.path.join(db_path, MANIFEST_FILE), manifest)
+    return version
+
+
+def read_manifest(db_path: str) -> Optional[dict]:
+    """Read the manifest of an index directory, if present."""
+    return _read_json(os.path.join(db_path, MANIFEST_FILE))
+
+
+def read_registry(db_path: str) -> dict:
+    """Read the document registry, keyed by file SHA-256.
+
+    Each entry records the filename, ingestion timestamp and the docstore
+    IDs of the document's chunks so they can be removed later.
+    """
+    return _read_json(os.path.join(db_path, REGISTRY_FILE)) or {}
+
+
+def write_registry(db_path: str, registry: dict) -> None:
+    """Persist the document registry atomically."""
+    _write_json_atomic(os.path.join(db_path, REGISTRY_FILE), registry)
+
+
+def current_snapshot(db_path: str) -> Optional[str]:
+    """Directory holding the published snapshot of a store, if any.
+
+    Stores written before versioned snapshots keep their files directly in
+    db_path, which is then returned as is.
+    """
+    manifest = read_manifest(db_path)
+    if manifest and manifest.get("snapshot"):
+        return os.path.join(db_path, manifest["snapshot"])
+    if any(os.path.exists(os.path.join(db_path, name)) for name in (INDEX_FILES[0], LEGACY_DOCSTORE_FILE)):
+        return db_path
+    return None
+
+
+class _SnapshotRefs:
+    """Snapshot directories still used by LoadedIndex objects of this process."""
+
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def acquire(self, owner: object, path: str) -> None:
+        path = os.path.realpath(path)
+        with self._lock:
+            self._counts[path] += 1
+        weakref.finalize(owner, self._release, path)
+
+    def _release(self, path: str) -> None:
+        with self._lock:
+            self._counts[path] -= 1
+            if self._counts[path] <= 0:
+                del self._counts[path]
+
+    def in_use(self, path: str) -> bool:
+        with self._lock:
+            return self._counts.get(os.path.realpath(path), 0) > 0
+
+
+snapshot_refs = _SnapshotRefs()
+
+
+def write_snapshot(
+    db_path: str,
+    store: FAISS,
+    sparse: BM25Index,
+    registry: dict,
+    ann_report: Optional[dict] = None,
+    near_duplicates: Optional[MinHashIndex] = None,
+    **extra
+) -> tuple[str, str]:
+    """Write a complete new snapshot and publish it.
+
+    Every file goes into a staging directory that is renamed to
+    ``snapshots/<version>`` in one step; the manifest, replaced atomically,
+    is then pointed at it. Readers therefore see either the previous
+    snapshot or the new one, never a mix.
+
+    Args:
+        db_path: Vector database directory
+        store: FAISS store to save
+        sparse: BM25 index of the same chunks
+        registry: Document registry of the same chunks
+        ann_report: Recall report of the index, carried over between snapshots
+        near_duplicates: MinHash signatures of the same chunks
+        **extra: Additional manifest fields
+
+    Returns:
+        The new version and its snapshot directory
+    """
+    version = new_version()
+    snapshots = os.path.join(db_path, SNAPSHOTS_DIR)
+    staging = os.path.join(snapshots, f".{version}.tmp")
+    os.makedirs(staging)
+    save_store(store, staging)
+    sparse.save(staging)
+    write_registry(staging, registry)
+    if ann_report:
+        write_report(staging, ann_report)
+    if near_duplicates is not None:
+        near_duplicates.save(staging)
+    path = os.path.join(snapshots, version)
+    os.rename(staging, path)
+    write_manifest(
+        db_path, version,
+        snapshot=os.path.join(SNAPSHOTS_DIR, version),
+        superseded=_superseded_after_publish(db_path),
+        **extra
+    )
+    return version, path
+
+
+def _superseded_after_publish(db_path: str) -> dict[str, float]:
+    """When each snapshot still on disk stopped being current, including the one being replaced.
+
+    Keys are paths relative to db_path ("." for the pre-snapshot flat layout).
+    """
+    def on_disk(name: str) -> bool:
+        if name == ".":
+            return any(os.path.exists(os.path.join(db_path, f)) for f in (INDEX_FILES[0], LEGACY_DOCSTORE_FILE))
+        return os.path.exists(os.path.join(db_path, name))
+
+    manifest = read_manifest(db_path) or {}
+    superseded = {name: at for name, at in manifest.get("superseded", {}).items() if on_disk(name)}
+    previous = current_snapshot(db_path)
+    if previous is not None:
+        superseded[os.path.relpath(previous, db_path)] = time.time()
+    return superseded
+
+
+def collect_snapshots(db_path: str, grace_seconds: float = None) -> list[str]:
+    """Delete snapshots that are neither current nor in use.
+
+    Snapshots loaded by this process are kept until their LoadedIndex is
+    released. Other processes may have read the previous manifest just
+    before it was replaced and not opened the files yet, so nothing is
+    removed until the grace period has passed since it was superseded, as
+    recorded in the manifest; once opened, files stay readable after
+    deletion (POSIX unlink semantics). Files of the pre-snapshot flat
+    layout are collected the same way, and abandoned staging directories
+    once they are older than the grace period.
+
+    Returns:
+        Paths that were removed
+    """
+    grace = settings.SNAPSHOT_GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    current = current_snapshot(db_path)
+    if current is None or os.path.realpath(current) == os.path.realpath(db_path):
+        return []
+    cutoff = time.time() - grace
+    superseded = (read_manifest(db_path) or {}).get("superseded", {})
+    # Snapshots replaced before supersession was recorded were replaced
+    # no later than the current manifest was published
+    published_at = os.path.getmtime(os.path.join(db_path, MANIFEST_FILE))
+    removed = []
+
+    snapshots = os.path.join(db_path, SNAPSHOTS_DIR)
+    for name in os.listdir(snapshots):
+        path = os.path.join(snapshots, name)
+        if os.path.realpath(path) == os.path.realpath(current) or snapshot_refs.in_use(path):
+            continue
+        if name.startswith("."):
+            # Staging directory: never published, so only its age matters
+            retired_at = os.path.getmtime(path)
+        else:
+            retired_at = superseded.get(os.path.join(SNAPSHOTS_DIR, name), published_at)
+        if retired_at > cutoff:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed.append(path)
+
+    if not snapshot_refs.in_use(db_path) and superseded.get(".", published_at) <= cutoff:
+        for name in (*INDEX_FILES, REGISTRY_FILE, LEGACY_DOCSTORE_FILE, REPORT_FILE):
+            path = os.path.join(db_path, name)
+            if os.path.exists(path):
+                os.remove(path)
+                removed.append(path)
+    if removed:
+        logger.info(f"Removed {len(removed)} unused snapshot entries from {db_path}")
+    return removed
+
+
+def save_store(store: FAISS, db_path: str) -> None:
+    """Write a store's FAISS index and SQLite docstore.
+
+    Both files are written under temporary names and renamed into place.
+    """
+    os.makedirs(db_path, exist_ok=True)
+    index_path = os.path.join(db_path, INDEX_FILES[0])
+    tmp_path = f"{index_path}.{uuid.uuid4().hex}.tmp"
+    faiss.write_index(store.index, tmp_path)
+    os.replace(tmp_path, index_path)
+    write_docstore(os.path.join(db_path, DOCSTORE_FILE), store.index_to_docstore_id, store.docstore)
+
+
+def load_store(db_path: str, embeddings: Embeddings, writable: bool = False) -> FAISS:
+    """Open a store written by save_store.
+
+    Args:
+        db_path: Vector database directory
+        embeddings: Embedding function bound to the store
+        writable: Load a private in-memory copy that can be modified.
+            Otherwise the index is memory-mapped read-only and chunks are
+            fetched from SQLite on demand.
+
+    Returns:
+        LangChain FAISS store
+    """
+    index_path = os.path.join(db_path, INDEX_FILES[0])
+    docstore_path = os.path.join(db_path, DOCSTORE_FILE)
+    if writable:
+        index = faiss.read_index(index_path)
+        docstore, index_to_docstore_id = load_docstore(docstore_path)
+    else:
+        index = faiss.read_index(index_path, MMAP_FLAG | faiss.IO_FLAG_READ_ONLY)
+        docstore, index_to_docstore_id = open_docstore(docstore_path)
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id
+    )
+
+
+def migrate_legacy_store(db_path: str, embeddings: Embeddings) -> bool:
+    """Convert a pickled LangChain store to the SQLite layout, once.
+
+    The pickle was written by this service, so it is trusted for this
+    single conversion and removed afterwards. Disabled by
+    settings.LEGACY_PICKLE_MIGRATION.
+
+    Returns:
+        Whether a legacy store was converted
+    """
+    legacy_path = os.path.join(db_path, LEGACY_DOCSTORE_FILE)
+    if not os.path.exists(legacy_path) or os.path.exists(os.path.join(db_path, DOCSTORE_FILE)):
+        return False
+    if not settings.LEGACY_PICKLE_MIGRATION:
+        raise RuntimeError(
+            f"Legacy pickled vector store in {db_path}; enable LEGACY_PICKLE_MIGRATION or re-ingest"
+        )
+    store = FAISS.load_local(db_path, embeddings, allow_dangerous_deserialization=True)
+    save_store(store, db_path)
+    if BM25Index.load(db_path) is None:
+        BM25Index.from_docstore(store.index_to_docstore_id, store.docstore).save(db_path)
+    try:
+        os.remove(legacy_path)
+    except FileNotFoundError:
+        # Another process finished the same migration
+        pass
+    logger.info(f"Migrated pickled vector store in {db_path} to the SQLite layout")
+    return True
+
+
+class LoadedIndex:
+    """Immutable snapshot of a loaded index and its load statistics."""
+
+    def __init__(
+        self,
+        store: FAISS,
+        version: str,
+        load_time_ms: float,
+        disk_bytes: int,
+        sparse: Optional[BM25Index] = None,
+        path: Optional[str] = None
+    ):
+        self.store = store
+        self.sparse = sparse
+        self.path = path
+        if path is not None:
+            # Keeps the snapshot directory from being collected while in use
+            snapshot_refs.acquire(self, path)
+        self.version = version
+        self.load_time_ms = load_time_ms
+        self.disk_bytes = disk_bytes
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+        self._metadata: Optional[MetadataIndex] = None
+
+    def metadata_index(self) -> MetadataIndex:
+        """Per-document chunk positions, built on the first filtered search."""
+        if self._metadata is None:
+            registry = read_registry(self.path) if self.path else {}
+            self._metadata = MetadataIndex.from_store(self.store, registry)
+        return self._metadata
+
+
+class VectorIndexHolder:
+    """Holds the FAISS index resident in memory for the whole process.
+
+    Readers always get the currently published snapshot. When the on-disk
+    version changes, a single task reloads the index off the event loop
+    while concurrent readers keep using the previous snapshot; the new one
+    is then swapped in with a single reference assignment.
+    """
+
+    def __init__(self, db_path: str = None):
+        """Initialize the holder.
+
+        Args:
+            db_path: Vector database directory (defaults to settings.VECTOR_DB_PATH)
+        """
+        self.db_path = db_path or settings.VECTOR_DB_PATH
+        self._current: Optional[LoadedIndex] = None
+        self._reload_lock = asyncio.Lock()
+        # Serializes read-modify-write cycles of ingestion and deletion
+        self.write_lock = asyncio.Lock()
+
+    def _disk_snapshot(self) -> tuple[Optional[str], Optional[str]]:
+        """Return the version and directory currently published on disk.
+
+        Indexes written before manifests existed are identified by the
+        modification time of their FAISS file.
+        """
+        manifest = read_manifest(self.db_path)
+        path = current_snapshot(self.db_path)
+        if manifest:
+            return manifest["version"], path
+        index_file = os.path.join(self.db_path, INDEX_FILES[0])
+        if os.path.exists(index_file):
+            return f"legacy-{os.stat(index_file).st_mtime_ns}", path
+        return None, path
+
+    def exists_on_disk(self) -> bool:
+        """Whether an index has been written to the database directory."""
+        return current_snapshot(self.db_path) is not None
+
+    @staticmethod
+    def _disk_bytes(path: Optional[str]) -> int:
+        total = 0
+        for name in INDEX_FILES:
+            file_path = os.path.join(path, name) if path else None
+            if file_path and os.path.exists(file_path):
+                total += os.path.getsize(file_path)
+        return total
+
+    def _load_from_disk(self, embeddings: Embeddings, version: str, path: str) -> LoadedIndex:
+        start = time.perf_counter()
+        migrate_legacy_store(path, embeddings)
+        store = load_store(path, embeddings)
+        configure_search(store.index)
+        # Filtered searches reconstruct vectors from search threads
+        ensure_direct_map(store.index)
+        sparse = BM25Index.load(path)
+        if sparse is None:
+            # Index written before hybrid retrieval: build the sparse side once
+            sparse = BM25Index.from_docstore(store.index_to_docstore_id, store.docstore)
+        load_time_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Vector index loaded (version: {version}, {load_time_ms:.1f} ms)")
+        return LoadedIndex(store, version, load_time_ms, self._disk_bytes(path), sparse, path)
+
+    async def get_loaded(self, embeddings: Embeddings) -> Optional[LoadedIndex]:
+        """Return the resident snapshot, reloading it if a newer version exists.
+
+        Args:
+            embeddings: Embedding function bound to the loaded store
+
+        Returns:
+            The current LoadedIndex, or None if nothing has been ingested
+        """
+        version, path = self._disk_snapshot()
+        current = self._current
+        if version is None or path is None:
+            return current
+        if current is not None and current.version == version:
+            return current
+        if current is not None and self._reload_lock.locked():
+            # Another task is already swapping in the new version
+            return current
+
+        async with self._reload_lock:
+            current = self._current
+            if current is None or current.version != version:
+                self._current = await asyncio.to_thread(
+                    self._load_from_disk, embeddings, version, path
+                )
+        return self._current
+
+    async def get(self, embeddings: Embeddings) -> Optional[FAISS]:
+        """Return the resident FAISS store (see get_loaded)."""
+        loaded = await self.get_loaded(embeddings)
+        return loaded.store if loaded else None
+
+    def publish(
+        self,
+        store: FAISS,
+        version: str,
+        load_time_ms: float = 0.0,
+        sparse: Optional[BM25Index] = None,
+        path: Optional[str] = None
+    ) -> None:
+        """Swap in an index that was just built in this process.
+
+        Avoids re-reading from disk what the ingestion service already
+        holds in memory.
+        """
+        path = path or current_snapshot(self.db_path)
+        self._current = LoadedIndex(store, version, load_time_ms, self._disk_bytes(path), sparse, path)
+
+    @property
+    def resident_bytes(self) -> int:
+        """Size of the files behind the resident snapshot (0 if none is loaded)."""
+        current = self._current
+        return current.disk_bytes if current is not None else 0
+
+    def unload(self) -> None:
+        """Drop the resident snapshot; the next search loads it again."""
+        self._current = None
+
+    def stats(self) -> dict:
+        """Describe the resident index for health reporting."""
+        current = self._current
+        if current is None:
+            return {"loaded": False}
+        index = current.store.index
+        return {
+            "loaded": True,
+            "version": current.version,
+            "loaded_at": current.loaded_at,
+            "load_time_ms": round(current.load_time_ms, 2),
+            "vectors": index.ntotal,
+            "dimension": index.d,
+            "disk_bytes": current.disk_bytes,
+            "index_type": type(index).__name__,
+            "search_params": search_parameters(index),
+            "ann_report": read_report(current.path) if current.path else None,
+        }
+
+
+_TENANT_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def tenant_for(user_id: Optional[str]) -> Optional[str]:
+    """Vector store namespace of a user.
+
+    Users listed in settings.TENANT_ORGANIZATIONS share their organization's
+    store; everyone else gets their own. Returns None when
+    settings.VECTOR_TENANCY is "shared" (the single store of older setups).
+    """
+    if settings.VECTOR_TENANCY == "shared" or not user_id:
+        return None
+    tenant = settings.get_tenant_organizations().get(user_id, user_id)
+    if _TENANT_NAME.match(tenant):
+        return tenant
+    # IDs that are not safe directory names are addressed by their hash
+    return hashlib.sha256(tenant.encode("utf-8")).hexdigest()[:32]
+
+
+class TenantIndexes:
+    """Per-tenant vector stores, with an LRU of resident indexes.
+
+    Each tenant has its own directory under ``<db_path>/tenants`` and its
+    own VectorIndexHolder (with its own write lock). Loaded snapshots are
+    kept in least-recently-used order and the coldest are unloaded once
+    their total size exceeds the memory cap or the tenant limit.
+    """
+
+    def __init__(self, root: VectorIndexHolder = None, max_bytes: int = None, max_tenants: int = None):
+        """Initialize the registry.
+
+        Args:
+            root: Holder of the shared store, used for tenant None
+            max_bytes: Cap on resident index bytes (defaults to settings.TENANT_CACHE_MAX_BYTES)
+            max_tenants: Cap on resident tenants (defaults to settings.TENANT_CACHE_MAX_TENANTS)
+        """
+        self.root = root or vector_index
+        self.base_path = os.path.join(self.root.db_path, "tenants")
+        self.max_bytes = max_bytes or settings.TENANT_CACHE_MAX_BYTES
+        self.max_tenants = max_tenants or settings.TENANT_CACHE_MAX_TENANTS
+        # Holders are cheap and carry the tenant's write lock, so they are
+        # kept; only their loaded snapshots are evicted
+        self._holders: dict[str, VectorIndexHolder] = {}
+        self._lru: OrderedDict[str, None] = OrderedDict()
+        self.evictions = 0
+
+    def holder(self, tenant: Optional[str]) -> VectorIndexHolder:
+        """Index holder of a tenant (the shared store for None)."""
+        if tenant is None:
+            return self.root
+        holder = self._holders.get(tenant)
+        if holder is None:
+            holder = self._holders[tenant] = VectorIndexHolder(os.path.join(self.base_path, tenant))
+        return holder
+
+    async def get_loaded(self, tenant: Optional[str], embeddings: Embeddings) -> Optional[LoadedIndex]:
+        """Resident snapshot of a tenant's store, loading it and evicting cold tenants."""
+        loaded = await self.holder(tenant).get_loaded(embeddings)
+        self.touch(tenant)
+        return loaded
+
+    def touch(self, tenant: Optional[str]) -> None:
+        """Mark a tenant as most recently used and enforce the caps."""
+        if tenant is None:
+            return
+        self._lru[tenant] = None
+        self._lru.move_to_end(tenant)
+        self._evict(keep=tenant)
+
+    def _resident(self) -> list[str]:
+        return [t for t in self._lru if self._holders[t].resident_bytes]
+
+    def _evict(self, keep: str) -> None:
+        resident = self._resident()
+        total = sum(self._holders[t].resident_bytes for t in resident)
+        for tenant in list(resident):
+            if tenant == keep:
+                continue
+            if total <= self.max_bytes and len(resident) <= self.max_tenants:
+                break
+            holder = self._holders[tenant]
+            if holder.write_lock.locked():
+                # Mid-ingestion: it will publish a fresh snapshot anyway
+                continue
+            total -= holder.resident_bytes
+            holder.unload()
+            resident.remove(tenant)
+            del self._lru[tenant]
+            self.evictions += 1
+            logger.info(f"Evicted vector index of tenant {tenant}")
+
+    def stats(self) -> dict:
+        """Resident tenants and memory use for health reporting."""
+        resident = self._resident()
+        return {
+            "tenancy": settings.VECTOR_TENANCY,
+            "resident_tenants": len(resident),
+            "resident_bytes": sum(self._holders[t].resident_bytes for t in resident),
+            "max_bytes": self.max_bytes,
+            "max_tenants": self.max_tenants,
+            "evictions": self.evictions,
+        }
+
+
+# Singleton Instances
+vector_index = VectorIndexHolder()
+tenant_indexes = TenantIndexes(vector_index)
@@ -0,0 +1 @@
+"""Offline benchmarks: no API keys or network access needed."""
@@ -0,0 +1,246 @@
+"""MCP transport benchmark: SSE versus streamable HTTP against Node B.
+
+Measures, for each transport, what a session costs to open (connect and
+``initialize`` handshake), the latency of ``fetch_portfolio`` on a warm
+pooled session and when every call opens its own session, and the memory
+each open session holds in this process and, when its PID is known, in
+Node B:
+
+    python -m benchmarks.mcp_transport --server-dir ../fina-mcp-server
+    python -m benchmarks.mcp_transport --host localhost --port 8001 --server-pid 4242
+
+With ``--server-dir`` a Node B is started for the run on a free port, so
+no running server is needed. Results are written as JSON, like the
+retrieval benchmark.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional
+
+import httpx
+import numpy as np
+
+from app.core.settings import settings
+from app.service.mcp_pool import TRANSPORT_PATHS, MCPSessionPool, transport_url
+
+DEFAULT_TRANSPORTS = tuple(TRANSPORT_PATHS)
+
+
+def _rss_bytes(pid: str = "self") -> Optional[int]:
+    """Resident set size of a process, where /proc is available."""
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _percentiles(samples_ms: list[float]) -> dict:
+    values = np.asarray(samples_ms)
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 4),
+        "p95_ms": round(float(np.percentile(values, 95)), 4),
+        "p99_ms": round(float(np.percentile(values, 99)), 4),
+        "mean_ms": round(float(values.mean()), 4),
+    }
+
+
+@contextmanager
+def node_b(server_dir: str, startup_timeout: float = 30.0):
+    """Run Node B from its source directory on a free port; yields (port, pid).
+
+    The server gets a fresh, seeded portfolio database in a temporary directory.
+    """
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    data_dir = tempfile.TemporaryDirectory()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.server:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=server_dir,
+        env={**os.environ, "PORTFOLIO_DB_PATH": os.path.join(data_dir.name, "portfolio.db")},
+    )
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f"Node B did not start from {server_dir}")
+            time.sleep(0.1)
+        yield port, process.pid
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        data_dir.cleanup()
+
+
+async def benchmark_transport(
+    transport: str,
+    host: str,
+    port: int,
+    calls: int,
+    cold_calls: int,
+    sessions: int,
+    user_id: str,
+    server_pid: Optional[int] = None
+) -> dict:
+    """Session setup, per-call latency and per-session memory of one transport."""
+    url = transport_url(host, port, transport)
+    arguments = {"user_id": user_id}
+
+    # Warm session: what a pooled client pays per call
+    pool = MCPSessionPool(url, size=1, transport=transport)
+    await pool.start(warm=1)
+    await pool.call_tool("fetch_portfolio", arguments)
+    warm_ms = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await pool.call_tool("fetch_portfolio", arguments)
+        warm_ms.append((time.perf_counter() - start) * 1000)
+    await pool.close()
+
+    # Session per call: connect + handshake + call + close
+    cold_ms, connect_ms, handshake_ms = [], [], []
+    for _ in range(cold_calls):
+        pool = MCPSessionPool(url, size=1, transport=transport)
+        start = time.perf_counter()
+        await pool.call_tool("fetch_portfolio", arguments)
+        await pool.close()
+        cold_ms.append((time.perf_counter() - start) * 1000)
+        connect_ms.append(pool.connect.total_ms)
+        handshake_ms.append(pool.handshake.total_ms)
+
+    # Memory held by open, idle sessions on both sides
+    gc.collect()
+    await asyncio.sleep(0.2)
+    server_before = _rss_bytes(str(server_pid)) if server_pid else None
+    client_before = _rss_bytes()
+    tracemalloc.start()
+    traced_before = tracemalloc.get_traced_memory()[0]
+    pool = MCPSessionPool(url, size=sessions, max_in_flight=1, transport=transport)
+    await pool.start(warm=sessions)
+    opened = pool.stats()["sessions"]
+    await asyncio.sleep(0.2)
+    traced_after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    client_after = _rss_bytes()
+    server_after = _rss_bytes(str(server_pid)) if server_pid else None
+    await pool.close()
+
+    def per_session(before, after):
+        if before is None or after is None or not opened:
+            return None
+        return int((after - before) / opened)
+
+    return {
+        "transport": transport,
+        "url": url,
+        "session_setup": {
+            "connect": _percentiles(connect_ms),
+            "handshake": _percentiles(handshake_ms),
+        },
+        "warm_call": _percentiles(warm_ms),
+        "session_per_call": _percentiles(cold_ms),
+        "memory": {
+            "sessions": opened,
+            "client_traced_bytes_per_session": per_session(traced_before, traced_after),
+            "client_rss_bytes_per_session": per_session(client_before, client_after),
+            "server_rss_bytes_per_session": per_session(server_before, server_after),
+        },
+    }
+
+
+async def run(
+    host: str,
+    port: int,
+    transports: tuple[str, ...] = DEFAULT_TRANSPORTS,
+    calls: int = 200,
+    cold_calls: int = 20,
+    sessions: int = 20,
+    user_id: str = "user123",
+    server_pid: Optional[int] = None
+) -> dict:
+    """Run the benchmark against a Node B and return the report."""
+    results = [
+        await benchmark_transport(transport, host, port, calls, cold_calls, sessions, user_id, server_pid)
+        for transport in transports
+    ]
+    return {
+        "benchmark": "mcp_transport",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "calls": calls, "cold_calls": cold_calls, "sessions": sessions,
+            "tool": "fetch_portfolio", "server_rss": server_pid is not None,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=settings.MCP_PORT)
+    parser.add_argument("--server-dir", help="Start Node B from this directory for the run")
+    parser.add_argument("--server-pid", type=int, help="PID of a running Node B, for its memory use")
+    parser.add_argument("--transports", nargs="+", default=list(DEFAULT_TRANSPORTS), choices=list(TRANSPORT_PATHS))
+    parser.add_argument("--calls", type=int, default=200, help="Calls on a warm session")
+    parser.add_argument("--cold-calls", type=int, default=20, help="Calls that each open their own session")
+    parser.add_argument("--sessions", type=int, default=20, help="Sessions held open to measure memory")
+    parser.add_argument("--user-id", default="user123")
+    parser.add_argument("--output", default="data/benchmarks/mcp_transport.json")
+    args = parser.parse_args(argv)
+
+    def benchmark(host, port, server_pid):
+        return asyncio.run(run(
+            host, port, tuple(args.transports), args.calls, args.cold_calls,
+            args.sessions, args.user_id, server_pid
+        ))
+
+    if args.server_dir:
+        with node_b(args.server_dir) as (port, pid):
+            report = benchmark("127.0.0.1", port, pid)
+    else:
+        report = benchmark(args.host, args.port, args.server_pid)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for row in report["results"]:
+        memory = row["memory"]
+        server = memory["server_rss_bytes_per_session"]
+        print(
+            f"{row['transport']:<16} warm p50 {row['warm_call']['p50_ms']:.3f}  "
+            f"p99 {row['warm_call']['p99_ms']:.3f} ms  "
+            f"session/call p50 {row['session_per_call']['p50_ms']:.3f} ms  "
+            f"client {memory['client_traced_bytes_per_session'] / 1024:.1f} KiB/session  "
+            f"server {'n/a' if server is None else f'{server / 1024:.1f} KiB'}/session"
+        )
+    print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+"""Offline retrieval benchmark: ingest throughput, memory, latency and recall.
+
+Runs without Hugging Face or Groq credentials. A synthetic financial
+corpus (issuers, quarters, metrics, risk factors and boilerplate) is
+embedded with a deterministic feature-hashing embedder, indexed with each
+FAISS index mode, and searched with queries derived from known chunks.
+Results are written as JSON so runs can be compared for regressions:
+
+    python -m benchmarks.retrieval --chunks 100000 --output data/benchmarks/retrieval.json
+    python -m benchmarks.retrieval --chunks 100000 --baseline data/benchmarks/retrieval.json
+
+For every mode the report holds ingest throughput (embedding + training +
+adding), serialized index size and resident memory growth, p50/p95/p99
+latency of single-query searches (query embedding included), recall@k
+against exact Flat search and hit rate@k of the chunk each query was
+derived from.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Optional
+
+import faiss
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.service.ann_index import build_index, configure_search, min_training_vectors
+from app.service.sparse_index import tokenize
+
+DEFAULT_MODES = ("Flat", "HNSW32", "IVF{nlist},Flat", "IVF{nlist},PQ{pq}x4fs", "SQ8")
+
+_ISSUER_NAMES = (
+    "Apex", "Borealis", "Cobalt", "Delta", "Evergreen", "Fulcrum", "Granite", "Harbor",
+    "Ionic", "Juniper", "Keystone", "Lumen", "Meridian", "Northwind", "Orion", "Pinnacle",
+)
+_METRICS = (
+    "revenue", "EBITDA", "net income", "operating margin", "free cash flow", "gross margin",
+    "earnings per share", "capital expenditure", "net debt", "dividend per share",
+)
+_SEGMENTS = ("data center", "consumer", "enterprise", "automotive", "services", "cloud", "retail")
+_RISKS = (
+    "foreign exchange volatility", "supply chain disruption", "interest rate exposure",
+    "regulatory investigations", "customer concentration", "cybersecurity incidents",
+    "commodity price swings", "litigation outcomes",
+)
+_MOVES = ("increased", "decreased", "remained flat", "improved", "declined")
+_BOILERPLATE = (
+    "This report contains forward-looking statements that involve risks and uncertainties; "
+    "actual results may differ materially from those projected."
+)
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic local embedding stand-in based on feature hashing.
+
+    Each token (and token bigram) is hashed to a signed dimension, so
+    texts sharing words are close in L2 distance, the same text always
+    maps to the same unit vector, and no model or network is involved.
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        tokens = tokenize(text)
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            h = zlib.crc32(feature.encode())
+            vector[h % self.dimension] += 1.0 if h & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_matrix(self, texts: list[str]) -> np.ndarray:
+        """Embeddings as a float32 matrix, without list conversion."""
+        return np.stack([self._embed(text) for text in texts]) if texts else np.empty((0, self.dimension), np.float32)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_matrix(texts).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text).tolist()
+
+
+def _ticker(i: int) -> str:
+    letters = ""
+    i += 26 * 26  # at least three letters
+    while i:
+        i, r = divmod(i, 26)
+        letters = chr(65 + r) + letters
+    return letters
+
+
+def synthetic_corpus(chunks: int, seed: int = 0) -> tuple[list[str], list[dict]]:
+    """Chunks of synthetic quarterly reports and their metadata.
+
+    Every chunk names an issuer, a fiscal quarter and a metric with a
+    figure; some add a segment comment, a risk factor or the boilerplate
+    disclaimer that real filings repeat.
+    """
+    rng = np.random.default_rng(seed)
+    issuers = max(1, chunks // 200)
+    texts, metadata = [], []
+    for i in range(chunks):
+        issuer = int(rng.integers(issuers))
+        ticker = _ticker(issuer)
+        name = f"{_ISSUER_NAMES[issuer % len(_ISSUER_NAMES)]} {ticker}"
+        year = 2019 + int(rng.integers(6))
+        quarter = 1 + int(rng.integers(4))
+        metric = _METRICS[int(rng.integers(len(_METRICS)))]
+        figure = round(float(rng.uniform(0.1, 99.9)), 1)
+        move = _MOVES[int(rng.integers(len(_MOVES)))]
+        sentences = [
+            f"{name} reported {metric} of {figure} billion for Q{quarter} {year}.",
+            f"{metric.capitalize()} {move} compared with the prior quarter.",
+        ]
+        if rng.random() < 0.6:
+            segment = _SEGMENTS[int(rng.integers(len(_SEGMENTS)))]
+            sentences.append(f"The {segment} segment drove {int(rng.integers(5, 80))}% of the change.")
+        if rng.random() < 0.4:
+            risk = _RISKS[int(rng.integers(len(_RISKS)))]
+            sentences.append(f"Management highlighted {risk} as a key risk for {ticker}.")
+        if rng.random() < 0.2:
+            sentences.append(_BOILERPLATE)
+        texts.append(" ".join(sentences))
+        metadata.append({"issuer": ticker, "report_date": f"{year}-{quarter * 3:02d}-28", "metric": metric})
+    return texts, metadata
+
+
+def synthetic_queries(texts: list[str], metadata: list[dict], count: int, seed: int = 1) -> tuple[list[str], np.ndarray]:
+    """Questions about randomly chosen chunks, with the chunk each targets."""
+    rng = np.random.default_rng(seed)
+    targets = rng.choice(len(texts), size=min(count, len(texts)), replace=False)
+    queries = []
+    for target in targets:
+        meta = metadata[target]
+        year, month = meta["report_date"][:4], int(meta["report_date"][5:7])
+        queries.append(f"{meta['issuer']} {meta['metric']} Q{month // 3} {year}")
+    return queries, targets
+
+
+def resolve_mode(mode: str, chunks: int, dimension: int) -> str:
+    """Fill the {nlist} and {pq} placeholders of a factory string for this corpus."""
+    nlist = max(1, min(4 * int(math.sqrt(chunks)), chunks // 39))
+    pq = next((m for m in (64, 48, 32, 24, 16, 8, 4, 2) if dimension % m == 0 and m <= dimension // 2), 1)
+    return mode.format(nlist=nlist, pq=pq)
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident set size of this process, where /proc is available."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _percentiles(samples_ms: list[float]) -> dict:
+    values = np.asarray(samples_ms)
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 4),
+        "p95_ms": round(float(np.percentile(values, 95)), 4),
+        "p99_ms": round(float(np.percentile(values, 99)), 4),
+        "mean_ms": round(float(values.mean()), 4),
+    }
+
+
+def benchmark_mode(
+    factory: str,
+    texts: list[str],
+    embeddings: HashingEmbeddings,
+    queries: list[str],
+    targets: np.ndarray,
+    k: int,
+    truth: np.ndarray,
+    batch_size: int = 10000
+) -> dict:
+    """Ingest, size and search one index mode.
+
+    Args:
+        factory: Resolved FAISS factory string
+        texts: Corpus chunks
+        embeddings: Embedder for chunks and queries
+        queries: Query texts
+        targets: Chunk each query was derived from
+        k: Neighbours per search
+        truth: Exact top-k of every query, for recall@k
+        batch_size: Chunks embedded per batch
+
+    Returns:
+        One result row of the report
+    """
+    if len(texts) < min_training_vectors(factory, embeddings.dimension):
+        return {"mode": factory, "skipped": "corpus smaller than the training set this index needs"}
+
+    rss_before = _rss_bytes()
+    start = time.perf_counter()
+    vectors = np.concatenate([
+        embeddings.embed_matrix(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)
+    ])
+    embed_s = time.perf_counter() - start
+    start = time.perf_counter()
+    index = build_index(factory, vectors)
+    build_s = time.perf_counter() - start
+    del vectors
+    applied = configure_search(index)
+    rss_after = _rss_bytes()
+
+    latencies, found = [], []
+    for query in queries:
+        start = time.perf_counter()
+        vector = np.asarray([embeddings.embed_query(query)], dtype=np.float32)
+        _, ids = index.search(vector, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(ids[0])
+    found = np.asarray(found)
+
+    recall = sum(len(set(f) & set(t)) for f, t in zip(found, truth)) / truth.size
+    hit_rate = float(np.mean([target in row for target, row in zip(targets, found)]))
+    return {
+        "mode": factory,
+        "search_params": applied,
+        "ingest": {
+            "embed_s": round(embed_s, 3),
+            "build_s": round(build_s, 3),
+            "chunks_per_s": round(len(texts) / (embed_s + build_s), 1),
+        },
+        "memory": {
+            "index_bytes": int(faiss.serialize_index(index).nbytes),
+            "rss_delta_bytes": rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+        },
+        "search": _percentiles(latencies),
+        f"recall@{k}": round(recall, 4),
+        f"hit_rate@{k}": round(hit_rate, 4),
+    }
+
+
+def run(
+    chunks: int = 10000,
+    queries: int = 200,
+    k: int = 10,
+    dimension: int = 384,
+    modes: tuple[str, ...] = DEFAULT_MODES,
+    seed: int = 0
+) -> dict:
+    """Run the benchmark and return the report."""
+    embeddings = HashingEmbeddings(dimension)
+    texts, metadata = synthetic_corpus(chunks, seed)
+    query_texts, targets = synthetic_queries(texts, metadata, queries, seed + 1)
+    k = min(k, chunks)
+
+    # Exact neighbours of every query, the reference for recall@k
+    flat = faiss.IndexFlatL2(dimension)
+    for i in range(0, chunks, 10000):
+        flat.add(embeddings.embed_matrix(texts[i:i + 10000]))
+    _, truth = flat.search(embeddings.embed_matrix(query_texts), k)
+    del flat
+
+    results = [
+        benchmark_mode(resolve_mode(mode, chunks, dimension), texts, embeddings, query_texts, targets, k, truth)
+        for mode in modes
+    ]
+    return {
+        "benchmark": "retrieval",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "chunks": chunks, "queries": len(query_texts), "k": k,
+            "dimension": dimension, "seed": seed, "embeddings": "hashing",
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "faiss": faiss.__version__,
+            "cpus": os.cpu_count(),
+            "omp_threads": faiss.omp_get_max_threads(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, report: dict, tolerance: float = 0.1) -> list[str]:
+    """Regressions of a report against a baseline run of the same config.
+
+    Flags p95 latency growth and ingest throughput loss beyond the
+    tolerance, and any drop in recall@k or hit rate@k.
+    """
+    k = report["config"]["k"]
+    previous = {row["mode"]: row for row in baseline.get("results", []) if "skipped" not in row}
+    regressions = []
+    for row in report["results"]:
+        old = previous.get(row["mode"])
+        if old is None or "skipped" in row:
+            continue
+        if row["search"]["p95_ms"] > old["search"]["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{row['mode']}: p95 {old['search']['p95_ms']} -> {row['search']['p95_ms']} ms")
+        if row["ingest"]["chunks_per_s"] < old["ingest"]["chunks_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{row['mode']}: ingest {old['ingest']['chunks_per_s']} -> {row['ingest']['chunks_per_s']} chunks/s"
+            )
+        for metric in (f"recall@{k}", f"hit_rate@{k}"):
+            if row[metric] < old.get(metric, 0) - 1e-4:
+                regressions.append(f"{row['mode']}: {metric} {old[metric]} -> {row[metric]}")
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunks", type=int, default=10000, help="Corpus size (1k to 1M)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--dimension", type=int, default=384, help="Embedding size (MiniLM: 384)")
+    parser.add_argument("--modes", nargs="+", default=list(DEFAULT_MODES),
+                        help="FAISS factory strings; {nlist} and {pq} are sized to the corpus")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="data/benchmarks/retrieval.json")
+    parser.add_argument("--baseline", help="Earlier report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    report = run(args.chunks, args.queries, args.k, args.dimension, tuple(args.modes), args.seed)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    k = report["config"]["k"]
+    for row in report["results"]:
+        if "skipped" in row:
+            print(f"{row['mode']:<20} skipped: {row['skipped']}")
+            continue
+        print(
+            f"{row['mode']:<20} {row['ingest']['chunks_per_s']:>10} chunks/s  "
+            f"{row['memory']['index_bytes'] / 2**20:>8.1f} MiB  "
+            f"p50 {row['search']['p50_ms']:.3f}  p95 {row['search']['p95_ms']:.3f}  "
+            f"p99 {row['search']['p99_ms']:.3f} ms  recall@{k} {row[f'recall@{k}']}  "
+            f"hit@{k} {row[f'hit_rate@{k}']}"
+        )
+    print(f"Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,11 @@ from app.core.exceptions import FinaAgentException
 from app.core.logger import get_logger
 from app.core.settings import settings
 from app.graph.builder import graph_manager
+from app.service.agent_tools import ingest_service
+from app.service.ingestion_jobs import ingestion_jobs
+from app.service.mcp_pool import mcp_session_pool
+from app.service.pdf_parser import pdf_parser
+from app.service.search_pool import loop_monitor, search_pool
 
 logger = get_logger("MAIN_AGENT")
 
@@ -20,10 +25,20 @@ async def lifespan(app: FastAPI):
     logger.info("Starting FINA Agent Engine...")
     await graph_manager.initialize()
     logger.info("Graph manager initialized successfully")
+    await ingest_service.load_vector_index()
+    await ingestion_jobs.start(ingest_service)
+    loop_monitor.start()
+    # Warm MCP sessions to Node B, reused by every portfolio lookup
+    await mcp_session_pool.start()
     yield
     # Shutdown: Close physical connections
     logger.info("Shutting down FINA Agent Engine...")
+    await ingestion_jobs.stop()
+    await mcp_session_pool.close()
+    await loop_monitor.stop()
     await graph_manager.close()
+    pdf_parser.shutdown()
+    search_pool.shutdown()
     logger.info("Shutdown complete")
 
 app = FastAPI(
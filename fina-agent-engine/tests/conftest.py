@@ -8,6 +8,22 @@ def mock_env_vars(monkeypatch):
     monkeypatch.setenv("GROQ_API_KEY", "test_key")
     monkeypatch.setenv("HUGGINGFACEHUB_API_TOKEN", "test_token")
     monkeypatch.setenv("LOG_LEVEL", "DEBUG")
+    # Tokenizers are never downloaded; chunking falls back to its estimate
+    monkeypatch.setenv("HF_HUB_OFFLINE", "1")
+
+# Keep SQLite state written by the app lifespan out of the working tree
+@pytest.fixture(autouse=True)
+def isolated_state_files(tmp_path, monkeypatch):
+    from app.core.settings import settings
+    from app.service.embedding_cache import embedding_cache
+    from app.service.ingestion_jobs import ingestion_jobs
+
+    jobs_path = str(tmp_path / "ingestion_jobs.sqlite")
+    cache_path = str(tmp_path / "embedding_cache.sqlite")
+    monkeypatch.setattr(settings, "INGESTION_JOBS_DB_PATH", jobs_path)
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_PATH", cache_path)
+    monkeypatch.setattr(ingestion_jobs, "db_path", jobs_path)
+    monkeypatch.setattr(embedding_cache, "db_path", cache_path)
 
 @pytest.fixture
 def mock_settings():
@@ -25,3 +41,43 @@ def mock_graph_manager():
         mock.close = MagicMock()
         mock.graph = MagicMock()
         yield mock
+
+def build_pdf(pages: list[str]) -> bytes:
+    """Build a minimal valid PDF with one line of Helvetica text per page."""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled once page object numbers are known
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in pages:
+        escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        stream = f"BT /F1 12 Tf 72 720 Td ({escaped}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        content_id = len(objects)
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Contents {content_id} 0 R /Resources << /Font << /F1 3 0 R >> >> >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    def _make(name: str, pages: list[str]) -> str:
+        path = tmp_path / name
+        path.write_bytes(build_pdf(pages))
+        return str(path)
+    return _make
@@ -0,0 +1,59 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.core.settings import settings
+from app.service import agent_tools
+from app.service.vector_store import TenantIndexes, VectorIndexHolder, tenant_for
+
+# One fact per page; questions quote the exact identifiers dense embeddings blur
+FILING_PAGES = [
+    "NVDA Q3 FY2024 10-Q: EBITDA 2023 was 4.1 billion USD, up 38% year over year.",
+    "Apple Inc. bond ISIN US037833DX59 carries a 3.85% coupon maturing in 2043.",
+    "MSFT segment Intelligent Cloud reported operating income of 12.9 billion in FY2023.",
+    "TSLA risk factor 1A.7: lithium supply contracts expire in Q2 2025 without renewal.",
+    "Portfolio guideline 4.2: single-issuer exposure must stay below 7.5% of NAV.",
+]
+
+QUESTIONS = [
+    "What was NVDA EBITDA 2023 according to the 10-Q?",
+    "What coupon does ISIN US037833DX59 pay?",
+    "How much operating income did Intelligent Cloud report in FY2023?",
+    "What does risk factor 1A.7 say about TSLA?",
+    "What is the limit in portfolio guideline 4.2?",
+]
+
+
+def count_search_calls(messages) -> int:
+    return sum(
+        1
+        for message in messages
+        if isinstance(message, AIMessage)
+        for call in message.tool_calls
+        if call["name"] == "search_financial_docs"
+    )
+
+
+@pytest.mark.asyncio
+async def test_hybrid_retrieval_reduces_repeated_tool_calls(agent_service, make_pdf, tmp_path, monkeypatch):
+    """Benchmark: search_financial_docs calls per question, dense vs hybrid."""
+    service = agent_tools.ingest_service
+    monkeypatch.setattr(service, "tenants", TenantIndexes(VectorIndexHolder(str(tmp_path / "vector_db"))))
+    await service.process_pdf(
+        make_pdf("filing.pdf", FILING_PAGES), filename="filing.pdf", tenant=tenant_for("eval_user_001")
+    )
+
+    graph = agent_service.graph_manager.graph
+    calls = {}
+    for mode in ("dense", "hybrid"):
+        monkeypatch.setattr(settings, "RETRIEVAL_MODE", mode)
+        calls[mode] = []
+        for number, question in enumerate(QUESTIONS):
+            config = {"configurable": {"thread_id": f"hybrid-eval-{mode}-{number}"}}
+            state = await graph.ainvoke(
+                {"messages": [HumanMessage(content=question)], "user_id": "eval_user_001"},
+                config=config,
+            )
+            calls[mode].append(count_search_calls(state["messages"]))
+
+    # Ranking gain itself is checked offline in tests/test_hybrid_retrieval.py
+    assert sum(calls["hybrid"]) <= sum(calls["dense"]), calls
@@ -11,7 +11,16 @@ async def test_get_user_portfolio_call():
 
 @pytest.mark.asyncio
 async def test_search_financial_docs_call():
-    with patch("app.service.agent_tools.ingest_service.search_in_vector_db", new_callable=AsyncMock) as mock_search:
-        mock_search.return_value = "docs data"
-        result = await search_financial_docs.ainvoke({"query": "risk"})
+    with patch("app.service.agent_tools.ingest_service.retrieve_context", new_callable=AsyncMock) as mock_search:
+        mock_search.return_value = ("docs data", {"context_tokens": 3, "context_tokens_saved": 0})
+        result = await search_financial_docs.ainvoke({"query": "risk", "user_id": "u1"})
         assert result == "docs data"
+
+@pytest.mark.asyncio
+async def test_search_financial_docs_passes_sub_queries():
+    with patch("app.service.agent_tools.ingest_service.retrieve_context", new_callable=AsyncMock) as mock_search:
+        mock_search.return_value = ("docs data", None)
+        await search_financial_docs.ainvoke({
+            "query": "compare risks", "sub_queries": ["AAPL risks", "NVDA risks"], "user_id": "u1"
+        })
+        assert mock_search.call_args.kwargs["sub_queries"] == ["AAPL risks", "NVDA risks"]
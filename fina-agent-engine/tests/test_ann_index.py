@@ -0,0 +1,88 @@
+import faiss
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.service.ann_index import (
+    build_index,
+    configure_search,
+    ensure_index_type,
+    min_training_vectors,
+    read_report,
+    recall_latency_report,
+    remove_vectors,
+    search_parameters,
+    write_report,
+)
+
+
+def make_store(n: int, dim: int = 16) -> FAISS:
+    rng = np.random.default_rng(1)
+    vectors = rng.random((n, dim), dtype=np.float32)
+    pairs = [(f"chunk {i}", v.tolist()) for i, v in enumerate(vectors)]
+    return FAISS.from_embeddings(
+        pairs, DeterministicFakeEmbedding(size=dim), ids=[f"id-{i}" for i in range(n)]
+    )
+
+
+def test_min_training_vectors():
+    assert min_training_vectors("Flat", 16) == 0
+    assert min_training_vectors("HNSW32", 16) == 0
+    assert min_training_vectors("IVF16,PQ4", 16) == 39 * 16
+    assert min_training_vectors("SQ8", 16) == 256
+
+
+def test_configure_search_applies_supported_parameters():
+    vectors = np.random.default_rng(0).random((700, 16), dtype=np.float32)
+    hnsw = build_index("HNSW32", vectors)
+    ivf = build_index("IVF16,Flat", vectors)
+
+    assert configure_search(hnsw, ef_search=40) == {"efSearch": 40}
+    assert configure_search(ivf, nprobe=3) == {"nprobe": 3}
+    assert search_parameters(ivf) == {"nprobe": 3}
+    assert configure_search(faiss.IndexFlatL2(16)) == {}
+
+
+def test_recall_report_sweeps_parameters():
+    vectors = np.random.default_rng(0).random((1000, 16), dtype=np.float32)
+
+    report = recall_latency_report(vectors, "IVF16,Flat", k=5)
+
+    values = [row["value"] for row in report["results"] if row["param"] == "nprobe"]
+    assert values == [1, 4, 8, 16, 32, 64, 128]
+    recalls = [row["recall"] for row in report["results"]]
+    assert recalls[-1] == 1.0  # every list probed: exact
+    assert recalls[0] <= recalls[-1]
+    assert report["flat_latency_ms"] >= 0
+
+    flat = recall_latency_report(vectors, "Flat", k=5)
+    assert flat["results"] == [{**flat["results"][0], "param": None, "recall": 1.0}]
+
+
+def test_ensure_index_type_waits_for_enough_training_vectors(tmp_path):
+    store = make_store(100)
+    assert ensure_index_type(store, "IVF16,Flat") is None
+    assert isinstance(store.index, faiss.IndexFlat)
+
+    store = make_store(700)
+    report = ensure_index_type(store, "IVF16,Flat")
+    assert isinstance(store.index, faiss.IndexIVFFlat)
+    assert report["vectors"] == 700
+
+    write_report(str(tmp_path), report)
+    assert read_report(str(tmp_path)) == report
+
+
+@pytest.mark.parametrize("factory", ["HNSW32", "IVF16,Flat", "SQ8"])
+def test_remove_vectors_keeps_docstore_mapping(factory):
+    store = make_store(700)
+    target = store.index.reconstruct(5)
+    ensure_index_type(store, factory)
+
+    remove_vectors(store, ["id-0", "id-1"])
+
+    assert store.index.ntotal == 698
+    assert len(store.index_to_docstore_id) == 698
+    doc = store.similarity_search_by_vector(target.tolist(), k=1)[0]
+    assert doc.page_content == "chunk 5"
@@ -1,3 +1,4 @@
+import os
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, AsyncMock, MagicMock
@@ -48,3 +49,119 @@ def test_chat_endpoint_error():
     
     assert response.status_code == 500
     assert "Agent Reasoning Error" in response.json()["detail"]
+
+def test_delete_document_endpoint(monkeypatch):
+    from app.core.dependencies import get_ingestion_service
+    from app.core.settings import settings
+    monkeypatch.setattr(settings, "VECTOR_TENANCY", "user")
+    mock_service = AsyncMock()
+    mock_service.delete_document.return_value = 4
+
+    app.dependency_overrides[get_ingestion_service] = lambda: mock_service
+    response = client.delete("/api/v1/ingest/abc123?user_id=client_7")
+    app.dependency_overrides = {}
+
+    assert response.status_code == 200
+    assert response.json()["chunks_deleted"] == 4
+    assert mock_service.delete_document.call_args.kwargs["tenant"] == "client_7"
+
+def test_delete_document_endpoint_not_found():
+    from app.core.dependencies import get_ingestion_service
+    from app.core.exceptions import DocumentNotFoundError
+    mock_service = AsyncMock()
+    mock_service.delete_document.side_effect = DocumentNotFoundError("abc123")
+
+    app.dependency_overrides[get_ingestion_service] = lambda: mock_service
+    response = client.delete("/api/v1/ingest/abc123?user_id=client_7")
+    app.dependency_overrides = {}
+
+    assert response.status_code == 404
+
+def test_ingest_endpoint_queues_job_with_upload_hash(monkeypatch):
+    import hashlib
+    from app.core.dependencies import get_ingestion_jobs
+    from app.core.settings import settings
+    monkeypatch.setattr(settings, "VECTOR_TENANCY", "user")
+    payload = b"%PDF-1.4 report"
+    mock_jobs = AsyncMock()
+    mock_jobs.submit.return_value = {
+        "job_id": "j1", "status": "queued", "filename": "r.pdf", "created_at": "now"
+    }
+
+    app.dependency_overrides[get_ingestion_jobs] = lambda: mock_jobs
+    response = client.post(
+        "/api/v1/ingest",
+        files={"file": ("r.pdf", payload, "application/pdf")},
+        data={"issuer": "NVDA", "report_date": "2024-09-30", "user_id": "client_7"}
+    )
+    app.dependency_overrides = {}
+
+    assert response.status_code == 202
+    assert response.json()["job_id"] == "j1"
+    assert mock_jobs.submit.call_args.kwargs["issuer"] == "NVDA"
+    assert mock_jobs.submit.call_args.kwargs["report_date"] == "2024-09-30"
+    assert mock_jobs.submit.call_args.kwargs["tenant"] == "client_7"
+    temp_path, filename = mock_jobs.submit.call_args.args
+    assert filename == "r.pdf"
+    assert mock_jobs.submit.call_args.kwargs["file_hash"] == hashlib.sha256(payload).hexdigest()
+    assert "r.pdf" not in temp_path
+    os.remove(temp_path)
+
+def test_ingest_endpoints_require_an_owner():
+    response = client.post("/api/v1/ingest", files={"file": ("r.pdf", b"%PDF", "application/pdf")})
+    assert response.status_code == 422
+    assert client.delete("/api/v1/ingest/abc123").status_code == 422
+
+def test_ingest_endpoint_rejects_oversized_upload(monkeypatch):
+    from app.core.dependencies import get_ingestion_jobs
+    from app.core.settings import settings
+    monkeypatch.setattr(settings, "MAX_PDF_SIZE_MB", 1)
+    mock_jobs = AsyncMock()
+
+    app.dependency_overrides[get_ingestion_jobs] = lambda: mock_jobs
+    payload = b"x" * (1024 * 1024 + 1)
+    response = client.post(
+        "/api/v1/ingest", files={"file": ("big.pdf", payload, "application/pdf")}, data={"user_id": "client_7"}
+    )
+    app.dependency_overrides = {}
+
+    assert response.status_code == 413
+    mock_jobs.submit.assert_not_called()
+
+def test_ingest_endpoint_queue_full_removes_upload():
+    from app.core.dependencies import get_ingestion_jobs
+    from app.core.exceptions import IngestionQueueFullError
+    mock_jobs = AsyncMock()
+    mock_jobs.submit.side_effect = IngestionQueueFullError()
+
+    app.dependency_overrides[get_ingestion_jobs] = lambda: mock_jobs
+    response = client.post(
+        "/api/v1/ingest", files={"file": ("r.pdf", b"%PDF", "application/pdf")}, data={"user_id": "client_7"}
+    )
+    app.dependency_overrides = {}
+
+    assert response.status_code == 503
+    assert not os.path.exists(mock_jobs.submit.call_args.args[0])
+
+def test_get_ingestion_job_not_found():
+    from app.core.dependencies import get_ingestion_jobs
+    mock_jobs = AsyncMock()
+    mock_jobs.get.return_value = None
+
+    app.dependency_overrides[get_ingestion_jobs] = lambda: mock_jobs
+    response = client.get("/api/v1/ingest/missing")
+    app.dependency_overrides = {}
+
+    assert response.status_code == 404
+
+def test_ingestion_job_events_not_found():
+    from app.core.dependencies import get_ingestion_jobs
+    mock_jobs = AsyncMock()
+    mock_jobs.get.return_value = None
+
+    app.dependency_overrides[get_ingestion_jobs] = lambda: mock_jobs
+    response = client.get("/api/v1/ingest/missing/events")
+    app.dependency_overrides = {}
+
+    assert response.status_code == 404
+    mock_jobs.events.assert_not_called()
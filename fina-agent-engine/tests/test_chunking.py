@@ -0,0 +1,97 @@
+import pickle
+
+from langchain_core.documents import Document
+
+from app.core.settings import settings
+from app.service.chunking import (
+    CharacterChunker,
+    TokenAwareChunker,
+    build_chunker,
+    chunking_baseline,
+    split_blocks,
+)
+
+FILING = """ITEM 7. MANAGEMENT'S DISCUSSION AND ANALYSIS
+Revenue grew 12% year over year, driven by subscription sales.
+Operating margin improved as costs were held flat.
+
+Segment 2024 2023 Change
+Cloud 1,200 1,050 14%
+Hardware 300 320 (6%)
+
+RISK FACTORS
+Interest rates may rise further. Currency moves could reduce reported revenue."""
+
+
+def test_split_blocks_detects_structure():
+    kinds = [kind for kind, _ in split_blocks(FILING)]
+    assert kinds == ["heading", "paragraph", "table", "heading", "paragraph"]
+
+
+def test_headings_start_new_chunks_and_keep_section():
+    chunks = TokenAwareChunker(max_tokens=256).split_text(FILING)
+
+    assert [c["section"] for c in chunks] == [
+        "ITEM 7. MANAGEMENT'S DISCUSSION AND ANALYSIS", "RISK FACTORS"
+    ]
+    assert chunks[0]["table"] is True
+    assert "Cloud 1,200 1,050 14%\nHardware" in chunks[0]["text"]
+    assert chunks[1]["text"].startswith("RISK FACTORS")
+
+
+def test_chunks_fit_the_token_budget():
+    chunker = TokenAwareChunker(max_tokens=40, overlap_tokens=16)
+    text = " ".join(f"Sentence number {i} describes quarterly results." for i in range(40))
+
+    chunks = chunker.split_text(text)
+
+    assert len(chunks) > 1
+    assert all(chunker.count_tokens(c["text"]) <= chunker.budget for c in chunks)
+    # Overlap carries the last sentence of a chunk into the next one
+    last_sentence = chunks[0]["text"].rsplit(". ", 1)[-1]
+    assert chunks[1]["text"].startswith(last_sentence)
+
+
+def test_oversized_sentence_is_cut_on_token_spans():
+    chunker = TokenAwareChunker(max_tokens=12, overlap_tokens=0)
+    chunks = chunker.split_text(" ".join(["word"] * 50))
+
+    assert all(c["tokens"] <= 10 for c in chunks)
+    assert sum(c["text"].count("word") for c in chunks) == 50
+
+
+def test_split_pages_never_cross_pages():
+    pages = [
+        Document(page_content="Revenue grew.", metadata={"page": 0}),
+        Document(page_content="Costs fell.", metadata={"page": 1}),
+    ]
+    chunker = TokenAwareChunker()
+    docs = chunker.split_pages(pages)
+
+    assert [(d.page_content, d.metadata["page"]) for d in docs] == [
+        ("Revenue grew.", 0), ("Costs fell.", 1)
+    ]
+    assert docs[0].metadata["tokens"] == chunker.count_tokens("Revenue grew.")
+
+
+def test_baseline_reports_savings_against_character_splitter():
+    text = "\n\n".join(
+        " ".join(f"Paragraph {p} sentence {i} about net income." for i in range(6))
+        for p in range(40)
+    )
+    pages = [Document(page_content=text, metadata={"page": 0})]
+    chunker = TokenAwareChunker()
+
+    baseline, truncated = chunking_baseline(pages, chunker)
+
+    assert len(chunker.split_pages(pages)) < baseline
+    assert truncated == 0
+    assert baseline == len(CharacterChunker().split_pages(pages))
+
+
+def test_chunkers_are_picklable_and_configurable(monkeypatch):
+    chunker = pickle.loads(pickle.dumps(TokenAwareChunker(max_tokens=128)))
+    assert chunker.budget == 126
+
+    monkeypatch.setattr(settings, "CHUNKING_STRATEGY", "character")
+    assert isinstance(build_chunker(), CharacterChunker)
@@ -0,0 +1,70 @@
+from langchain_core.documents import Document
+
+from app.service.context_builder import (
+    ELISION,
+    build_context,
+    estimate_tokens,
+    select_candidates,
+    split_sentences,
+    usage_from_report,
+)
+
+
+def doc(text):
+    return Document(page_content=text)
+
+
+def test_split_sentences_keeps_figures_and_rows():
+    assert split_sentences("Revenue was 3.85 billion. Costs fell!\nQ1 | 10 | 12") == [
+        "Revenue was 3.85 billion.", "Costs fell!", "Q1 | 10 | 12"
+    ]
+
+
+def test_select_candidates_is_adaptive():
+    scored = [(doc("a"), 1.0), (doc("b"), 0.6), (doc("c"), 0.2)]
+    assert [d.page_content for d, _ in select_candidates(scored, threshold=0.5)] == ["a", "b"]
+    assert len(select_candidates([(doc("a"), 1.0), (doc("b"), 0.1)], threshold=0.5, min_k=2)) == 2
+
+
+def test_overlapping_chunks_are_deduplicated():
+    first = doc("Margins improved in Q3. Liquidity risk rose on new debt.")
+    second = doc("risk rose on new debt. Liquidity risk is covered by a credit line.")
+
+    text, report = build_context("liquidity risk", [(first, 1.0), (second, 0.9)], window=0)
+
+    assert text.count("risk rose on new debt") == 1
+    assert "credit line" in text
+    assert report["duplicate_sentences"] == 1
+    assert report["chunks_used"] == 2
+
+
+def test_chunks_are_trimmed_around_query_matches():
+    before = " ".join(f"Unrelated sentence number {i}." for i in range(20))
+    after = " ".join(f"Trailing sentence number {i}." for i in range(20))
+    chunk = doc(f"{before} The coupon of ISIN US037833DX59 is 3.85%. {after}")
+
+    text, report = build_context("US037833DX59 coupon", [(chunk, 1.0)], window=1)
+
+    assert "The coupon of ISIN US037833DX59 is 3.85%." in text
+    assert text == "Unrelated sentence number 19. The coupon of ISIN US037833DX59 is 3.85%. Trailing sentence number 0."
+    assert report["context_tokens"] < report["baseline_tokens"]
+    assert report["context_tokens_saved"] == report["baseline_tokens"] - report["context_tokens"]
+
+
+def test_context_respects_token_budget():
+    chunks = [(doc(f"Risk factor {i} concerns supply contracts and pricing."), 1.0) for i in range(30)]
+
+    text, report = build_context("risk supply", chunks, budget=60)
+
+    assert report["context_tokens"] <= 60
+    assert 0 < report["chunks_used"] < 30
+
+
+def test_gaps_are_marked_and_usage_is_reported():
+    chunk = doc("Risk one. Filler a. Filler b. Filler c. Risk two.")
+    text, report = build_context("risk", [(chunk, 1.0)], window=0)
+    assert text == f"Risk one.{ELISION}Risk two."
+
+    usage = usage_from_report(report)
+    assert usage["context_tokens"] == estimate_tokens(text)
+    assert usage_from_report(None) == {}
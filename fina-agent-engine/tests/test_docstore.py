@@ -0,0 +1,60 @@
+import pytest
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+
+from app.core.exceptions import IngestionError
+from app.service.docstore import load_docstore, open_docstore, write_docstore
+
+
+def _write(path, count=3):
+    docstore = InMemoryDocstore({
+        f"id-{i}": Document(page_content=f"chunk {i}", metadata={"page": i, "file_hash": "abc"})
+        for i in range(count)
+    })
+    write_docstore(str(path), {i: f"id-{i}" for i in range(count)}, docstore)
+
+
+def test_open_docstore_reads_lazily(tmp_path):
+    path = tmp_path / "docstore.sqlite"
+    _write(path)
+
+    docstore, mapping = open_docstore(str(path))
+    assert len(mapping) == 3
+    assert list(mapping) == [0, 1, 2]
+    assert mapping[1] == "id-1"
+    doc = docstore.search("id-2")
+    assert doc.page_content == "chunk 2"
+    assert doc.metadata == {"page": 2, "file_hash": "abc"}
+    assert docstore.search("missing") == "ID missing not found."
+
+
+def test_position_map_many_batches(tmp_path):
+    path = tmp_path / "docstore.sqlite"
+    _write(path, count=1200)
+
+    _, mapping = open_docstore(str(path))
+    positions = [1100, 3, 600]
+    assert mapping.many(positions) == ["id-1100", "id-3", "id-600"]
+
+
+def test_metadata_rows_and_load_docstore(tmp_path):
+    path = tmp_path / "docstore.sqlite"
+    _write(path)
+
+    docstore, _ = open_docstore(str(path))
+    rows = {position: (doc_id, metadata) for position, doc_id, metadata in docstore.metadata_rows()}
+    assert rows[0] == ("id-0", {"page": 0, "file_hash": "abc"})
+
+    memory, mapping = load_docstore(str(path))
+    assert isinstance(memory, InMemoryDocstore)
+    assert mapping == {0: "id-0", 1: "id-1", 2: "id-2"}
+    assert memory.search("id-0").page_content == "chunk 0"
+
+
+def test_write_docstore_rejects_missing_chunks(tmp_path):
+    path = tmp_path / "docstore.sqlite"
+    docstore = InMemoryDocstore({"id-0": Document(page_content="chunk 0")})
+
+    with pytest.raises(IngestionError, match="id-1 at position 1"):
+        write_docstore(str(path), {0: "id-0", 1: "id-1"}, docstore)
+    assert not path.exists()
@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.service.embedding_cache import CachedEmbeddings, EmbeddingCache, text_key
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    texts: list = []
+
+    def embed_documents(self, texts):
+        self.texts = self.texts + list(texts)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.texts = self.texts + [text]
+        return super().embed_query(text)
+
+
+def _cached(tmp_path, lru_size=100):
+    inner = CountingEmbedding(size=4)
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), lru_size=lru_size)
+    return inner, cache, CachedEmbeddings(inner, "test-model", cache)
+
+
+def test_text_key_normalizes_whitespace():
+    assert text_key("EBITDA  2023\n") == text_key("EBITDA 2023")
+    assert text_key("EBITDA 2023") != text_key("EBITDA 2024")
+
+
+def test_embed_documents_only_computes_misses(tmp_path):
+    inner, cache, embeddings = _cached(tmp_path)
+
+    first = embeddings.embed_documents(["a", "b", "a"])
+    second = embeddings.embed_documents(["b", "c"])
+
+    assert inner.texts == ["a", "b", "c"]
+    assert first[0] == first[2]
+    assert second[0] == first[1]
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 3
+
+
+def test_vectors_persist_across_instances(tmp_path):
+    _, cache, embeddings = _cached(tmp_path)
+    vector = embeddings.embed_query("net income")
+    cache.close()
+
+    inner, reopened, embeddings = _cached(tmp_path)
+    assert embeddings.embed_query("net income") == pytest.approx(vector, abs=1e-6)
+    assert inner.texts == []
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_lru_is_bounded(tmp_path):
+    _, cache, embeddings = _cached(tmp_path, lru_size=2)
+    embeddings.embed_documents(["a", "b", "c"])
+    assert cache.stats()["lru_entries"] == 2
+
+
+def test_model_name_is_part_of_the_key(tmp_path):
+    inner, cache, embeddings = _cached(tmp_path)
+    embeddings.embed_query("revenue")
+    other = CachedEmbeddings(inner, "other-model", cache)
+    other.embed_query("revenue")
+    assert inner.texts == ["revenue", "revenue"]
+
+
+@pytest.mark.asyncio
+async def test_async_paths_use_cache(tmp_path):
+    inner, cache, embeddings = _cached(tmp_path)
+    await embeddings.aembed_documents(["x", "y"])
+    await embeddings.aembed_query("x")
+    assert inner.texts == ["x", "y"]
+
+
+@pytest.mark.asyncio
+async def test_async_paths_keep_sqlite_off_the_event_loop(tmp_path, monkeypatch):
+    _, cache, embeddings = _cached(tmp_path)
+    threads = []
+    for name in ("get_many", "put_many"):
+        method = getattr(cache, name)
+
+        def recording(*args, _method=method):
+            threads.append(threading.get_ident())
+            return _method(*args)
+
+        monkeypatch.setattr(cache, name, recording)
+
+    await embeddings.aembed_documents(["x", "y"])
+    await embeddings.aembed_query("z")
+    assert len(threads) == 4
+    assert threading.get_ident() not in threads
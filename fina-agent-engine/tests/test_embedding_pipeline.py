@@ -0,0 +1,127 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.service.embedding_pipeline import EmbeddingPipeline, is_retryable
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = MagicMock(status_code=status_code, headers=headers or {})
+
+
+class FakeEmbeddingServer(DeterministicFakeEmbedding):
+    """In-process stand-in for the embedding endpoint.
+
+    Fails the first `failures` requests with `status`, tracks concurrency.
+    """
+    failures: int = 0
+    status: int = 429
+    requests: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+
+    async def aembed_documents(self, texts):
+        self.requests += 1
+        if self.failures > 0:
+            self.failures -= 1
+            raise HTTPError(self.status)
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return self.embed_documents(texts)
+
+
+def test_is_retryable():
+    assert is_retryable(HTTPError(429))
+    assert is_retryable(HTTPError(503))
+    assert not is_retryable(HTTPError(400))
+    assert not is_retryable(ValueError("bad input"))
+
+
+@pytest.mark.asyncio
+async def test_embed_batches_in_order_with_bounded_parallelism():
+    server = FakeEmbeddingServer(size=4)
+    pipeline = EmbeddingPipeline(server, batch_size=3, max_in_flight=2)
+    texts = [f"chunk {i}" for i in range(10)]
+
+    vectors = await pipeline.embed(texts)
+
+    assert vectors == server.embed_documents(texts)
+    assert server.requests == 4
+    assert server.peak_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_embed_retries_transient_errors():
+    server = FakeEmbeddingServer(size=4, failures=2, status=503)
+    pipeline = EmbeddingPipeline(server, batch_size=10, max_retries=3, base_delay=0.001)
+
+    vectors = await pipeline.embed(["a", "b"])
+
+    assert len(vectors) == 2
+    assert server.requests == 3
+
+
+@pytest.mark.asyncio
+async def test_embed_gives_up_after_max_retries():
+    server = FakeEmbeddingServer(size=4, failures=5, status=429)
+    pipeline = EmbeddingPipeline(server, batch_size=10, max_retries=2, base_delay=0.001)
+
+    with pytest.raises(HTTPError):
+        await pipeline.embed(["a"])
+    assert server.requests == 3
+
+
+@pytest.mark.asyncio
+async def test_embed_does_not_retry_client_errors():
+    server = FakeEmbeddingServer(size=4, failures=1, status=400)
+    pipeline = EmbeddingPipeline(server, max_retries=3, base_delay=0.001)
+
+    with pytest.raises(HTTPError):
+        await pipeline.embed(["a"])
+    assert server.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_embed_honours_retry_after():
+    pipeline = EmbeddingPipeline(FakeEmbeddingServer(size=4), max_delay=5.0)
+    assert pipeline._backoff(0, HTTPError(429, {"Retry-After": "2"})) == 2.0
+
+
+@pytest.mark.asyncio
+async def test_embed_reports_progress():
+    progress = []
+    pipeline = EmbeddingPipeline(
+        FakeEmbeddingServer(size=4), batch_size=2, max_in_flight=1,
+        progress=lambda done, total: progress.append((done, total))
+    )
+    await pipeline.embed(["a", "b", "c"])
+    assert progress == [(2, 3), (3, 3)]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_embed_calls_share_in_flight_limit():
+    server = FakeEmbeddingServer(size=4)
+    pipeline = EmbeddingPipeline(server, batch_size=1, max_in_flight=2)
+
+    await asyncio.gather(pipeline.embed(["a", "b", "c"]), pipeline.embed(["d", "e", "f"]))
+
+    assert server.peak_in_flight == 2
+    assert pipeline.embedded == pipeline.submitted == 6
+
+
+@pytest.mark.asyncio
+async def test_default_pipelines_share_the_process_limit(monkeypatch):
+    from app.service import embedding_pipeline
+    monkeypatch.setattr(embedding_pipeline, "embedding_slots", asyncio.Semaphore(2))
+    server = FakeEmbeddingServer(size=4)
+    # One pipeline per ingestion job
+    first, second = EmbeddingPipeline(server, batch_size=1), EmbeddingPipeline(server, batch_size=1)
+
+    await asyncio.gather(first.embed(["a", "b", "c"]), second.embed(["d", "e", "f"]))
+
+    assert server.peak_in_flight == 2
@@ -0,0 +1,77 @@
+"""Offline check of hybrid retrieval on exact-identifier questions.
+
+Low-dimensional feature hashing blurs identifiers the way dense models
+do: near-identical pages that differ only in an ISIN, note or contract
+number land close together. BM25 keeps the exact token, so reciprocal
+rank fusion must rank the right page first where dense search does not.
+"""
+
+import pytest
+
+from app.core.settings import settings
+from app.service.ingestion_service import IngestionService
+from app.service.pdf_parser import PDFParser
+from app.service.query_batcher import QueryBatcher
+from app.service.vector_store import VectorIndexHolder
+from benchmarks.retrieval import HashingEmbeddings
+
+# (page, question quoting the identifier only that page carries)
+TARGETS = [
+    ("Apple bond ISIN US037833DX59 pays a 3.85% coupon.", "What coupon does ISIN US037833DX59 pay?"),
+    ("NVDA 10-Q note 14B: EBITDA 2023 reached 4.1 billion USD.", "What does note 14B of the NVDA 10-Q report?"),
+    ("TSLA risk factor 1A.7: lithium supply contracts expire in Q2 2025.", "What does TSLA risk factor 1A.7 say?"),
+    ("Portfolio guideline 4.2: single-issuer exposure stays below 7.5% of NAV.", "What does portfolio guideline 4.2 limit?"),
+    ("MSFT contract MS-2291-K: Azure commitment of 1.2 billion through 2026.", "What is in MSFT contract MS-2291-K?"),
+]
+
+
+def distractor_pages(count: int = 8) -> list[str]:
+    """Pages phrased like the targets but with other identifiers and figures."""
+    pages = []
+    for i in range(count):
+        pages += [
+            f"Apple bond ISIN US037833D{i}{i + 1}{i} pays a {3 + i / 10:.2f}% coupon.",
+            f"NVDA 10-Q note {i + 1}{'ACD'[i % 3]}: EBITDA 2023 reached {i + 2}.0 billion USD.",
+            f"TSLA risk factor 1A.{i + 1 if i != 6 else 9}: lithium supply contracts expire in Q{i % 4 + 1} 2026.",
+            f"Portfolio guideline {i + 5}.{i % 3}: single-issuer exposure stays below {i + 2}% of NAV.",
+            f"MSFT contract MS-{3000 + i}-K: Azure commitment of {i + 2}.0 billion through 2027.",
+        ]
+    return pages
+
+
+class InlineParser(PDFParser):
+    """Runs parsing inline so the check doesn't start worker processes."""
+
+    async def _run(self, fn, *args):
+        return fn(*args)
+
+
+async def target_ranks(service: IngestionService, mode: str, monkeypatch) -> list:
+    """Rank of each question's page in the top 10, None if missing."""
+    monkeypatch.setattr(settings, "RETRIEVAL_MODE", mode)
+    loaded = await service.vector_index.get_loaded(service.embeddings)
+    ranks = []
+    for page, (_, question) in enumerate(TARGETS):
+        results = await service._search(loaded, question, 10)
+        pages = [doc.metadata["page"] for doc, _ in results]
+        ranks.append(pages.index(page) + 1 if page in pages else None)
+    return ranks
+
+
+@pytest.mark.asyncio
+async def test_hybrid_ranks_exact_identifiers_above_dense(make_pdf, tmp_path, monkeypatch):
+    # The distractors are near-duplicates on purpose; keep them all indexed
+    monkeypatch.setattr(settings, "NEAR_DUPLICATE_DEDUP", False)
+    service = IngestionService(
+        index_holder=VectorIndexHolder(str(tmp_path / "vector_db")),
+        parser=InlineParser(pages_per_task=50),
+        batcher=QueryBatcher(window_ms=0),
+    )
+    service.embeddings = HashingEmbeddings(32)
+    await service.process_pdf(make_pdf("filings.pdf", [page for page, _ in TARGETS] + distractor_pages()))
+
+    dense = await target_ranks(service, "dense", monkeypatch)
+    hybrid = await target_ranks(service, "hybrid", monkeypatch)
+
+    assert hybrid == [1] * len(TARGETS)
+    assert sum(rank == 1 for rank in hybrid) > sum(rank == 1 for rank in dense)
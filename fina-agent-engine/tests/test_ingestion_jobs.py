@@ -0,0 +1,185 @@
+import asyncio
+import json
+import os
+import pytest
+
+from app.schemas.responses import IngestionResponse
+from app.service.ingestion_jobs import IngestionJobManager
+from app.service.ingestion_service import IngestionProgress
+
+
+class FakeService:
+    """Stands in for IngestionService, reporting progress before finishing."""
+
+    def __init__(self, gate: asyncio.Event = None, fail: bool = False):
+        self.gate = gate
+        self.fail = fail
+        self.metadata = {}
+
+    async def process_pdf(self, file_path, filename=None, progress=None, file_hash=None, **metadata):
+        self.metadata = metadata
+        counters = IngestionProgress()
+        counters.pages_total, counters.pages_parsed = 4, 2
+        counters.chunks_parsed, counters.chunks_embedded = 10, 5
+        progress(counters)
+        if self.gate:
+            await self.gate.wait()
+        if self.fail:
+            raise RuntimeError("embedding endpoint down")
+        return IngestionResponse(
+            status="success", filename=filename, file_hash=file_hash,
+            chunks_processed=10, storage_mode="test"
+        )
+
+
+def _upload(tmp_path, name="upload.pdf"):
+    path = tmp_path / name
+    path.write_bytes(b"%PDF-1.4")
+    return str(path)
+
+
+async def _wait_for(manager, job_id, status):
+    for _ in range(200):
+        job = await manager.get(job_id)
+        if job["status"] == status:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job never reached {status}")
+
+
+@pytest.mark.asyncio
+async def test_job_runs_to_completion(tmp_path):
+    manager = IngestionJobManager(str(tmp_path / "jobs.sqlite"), workers=1)
+    service = FakeService()
+    await manager.start(service)
+    try:
+        path = _upload(tmp_path)
+        job = await manager.submit(
+            path, "report.pdf", file_hash="abc", issuer="NVDA", report_date="2024-09-30", tenant="org_1"
+        )
+        assert job["status"] == "queued"
+
+        done = await _wait_for(manager, job["job_id"], "succeeded")
+    finally:
+        await manager.stop()
+
+    assert done["chunks_processed"] == 10
+    assert done["chunks_embedded"] == 5
+    assert done["issuer"] == "NVDA"
+    assert done["tenant"] == "org_1"
+    assert service.metadata == {"issuer": "NVDA", "report_date": "2024-09-30", "tenant": "org_1"}
+    assert not os.path.exists(path)
+
+
+@pytest.mark.asyncio
+async def test_running_job_reports_progress_and_eta(tmp_path):
+    gate = asyncio.Event()
+    manager = IngestionJobManager(str(tmp_path / "jobs.sqlite"), workers=1)
+    await manager.start(FakeService(gate))
+    try:
+        job = await manager.submit(_upload(tmp_path), "report.pdf")
+        running = await _wait_for(manager, job["job_id"], "running")
+        assert running["pages_parsed"] == 2
+        assert running["chunks_embedded"] == 5
+        assert running["eta_seconds"] is not None
+        gate.set()
+        await _wait_for(manager, job["job_id"], "succeeded")
+    finally:
+        await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_job_records_error(tmp_path):
+    manager = IngestionJobManager(str(tmp_path / "jobs.sqlite"), workers=1)
+    await manager.start(FakeService(fail=True))
+    try:
+        job = await manager.submit(_upload(tmp_path), "report.pdf")
+        failed = await _wait_for(manager, job["job_id"], "failed")
+    finally:
+        await manager.stop()
+    assert "embedding endpoint down" in failed["error"]
+
+
+@pytest.mark.asyncio
+async def test_unfinished_jobs_survive_restart(tmp_path):
+    db = str(tmp_path / "jobs.sqlite")
+    gate = asyncio.Event()
+    manager = IngestionJobManager(db, workers=1)
+    await manager.start(FakeService(gate))
+    kept = await manager.submit(_upload(tmp_path, "kept.pdf"), "kept.pdf")
+    await _wait_for(manager, kept["job_id"], "running")
+    lost_path = _upload(tmp_path, "lost.pdf")
+    lost = await manager.submit(lost_path, "lost.pdf")
+    await manager.stop()
+    os.remove(lost_path)
+
+    restarted = IngestionJobManager(db, workers=1)
+    await restarted.start(FakeService())
+    try:
+        assert (await _wait_for(restarted, kept["job_id"], "succeeded"))["chunks_processed"] == 10
+        assert (await restarted.get(lost["job_id"]))["status"] == "failed"
+    finally:
+        await restarted.stop()
+
+
+@pytest.mark.asyncio
+async def test_restart_while_busy_requeues_every_job(tmp_path):
+    db = str(tmp_path / "jobs.sqlite")
+    manager = IngestionJobManager(db, workers=1, queue_size=2)
+    await manager.start(FakeService(asyncio.Event()))
+    first = await manager.submit(_upload(tmp_path, "first.pdf"), "first.pdf")
+    await _wait_for(manager, first["job_id"], "running")
+    others = [await manager.submit(_upload(tmp_path, f"{n}.pdf"), f"{n}.pdf") for n in ("second", "third")]
+    await manager.stop()
+
+    # One running job plus a full queue: all three come back
+    restarted = IngestionJobManager(db, workers=1, queue_size=2)
+    await restarted.start(FakeService())
+    try:
+        for job in (first, *others):
+            assert (await _wait_for(restarted, job["job_id"], "succeeded"))["chunks_processed"] == 10
+    finally:
+        await restarted.stop()
+
+
+@pytest.mark.asyncio
+async def test_racing_submits_cannot_overfill_the_queue(tmp_path):
+    from app.core.exceptions import IngestionQueueFullError
+    manager = IngestionJobManager(str(tmp_path / "jobs.sqlite"), workers=1, queue_size=1)
+    await manager.start(FakeService(asyncio.Event()))
+    try:
+        running = await manager.submit(_upload(tmp_path, "running.pdf"), "running.pdf")
+        await _wait_for(manager, running["job_id"], "running")
+
+        results = await asyncio.gather(
+            manager.submit(_upload(tmp_path, "a.pdf"), "a.pdf"),
+            manager.submit(_upload(tmp_path, "b.pdf"), "b.pdf"),
+            return_exceptions=True,
+        )
+        assert sum(isinstance(r, IngestionQueueFullError) for r in results) == 1
+        async with manager._db.execute("SELECT COUNT(*) FROM ingestion_jobs WHERE status = 'queued'") as cursor:
+            assert (await cursor.fetchone())[0] == 1
+    finally:
+        await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_events_stream_until_finished(tmp_path, monkeypatch):
+    from app.core.settings import settings
+    monkeypatch.setattr(settings, "INGESTION_PROGRESS_INTERVAL", 0.01)
+    manager = IngestionJobManager(str(tmp_path / "jobs.sqlite"), workers=1)
+    await manager.start(FakeService())
+    try:
+        job = await manager.submit(_upload(tmp_path), "report.pdf")
+        events = [json.loads(e[len("data: "):]) async for e in manager.events(job["job_id"])]
+    finally:
+        await manager.stop()
+    assert events[-1]["job"]["status"] == "succeeded"
+
+
+@pytest.mark.asyncio
+async def test_submit_requires_started_manager(tmp_path):
+    from app.core.exceptions import IngestionError
+    manager = IngestionJobManager(str(tmp_path / "jobs.sqlite"))
+    with pytest.raises(IngestionError):
+        await manager.submit(_upload(tmp_path), "report.pdf")
@@ -1,7 +1,45 @@
+import asyncio
+
+import faiss
 import pytest
 import os
 from unittest.mock import AsyncMock, MagicMock, patch
 from app.service.ingestion_service import IngestionService
+from app.service.pdf_parser import PDFParser
+from app.service.query_batcher import QueryBatcher
+from app.service.vector_store import VectorIndexHolder, current_snapshot, read_registry
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from app.core.exceptions import DocumentNotFoundError
+from app.core.settings import settings
+from app.schemas.agent_schemas import DocumentFilter
+from app.service.ann_index import read_report
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return super().embed_documents(texts)
+
+
+class FakeParser(PDFParser):
+    """Runs parsing inline so service tests don't start worker processes."""
+
+    async def _run(self, fn, *args):
+        return fn(*args)
+
+
+@pytest.fixture
+def fake_service(tmp_path):
+    service = IngestionService(
+        index_holder=VectorIndexHolder(str(tmp_path / "vector_db")),
+        parser=FakeParser(pages_per_task=1),
+    )
+    service.embeddings = CountingEmbedding(size=8)
+    return service
 
 @pytest.mark.asyncio
 async def test_calculate_hash(tmp_path):
@@ -20,51 +58,328 @@ async def test_process_pdf_failure():
         await service.process_pdf("non_existent.pdf")
 
 @pytest.mark.asyncio
-async def test_process_pdf_success(tmp_path):
-    pdf = tmp_path / "test.pdf"
-    pdf.write_text("%PDF-1.4 test")
+async def test_process_pdf_success(tmp_path, make_pdf):
+    pdf = make_pdf("test.pdf", ["text"])
     
-    service = IngestionService()
+    holder = VectorIndexHolder(str(tmp_path / "vector_db"))
+    service = IngestionService(index_holder=holder, parser=FakeParser())
+    service.embeddings = DeterministicFakeEmbedding(size=8)
     
-    with patch("app.service.ingestion_service.PyPDFLoader") as mock_loader:
-        # Simulate loading documents
-        mock_loader.return_value.load.return_value = [MagicMock(page_content="text")]
-        # Mock RecursiveCharacterTextSplitter
-        with patch("app.service.ingestion_service.RecursiveCharacterTextSplitter") as mock_splitter:
-            mock_splitter.return_value.split_documents.return_value = [MagicMock(page_content="chunk1")]
-            # Mock FAISS
-            with patch("app.service.ingestion_service.FAISS") as mock_faiss:
-                mock_faiss.from_documents.return_value = MagicMock()
-                
-                chunks = await service.process_pdf(str(pdf))
-                assert chunks == 1
-                mock_faiss.from_documents.assert_called_once()
-
-@pytest.mark.asyncio
-async def test_search_in_vector_db_success():
-    service = IngestionService()
-    with patch("os.path.exists", return_value=True):
-        with patch("app.service.ingestion_service.FAISS.load_local") as mock_load:
-            mock_db = MagicMock()
-            mock_db.similarity_search.return_value = [MagicMock(page_content="found text")]
-            mock_load.return_value = mock_db
-            
-            result = await service.search_in_vector_db("query")
-            assert "found text" in result
+    # Mock FAISS
+    with patch("app.service.ingestion_service.FAISS") as mock_faiss:
+        mock_faiss.from_embeddings.return_value = MagicMock(index=faiss.IndexFlatL2(8))
+        
+        result = await service.process_pdf(pdf)
+        assert result.chunks_processed == 1
+        assert result.status == "success"
+        mock_faiss.from_embeddings.assert_called_once()
+        # The freshly built index is published without a reload
+        assert holder.stats()["loaded"] is True
 
 @pytest.mark.asyncio
-async def test_search_in_vector_db_failure():
-    service = IngestionService()
-    with patch("os.path.exists", return_value=True):
-        with patch("app.service.ingestion_service.FAISS.load_local", side_effect=Exception("Load fail")):
-            from app.core.exceptions import IngestionError
-            with pytest.raises(IngestionError):
-                await service.search_in_vector_db("query")
+async def test_search_in_vector_db_success(tmp_path):
+    holder = VectorIndexHolder(str(tmp_path))
+    service = IngestionService(index_holder=holder)
+    service.embeddings = DeterministicFakeEmbedding(size=8)
+    with patch("app.service.vector_store.load_store") as mock_load:
+        (tmp_path / "index.faiss").write_bytes(b"")
+        mock_load.return_value = FAISS.from_texts(["found text"], service.embeddings)
+        
+        result = await service.search_in_vector_db("query")
+        assert "found text" in result
+
+        # Second search is served from the resident index
+        await service.search_in_vector_db("query")
+        mock_load.assert_called_once()
 
 @pytest.mark.asyncio
-async def test_search_no_db():
-    service = IngestionService()
-    with patch("os.path.exists", return_value=False):
-        with pytest.raises(Exception) as exc:
+async def test_search_in_vector_db_failure(tmp_path):
+    holder = VectorIndexHolder(str(tmp_path))
+    service = IngestionService(index_holder=holder)
+    (tmp_path / "index.faiss").write_bytes(b"")
+    with patch("app.service.vector_store.load_store", side_effect=Exception("Load fail")):
+        from app.core.exceptions import IngestionError
+        with pytest.raises(IngestionError):
             await service.search_in_vector_db("query")
-        assert "No documents uploaded" in str(exc.value)
+
+@pytest.mark.asyncio
+async def test_search_no_db(tmp_path):
+    holder = VectorIndexHolder(str(tmp_path / "missing"))
+    service = IngestionService(index_holder=holder)
+    with pytest.raises(Exception) as exc:
+        await service.search_in_vector_db("query")
+    assert "No documents uploaded" in str(exc.value)
+
+@pytest.mark.asyncio
+async def test_process_pdf_appends_and_skips_duplicates(fake_service, make_pdf):
+    service = fake_service
+    first = make_pdf("a.pdf", ["report A"])
+    second = make_pdf("b.pdf", ["report B"])
+
+    await service.process_pdf(first, filename="a.pdf")
+    await service.process_pdf(second, filename="b.pdf")
+
+    store = await service.vector_index.get(service.embeddings)
+    assert store.index.ntotal == 2
+    assert len(read_registry(current_snapshot(service.db_path))) == 2
+
+    calls_before = service.embeddings.calls
+    result = await service.process_pdf(first, filename="a.pdf")
+
+    assert result.status == "skipped"
+    assert result.chunks_processed == 0
+    assert service.embeddings.calls == calls_before
+    assert store.index.ntotal == 2
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicate_ingests_skip_after_first(fake_service, make_pdf):
+    service = fake_service
+    await service.process_pdf(make_pdf("seed.pdf", ["seed report"]), filename="seed.pdf")
+    pdf = make_pdf("a.pdf", ["report A"])
+
+    results = await asyncio.gather(
+        service.process_pdf(pdf, filename="a.pdf"),
+        service.process_pdf(pdf, filename="a.pdf"),
+    )
+
+    assert sorted(result.status for result in results) == ["skipped", "success"]
+    store = await service.vector_index.get(service.embeddings)
+    assert store.index.ntotal == 2
+    assert len(read_registry(current_snapshot(service.db_path))) == 2
+
+@pytest.mark.asyncio
+async def test_delete_document_removes_vectors(fake_service, make_pdf):
+    service = fake_service
+    kept = await service.process_pdf(make_pdf("a.pdf", ["report A"]), filename="a.pdf")
+    removed = await service.process_pdf(make_pdf("b.pdf", ["report B"]), filename="b.pdf")
+
+    deleted = await service.delete_document(removed.file_hash)
+
+    assert deleted == 1
+    store = await service.vector_index.get(service.embeddings)
+    assert store.index.ntotal == 1
+    assert list(read_registry(current_snapshot(service.db_path))) == [kept.file_hash]
+
+@pytest.mark.asyncio
+async def test_hnsw_index_is_built_and_survives_deletes(fake_service, make_pdf, monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_INDEX_FACTORY", "HNSW32")
+    service = fake_service
+    kept = await service.process_pdf(make_pdf("a.pdf", ["report A"]), filename="a.pdf")
+    removed = await service.process_pdf(make_pdf("b.pdf", ["report B"]), filename="b.pdf")
+
+    await service.delete_document(removed.file_hash)
+
+    service.vector_index._current = None  # force a reload from disk
+    store = await service.vector_index.get(service.embeddings)
+    assert isinstance(store.index, faiss.IndexHNSWFlat)
+    assert store.index.ntotal == 1
+    assert read_report(current_snapshot(service.db_path))["factory"] == "HNSW32"
+    assert service.vector_index.stats()["search_params"] == {"efSearch": settings.ANN_EF_SEARCH}
+    assert await service.search_in_vector_db("report", k=1) == "report A"
+    assert list(read_registry(current_snapshot(service.db_path))) == [kept.file_hash]
+
+@pytest.mark.asyncio
+async def test_ingest_keeps_searches_on_their_snapshot(fake_service, make_pdf, monkeypatch):
+    monkeypatch.setattr(settings, "SNAPSHOT_GC_GRACE_SECONDS", 0)
+    service = fake_service
+    await service.process_pdf(make_pdf("a.pdf", ["report A"]), filename="a.pdf")
+    before = await service.vector_index.get_loaded(service.embeddings)
+
+    await service.process_pdf(make_pdf("b.pdf", ["report B"]), filename="b.pdf")
+
+    snapshots = os.listdir(os.path.join(service.db_path, "snapshots"))
+    assert before.store.index.ntotal == 1
+    assert os.path.isdir(before.path) and len(snapshots) == 2
+
+    del before
+    await service.delete_document(read_registry_hash(service, None))
+    assert os.listdir(os.path.join(service.db_path, "snapshots")) == [
+        os.path.basename(current_snapshot(service.db_path))
+    ]
+
+BOILERPLATE = (
+    "This report contains forward-looking statements that involve risks and uncertainties. "
+    "Actual results may differ materially from those projected due to market conditions, "
+    "regulatory changes, competition and other factors described in our annual filing."
+)
+
+@pytest.mark.asyncio
+async def test_near_duplicate_chunks_are_linked_not_embedded(fake_service, make_pdf):
+    service = fake_service
+    first = await service.process_pdf(make_pdf("q1.pdf", ["Revenue was 10 billion.", BOILERPLATE]), filename="q1.pdf")
+    second = await service.process_pdf(make_pdf("q2.pdf", ["Revenue was 12 billion.", BOILERPLATE]), filename="q2.pdf")
+
+    assert first.deduplication.near_duplicates == 0
+    assert second.deduplication.near_duplicates == 1
+    assert second.deduplication.embeddings_saved == 1
+    assert second.deduplication.index_bytes_saved == 8 * 4
+    assert second.chunks_processed == 1
+    store = await service.vector_index.get(service.embeddings)
+    assert store.index.ntotal == 3
+
+    registry = read_registry(current_snapshot(service.db_path))
+    assert list(registry[second.file_hash]["linked"].values()) == [f"{first.file_hash}:1:0"]
+
+    # The shared chunk survives deletion of the document it came from
+    assert await service.delete_document(first.file_hash) == 1
+    store = await service.vector_index.get(service.embeddings)
+    assert store.index.ntotal == 2
+    registry = read_registry(current_snapshot(service.db_path))
+    assert f"{first.file_hash}:1:0" in registry[second.file_hash]["ids"]
+    assert registry[second.file_hash]["linked"] == {}
+
+@pytest.mark.asyncio
+async def test_filters_find_a_fully_deduplicated_document(fake_service, make_pdf):
+    service = fake_service
+    first = await service.process_pdf(make_pdf("q1.pdf", ["Revenue was 10 billion.", BOILERPLATE]),
+                                      filename="q1.pdf", issuer="NVDA", report_date="2024-06-30")
+    second = await service.process_pdf(make_pdf("q2.pdf", [BOILERPLATE]),
+                                       filename="q2.pdf", issuer="NVDA", report_date="2024-09-30")
+    assert second.chunks_processed == 0
+    assert second.deduplication.near_duplicates == 1
+
+    by_hash = DocumentFilter(file_hash=second.file_hash, page_end=1)
+    by_date = DocumentFilter(issuer="NVDA", report_date_from="2024-09-01")
+    for filters in (by_hash, by_date):
+        assert await service.search_in_vector_db("risk factors", k=5, filters=filters) == BOILERPLATE
+
+    # Still found once the chunk is adopted from the deleted original
+    await service.delete_document(first.file_hash)
+    adopted = DocumentFilter(file_hash=second.file_hash)
+    assert await service.search_in_vector_db("risk factors", k=5, filters=adopted) == BOILERPLATE
+
+@pytest.mark.asyncio
+async def test_near_duplicate_detection_can_be_disabled(fake_service, make_pdf, monkeypatch):
+    monkeypatch.setattr(settings, "NEAR_DUPLICATE_DEDUP", False)
+    service = fake_service
+    await service.process_pdf(make_pdf("q1.pdf", [BOILERPLATE]), filename="q1.pdf")
+    second = await service.process_pdf(make_pdf("q2.pdf", ["Other text.", BOILERPLATE]), filename="q2.pdf")
+
+    assert second.deduplication.enabled is False
+    assert second.deduplication.near_duplicates == 0
+    assert second.chunks_processed == 2
+
+@pytest.mark.asyncio
+async def test_delete_unknown_document(fake_service):
+    with pytest.raises(DocumentNotFoundError):
+        await fake_service.delete_document("deadbeef")
+
+@pytest.mark.asyncio
+async def test_process_pdf_streams_pages_into_index(fake_service, make_pdf):
+    service = fake_service
+    progress = []
+    service_pdf = make_pdf("a.pdf", ["revenue grew", "risk rose", "outlook stable"])
+
+    result = await service.process_pdf(
+        service_pdf, progress=lambda counters: progress.append(counters.as_dict())
+    )
+
+    assert result.chunks_processed == 3
+    assert progress[-1] == {
+        "pages_total": 3, "pages_parsed": 3, "chunks_parsed": 3, "chunks_embedded": 3
+    }
+    store = await service.vector_index.get(service.embeddings)
+    pages = sorted(d.metadata["page"] for d in store.docstore._dict.values())
+    assert pages == [0, 1, 2]
+    assert result.chunking.strategy == "token"
+    assert result.chunking.baseline_chunks == 3
+    assert result.chunking.vectors_saved == 0
+
+@pytest.mark.asyncio
+async def test_hybrid_search_finds_exact_codes(fake_service, make_pdf, monkeypatch):
+    service = fake_service
+    await service.process_pdf(make_pdf("a.pdf", [
+        "Revenue grew in every segment",
+        "Bond ISIN US037833DX59 pays a 3.85% coupon",
+        "Costs were flat year over year",
+    ]))
+
+    monkeypatch.setattr(settings, "RETRIEVAL_MODE", "hybrid")
+    assert "US037833DX59" in await service.search_in_vector_db("US037833DX59 coupon", k=1)
+
+    # The sparse index is persisted and reloaded alongside FAISS
+    service.vector_index._current = None
+    loaded = await service.vector_index.get_loaded(service.embeddings)
+    assert len(loaded.sparse) == 3
+
+@pytest.mark.asyncio
+async def test_filtered_search_only_reads_matching_documents(fake_service, make_pdf):
+    service = fake_service
+    await service.process_pdf(make_pdf("nvda.pdf", ["NVDA risk rose", "NVDA outlook"]),
+                              filename="nvda.pdf", issuer="NVDA", report_date="2024-09-30")
+    await service.process_pdf(make_pdf("msft.pdf", ["MSFT risk rose", "MSFT outlook"]),
+                              filename="msft.pdf", issuer="MSFT", report_date="2024-09-30")
+
+    result = await service.search_in_vector_db(
+        "risk", k=5, filters=DocumentFilter(issuer="MSFT", page_end=1)
+    )
+    assert result == "MSFT risk rose"
+
+    empty = await service.search_in_vector_db("risk", filters=DocumentFilter(issuer="TSLA"))
+    assert empty == "No documents match the requested filters"
+
+@pytest.mark.asyncio
+async def test_concurrent_searches_share_one_embedding_call(fake_service, make_pdf):
+    service = fake_service
+    service.batcher = QueryBatcher(window_ms=20)
+    await service.process_pdf(make_pdf("a.pdf", ["Revenue grew", "Costs were flat", "Margins improved"]))
+    calls = service.embeddings.calls
+
+    results = await asyncio.gather(*(
+        service.search_in_vector_db(query, k=1) for query in ("Revenue grew", "Costs were flat", "Margins improved")
+    ))
+
+    assert results == ["Revenue grew", "Costs were flat", "Margins improved"]
+    assert service.embeddings.calls == calls + 1
+    assert service.batcher.stats()["max_batch_size"] == 3
+
+@pytest.mark.asyncio
+async def test_compound_question_is_searched_in_one_fan_out(fake_service, make_pdf):
+    service = fake_service
+    service.batcher = QueryBatcher(window_ms=20)
+    await service.process_pdf(make_pdf("aapl.pdf", ["AAPL risk outlook is stable"]), issuer="AAPL")
+    await service.process_pdf(make_pdf("nvda.pdf", ["NVDA risk outlook is elevated"]), issuer="NVDA")
+    calls = service.embeddings.calls
+
+    text, report = await service.retrieve_context("risk outlook for my AAPL and NVDA holdings")
+
+    assert "AAPL risk outlook is stable" in text
+    assert "NVDA risk outlook is elevated" in text
+    assert report["sub_queries"] == 2
+    # Both sub-queries were embedded in the same batch
+    assert service.embeddings.calls == calls + 1
+
+    text, report = await service.retrieve_context("risks", sub_queries=["AAPL risk"])
+    assert "sub_queries" not in report
+
+@pytest.mark.asyncio
+async def test_tenants_only_search_their_own_documents(fake_service, make_pdf):
+    service = fake_service
+    await service.process_pdf(make_pdf("a.pdf", ["Acme liquidity risk"]), tenant="acme")
+    await service.process_pdf(make_pdf("b.pdf", ["Globex liquidity risk"]), tenant="globex")
+
+    assert await service.search_in_vector_db("liquidity risk", tenant="acme") == "Acme liquidity risk"
+    assert await service.search_in_vector_db("liquidity risk", tenant="globex") == "Globex liquidity risk"
+    assert os.path.isdir(os.path.join(service.db_path, "tenants", "acme"))
+    with pytest.raises(Exception, match="No documents uploaded"):
+        await service.search_in_vector_db("liquidity risk", tenant="initech")
+
+    # Deletes only see the caller's store
+    await service.delete_document(read_registry_hash(service, "acme"), tenant="acme")
+    with pytest.raises(DocumentNotFoundError):
+        await service.delete_document(read_registry_hash(service, "globex"), tenant="acme")
+
+
+def read_registry_hash(service, tenant):
+    return next(iter(read_registry(current_snapshot(service.tenants.holder(tenant).db_path))))
+
+
+@pytest.mark.asyncio
+async def test_per_user_tenancy_warns_about_shared_documents(fake_service, make_pdf, monkeypatch, caplog):
+    service = fake_service
+    await service.process_pdf(make_pdf("shared.pdf", ["Legacy shared report"]))
+    monkeypatch.setattr(settings, "VECTOR_TENANCY", "user")
+
+    await service.load_vector_index()
+
+    assert "1 documents in the shared store are not searchable" in caplog.text
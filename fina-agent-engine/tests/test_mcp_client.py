@@ -35,16 +35,17 @@ async def test_fetch_portfolio_success():
     mock_session.call_tool.return_value = mock_result
     
     # Nested async context managers are tricky to mock
-    with patch("app.service.mcp_client.sse_client") as mock_sse:
+    with patch("app.service.mcp_pool.sse_client") as mock_sse:
         # Mocking async context manager __aenter__
         mock_sse.return_value.__aenter__.return_value = (AsyncMock(), AsyncMock())
-        with patch("app.service.mcp_client.ClientSession") as mock_sess_cls:
+        with patch("app.service.mcp_pool.ClientSession") as mock_sess_cls:
             mock_sess_cls.return_value.__aenter__.return_value = mock_session
             
             result = await client.fetch_portfolio("u1")
             assert "BTC" in result
             mock_session.initialize.assert_called_once()
             mock_session.call_tool.assert_called_once_with("fetch_portfolio", arguments={"user_id": "u1"})
+            await client.pool.close()
 
 @pytest.mark.asyncio
 async def test_fetch_portfolio_empty():
@@ -53,18 +54,19 @@ async def test_fetch_portfolio_empty():
     mock_result.content = [] # Empty result
     mock_session = AsyncMock()
     mock_session.call_tool.return_value = mock_result
-    with patch("app.service.mcp_client.sse_client") as mock_sse:
+    with patch("app.service.mcp_pool.sse_client") as mock_sse:
         mock_sse.return_value.__aenter__.return_value = (AsyncMock(), AsyncMock())
-        with patch("app.service.mcp_client.ClientSession") as mock_sess_cls:
+        with patch("app.service.mcp_pool.ClientSession") as mock_sess_cls:
             mock_sess_cls.return_value.__aenter__.return_value = mock_session
             result = await client.fetch_portfolio("u1")
             assert result == "[]"
+            await client.pool.close()
 
 @pytest.mark.asyncio
 async def test_fetch_portfolio_error():
     # Mocking the sse_client context manager is hard, but we can mock the internal flow
     # Since we can't easily mock sse_client without changing code, we test the exception handling
     client = MCPClient()
-    with patch("app.service.mcp_client.sse_client", side_effect=Exception("SSE Fail")):
+    with patch("app.service.mcp_pool.sse_client", side_effect=Exception("SSE Fail")):
         with pytest.raises(MCPConnectionError):
             await client.fetch_portfolio("u1")
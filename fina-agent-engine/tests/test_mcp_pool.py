@@ -0,0 +1,216 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import MagicMock, patch
+
+import anyio
+import pytest
+
+from mcp.types import ResourceUpdatedNotification, ResourceUpdatedNotificationParams, ServerNotification
+
+from app.service.mcp_pool import MCPSessionPool, transport_url
+
+
+class FakeSession:
+    """ClientSession stand-in: counts handshakes and tool calls."""
+
+    instances = []
+
+    def __init__(self, read_stream, write_stream, message_handler=None):
+        self.initialized = 0
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self.fail_next = None
+        self.delay = 0
+        self.subscribed = []
+        FakeSession.instances.append(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def initialize(self):
+        self.initialized += 1
+
+    async def subscribe_resource(self, uri):
+        self.subscribed.append(str(uri))
+
+    async def call_tool(self, name, arguments=None):
+        if self.fail_next is not None:
+            error, self.fail_next = self.fail_next, None
+            raise error
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        result = MagicMock()
+        result.content = [MagicMock(text=f"{name}:{arguments['user_id']}")]
+        return result
+
+
+@asynccontextmanager
+async def fake_sse_client(url):
+    yield (MagicMock(), MagicMock())
+
+
+@pytest.fixture
+def fake_transport():
+    FakeSession.instances = []
+    with patch("app.service.mcp_pool.sse_client", fake_sse_client), \
+            patch("app.service.mcp_pool.ClientSession", FakeSession):
+        yield FakeSession.instances
+
+
+async def test_sessions_are_reused(fake_transport):
+    pool = MCPSessionPool("http://mcp/sse", size=2, max_in_flight=4)
+    await pool.start(warm=1)
+    for user in ("u1", "u2", "u3"):
+        result = await pool.call_tool("fetch_portfolio", {"user_id": user})
+        assert result.content[0].text == f"fetch_portfolio:{user}"
+
+    assert len(fake_transport) == 1
+    assert fake_transport[0].initialized == 1
+    assert fake_transport[0].calls == 3
+    stats = pool.stats()
+    assert stats["connects"] == 1
+    assert stats["calls"] == 3
+    assert stats["sessions"] == 1
+    assert stats["in_flight"] == 0
+    await pool.close()
+    assert pool.stats()["sessions"] == 0
+
+
+async def test_reconnects_when_session_is_lost(fake_transport):
+    pool = MCPSessionPool("http://mcp/sse", size=1, max_in_flight=4)
+    await pool.call_tool("fetch_portfolio", {"user_id": "u1"})
+    fake_transport[0].fail_next = anyio.ClosedResourceError()
+
+    result = await pool.call_tool("fetch_portfolio", {"user_id": "u1"})
+    assert result.content[0].text == "fetch_portfolio:u1"
+    assert len(fake_transport) == 2
+    stats = pool.stats()
+    assert stats["connects"] == 2
+    assert stats["reconnects"] == 1
+    assert stats["failures"] == 1
+    assert stats["sessions"] == 1
+    await pool.close()
+
+
+async def test_tool_errors_keep_the_session(fake_transport):
+    pool = MCPSessionPool("http://mcp/sse", size=1, max_in_flight=4)
+    await pool.call_tool("fetch_portfolio", {"user_id": "u1"})
+    fake_transport[0].fail_next = ValueError("bad arguments")
+
+    with pytest.raises(ValueError):
+        await pool.call_tool("fetch_portfolio", {"user_id": "u1"})
+    assert len(fake_transport) == 1
+    assert pool.stats()["reconnects"] == 0
+    await pool.close()
+
+
+async def test_in_flight_calls_are_capped_per_session(fake_transport):
+    pool = MCPSessionPool("http://mcp/sse", size=2, max_in_flight=2)
+    await pool.start(warm=1)
+    fake_transport[0].delay = 0.05
+
+    await asyncio.gather(*(pool.call_tool("fetch_portfolio", {"user_id": f"u{i}"}) for i in range(8)))
+
+    # The first session filled up, so a second one was opened; neither exceeded its cap
+    assert len(fake_transport) == 2
+    assert all(session.peak <= 2 for session in fake_transport)
+    assert sum(session.calls for session in fake_transport) == 8
+    await pool.close()
+
+
+async def test_opening_a_session_does_not_block_other_calls(fake_transport):
+    connected = asyncio.Event()
+    release = asyncio.Event()
+
+    @asynccontextmanager
+    async def slow_second_connection(url):
+        if fake_transport:
+            connected.set()
+            await release.wait()
+        yield (MagicMock(), MagicMock())
+
+    with patch("app.service.mcp_pool.sse_client", slow_second_connection):
+        pool = MCPSessionPool("http://mcp/sse", size=2, max_in_flight=1)
+        await pool.start(warm=1)
+        fake_transport[0].delay = 0.05
+        first = asyncio.create_task(pool.call_tool("fetch_portfolio", {"user_id": "u1"}))
+        await asyncio.sleep(0)
+        # Finds the first session busy and opens a second one
+        opening = asyncio.create_task(pool.call_tool("fetch_portfolio", {"user_id": "u2"}))
+        await asyncio.wait_for(connected.wait(), timeout=5)
+
+        # Queues on the first session instead of waiting for the handshake
+        result = await asyncio.wait_for(pool.call_tool("fetch_portfolio", {"user_id": "u3"}), timeout=5)
+        assert result.content[0].text == "fetch_portfolio:u3"
+        assert not opening.done()
+
+        release.set()
+        await asyncio.gather(first, opening)
+        assert len(fake_transport) == 2
+        assert pool.stats()["in_flight"] == 0
+        await pool.close()
+
+
+async def test_start_tolerates_unreachable_server():
+    @asynccontextmanager
+    async def refused(url):
+        raise ConnectionError("refused")
+        yield
+
+    with patch("app.service.mcp_pool.sse_client", refused):
+        pool = MCPSessionPool("http://mcp/sse", size=2)
+        await pool.start(warm=2)
+        assert pool.stats()["sessions"] == 0
+        with pytest.raises(ConnectionError):
+            await pool.call_tool("fetch_portfolio", {"user_id": "u1"})
+
+
+async def test_subscription_updates_and_loss_reach_listeners(fake_transport):
+    pool = MCPSessionPool("http://mcp/sse", size=1, max_in_flight=4)
+    notified = []
+    pool.add_listener(notified.append)
+
+    assert await pool.subscribe("portfolio://u1") is True
+    assert pool.is_subscribed("portfolio://u1")
+    assert fake_transport[0].subscribed == ["portfolio://u1"]
+    await pool._on_message(ServerNotification(ResourceUpdatedNotification(
+        params=ResourceUpdatedNotificationParams(uri="portfolio://u1")
+    )))
+    assert notified == ["portfolio://u1"]
+
+    # Updates cannot arrive once the session is gone, so listeners are told
+    await pool.close()
+    assert notified == ["portfolio://u1", "portfolio://u1"]
+    assert not pool.is_subscribed("portfolio://u1")
+
+
+def test_transport_urls():
+    assert transport_url("mcp", 8001, "sse") == "http://mcp:8001/sse"
+    assert transport_url("mcp", 8001, "streamable_http") == "http://mcp:8001/mcp"
+    with pytest.raises(ValueError):
+        transport_url("mcp", 8001, "websocket")
+
+
+async def test_streamable_http_transport_is_selected():
+    @asynccontextmanager
+    async def fake_streamable_http_client(url):
+        yield (MagicMock(), MagicMock(), lambda: "session-id")
+
+    FakeSession.instances = []
+    with patch("app.service.mcp_pool.streamable_http_client", fake_streamable_http_client), \
+            patch("app.service.mcp_pool.sse_client", side_effect=AssertionError("SSE used")), \
+            patch("app.service.mcp_pool.ClientSession", FakeSession):
+        pool = MCPSessionPool("http://mcp:8001/mcp", transport="streamable_http")
+        result = await pool.call_tool("fetch_portfolio", {"user_id": "u1"})
+        assert result.content[0].text == "fetch_portfolio:u1"
+        assert pool.stats()["transport"] == "streamable_http"
+        await pool.close()
@@ -0,0 +1,30 @@
+import json
+import os
+
+import pytest
+
+from benchmarks.mcp_transport import _percentiles, main
+
+NODE_B_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "fina-mcp-server")
+
+
+def test_percentiles():
+    stats = _percentiles([1.0, 2.0, 3.0, 4.0])
+    assert stats["p50_ms"] == 2.5
+    assert stats["mean_ms"] == 2.5
+
+
+@pytest.mark.skipif(not os.path.isdir(NODE_B_DIR), reason="Node B source not available")
+def test_benchmark_compares_both_transports(tmp_path):
+    output = tmp_path / "mcp_transport.json"
+    assert main([
+        "--server-dir", NODE_B_DIR, "--calls", "5", "--cold-calls", "2",
+        "--sessions", "2", "--output", str(output)
+    ]) == 0
+
+    report = json.loads(output.read_text())
+    assert [row["transport"] for row in report["results"]] == ["sse", "streamable_http"]
+    for row in report["results"]:
+        assert row["warm_call"]["p50_ms"] > 0
+        assert row["session_per_call"]["p50_ms"] >= row["warm_call"]["p50_ms"]
+        assert row["memory"]["sessions"] == 2
@@ -0,0 +1,82 @@
+from datetime import date
+
+import faiss
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from pydantic import ValidationError
+
+from app.core.settings import settings
+from app.schemas.agent_schemas import DocumentFilter
+from app.service.ann_index import ensure_direct_map, ensure_index_type
+from app.service.metadata_filter import MetadataIndex, search_positions
+
+DOCS = {
+    "a" * 64: {"filename": "nvda_q3.pdf", "issuer": "NVDA", "report_date": "2024-09-30"},
+    "b" * 64: {"filename": "msft_q3.pdf", "issuer": "MSFT", "report_date": "2024-09-30"},
+    "c" * 64: {"filename": "nvda_q1.pdf", "issuer": "NVDA", "report_date": "2024-03-31"},
+}
+
+
+def make_store(pages_per_doc: int = 4, dim: int = 8) -> FAISS:
+    rng = np.random.default_rng(2)
+    pairs, metadatas, ids = [], [], []
+    for file_hash, meta in DOCS.items():
+        for page in range(pages_per_doc):
+            pairs.append((f"{meta['filename']} page {page}", rng.random(dim).tolist()))
+            metadatas.append({"file_hash": file_hash, "page": page, **meta})
+            ids.append(f"{file_hash}:{page}:0")
+    return FAISS.from_embeddings(pairs, DeterministicFakeEmbedding(size=dim), metadatas=metadatas, ids=ids)
+
+
+def pages_of(store, positions):
+    docs = [store.docstore.search(store.index_to_docstore_id[int(p)]) for p in positions]
+    return sorted((d.metadata["filename"], d.metadata["page"]) for d in docs)
+
+
+def test_select_by_document_issuer_date_and_pages():
+    store = make_store()
+    index = MetadataIndex.from_store(store)
+
+    assert len(index.select(DocumentFilter(file_hash="b" * 64))) == 4
+    assert len(index.select(DocumentFilter(issuer="nvda"))) == 8
+    assert pages_of(store, index.select(DocumentFilter(
+        issuer="NVDA", report_date_from=date(2024, 6, 1), page_start=2, page_end=3
+    ))) == [("nvda_q3.pdf", 1), ("nvda_q3.pdf", 2)]
+    assert len(index.select(DocumentFilter(filename="missing.pdf"))) == 0
+
+
+def test_filter_validates_ranges():
+    with pytest.raises(ValidationError):
+        DocumentFilter(page_start=5, page_end=2)
+    assert DocumentFilter().is_empty()
+
+
+@pytest.mark.parametrize("exact_max", [0, 4096])
+@pytest.mark.parametrize("factory", ["Flat", "HNSW32"])
+def test_search_positions_only_returns_selected(monkeypatch, exact_max, factory):
+    monkeypatch.setattr(settings, "FILTER_EXACT_MAX", exact_max)
+    store = make_store(pages_per_doc=200)
+    ensure_index_type(store, factory)
+    positions = MetadataIndex.from_store(store).select(DocumentFilter(issuer="MSFT"))
+    query = store.index.reconstruct(int(positions[7]))
+
+    hits, distances = search_positions(store.index, query, positions, k=5)
+
+    assert hits[0] == positions[7]
+    assert set(hits) <= set(positions.tolist())
+    assert len(hits) == 5
+    assert distances == sorted(distances)
+
+
+def test_search_positions_uses_ivf_direct_map():
+    store = make_store(pages_per_doc=300)
+    ensure_index_type(store, "IVF8,Flat")
+    assert isinstance(store.index, faiss.IndexIVFFlat)
+    ensure_direct_map(store.index)
+    positions = np.array([3, 500, 899])
+
+    hits, _ = search_positions(store.index, np.zeros(8), positions, k=10)
+
+    assert sorted(hits) == [3, 500, 899]
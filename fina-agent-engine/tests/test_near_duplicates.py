@@ -0,0 +1,49 @@
+import pytest
+
+from app.service.near_duplicates import MinHashIndex
+
+DISCLAIMER = (
+    "This report contains forward-looking statements that involve risks and uncertainties. "
+    "Actual results may differ materially from those projected due to market conditions, "
+    "regulatory changes, competition and other factors described in our annual filing."
+)
+
+
+def test_signature_matches_near_duplicates_only():
+    index = MinHashIndex(min_words=10)
+    index.add("q1", index.signature(DISCLAIMER))
+
+    reworded = DISCLAIMER.replace("annual filing", "annual report filing")
+    unrelated = (
+        "Revenue grew twelve percent year over year, driven by data center demand and strong "
+        "gaming sales, while operating expenses rose in line with the hiring plan for the year."
+    )
+    assert index.find(index.signature(DISCLAIMER)) == "q1"
+    assert index.find(index.signature(reworded)) == "q1"
+    assert index.find(index.signature(unrelated)) is None
+
+
+def test_short_texts_are_never_duplicates():
+    index = MinHashIndex(min_words=10)
+    assert index.signature("Total revenue") is None
+    index.add("short", None)
+    assert len(index) == 0
+    assert index.find(None) is None
+
+
+def test_remove_and_persist(tmp_path):
+    index = MinHashIndex(min_words=10)
+    index.add("q1", index.signature(DISCLAIMER))
+    index.add("q2", index.signature(DISCLAIMER + " Past performance is no guarantee."))
+    index.remove(["q1", "missing"])
+    index.save(str(tmp_path))
+
+    loaded = MinHashIndex.load(str(tmp_path))
+    assert list(loaded.signatures) == ["q2"]
+    assert loaded.find(loaded.signature(DISCLAIMER)) == "q2"
+    assert MinHashIndex.load(str(tmp_path / "missing")) is None
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        MinHashIndex(num_perm=64, bands=10)
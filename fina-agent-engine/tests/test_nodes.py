@@ -50,3 +50,21 @@ async def test_call_model_heuristic():
             
             assert result["usage"]["prompt_tokens"] > 0
             assert result["usage"]["completion_tokens"] > 0
+
+@pytest.mark.asyncio
+async def test_call_tools_books_context_savings():
+    from langchain_core.messages import AIMessage
+    import app.graph.nodes as nodes
+
+    call = {"name": "search_financial_docs", "args": {"query": "risk"}, "id": "call_1"}
+    state = {"messages": [AIMessage(content="", tool_calls=[call])], "user_id": "u1", "usage": {}}
+    report = {"context_tokens": 40, "context_tokens_saved": 160}
+
+    with patch("app.service.agent_tools.ingest_service.retrieve_context",
+               new_callable=AsyncMock, return_value=("risk context", report)):
+        result = await nodes.call_tools(state, {})
+
+    assert result["messages"][0].content == "risk context"
+    assert result["usage"]["context_tokens"] == 40
+    assert result["usage"]["context_tokens_saved"] == 160
+    assert result["usage"]["context_cost_saved"] > 0
@@ -0,0 +1,65 @@
+import hashlib
+import pytest
+
+from app.service.chunking import CharacterChunker, TokenAwareChunker
+from app.service.pdf_parser import PDFParser, count_pages, hash_file, parse_page_range
+
+
+def test_hash_file_matches_sha256(tmp_path):
+    f = tmp_path / "blob.bin"
+    f.write_bytes(b"x" * (3 * 1024 * 1024 + 7))
+    assert hash_file(str(f)) == hashlib.sha256(f.read_bytes()).hexdigest()
+
+
+def test_parse_page_range_keeps_page_numbers(make_pdf):
+    path = make_pdf("report.pdf", ["Revenue grew", "Risk factors", "Outlook"])
+    assert count_pages(path) == 3
+
+    parsed = parse_page_range(path, 1, 3, CharacterChunker(chunk_size=1000, chunk_overlap=0))
+    chunks = parsed.chunks
+
+    assert (parsed.start, parsed.end, parsed.baseline_chunks) == (1, 3, 2)
+    assert [c.page_content for c in chunks] == ["Risk factors", "Outlook"]
+    assert [c.metadata["page"] for c in chunks] == [1, 2]
+    assert chunks[0].metadata["total_pages"] == 3
+
+
+def test_parse_page_range_reports_token_baseline(make_pdf):
+    path = make_pdf("report.pdf", ["Revenue grew in every segment", "Outlook"])
+
+    parsed = parse_page_range(path, 0, 2, TokenAwareChunker(max_tokens=64))
+
+    assert [c.metadata["page"] for c in parsed.chunks] == [0, 1]
+    assert all(c.metadata["tokens"] <= 62 for c in parsed.chunks)
+    assert parsed.baseline_chunks == 2
+    assert parsed.baseline_truncated == 0
+
+
+@pytest.mark.asyncio
+async def test_iter_chunks_streams_page_ranges(make_pdf):
+    path = make_pdf("report.pdf", [f"Page {i} text" for i in range(5)])
+    parser = PDFParser(max_workers=2, pages_per_task=2)
+    try:
+        groups = [group async for group in parser.iter_chunks(path)]
+        file_hash = await parser.hash_file(path)
+    finally:
+        parser.shutdown()
+
+    assert sorted((g.start, g.end) for g in groups) == [(0, 2), (2, 4), (4, 5)]
+    assert all(g.total_pages == 5 for g in groups)
+    pages = sorted(c.metadata["page"] for group in groups for c in group.chunks)
+    assert pages == [0, 1, 2, 3, 4]
+    assert file_hash == hash_file(path)
+
+
+@pytest.mark.asyncio
+async def test_iter_chunks_rejects_invalid_pdf(tmp_path):
+    bad = tmp_path / "bad.pdf"
+    bad.write_text("not a pdf")
+    parser = PDFParser(max_workers=1)
+    try:
+        with pytest.raises(Exception):
+            async for _ in parser.iter_chunks(str(bad)):
+                pass
+    finally:
+        parser.shutdown()
@@ -0,0 +1,163 @@
+import pytest
+from mcp.types import CallToolResult, TextContent
+
+from app.core.exceptions import MCPConnectionError
+from app.service.mcp_client import MCPClient
+from app.service.portfolio_cache import PortfolioCache, portfolio_uri
+
+
+class FakePool:
+    """Session pool stand-in that serves versioned portfolios like Node B."""
+
+    def __init__(self, push=True):
+        self.push = push
+        self.rows = {"u1": '[{"symbol": "AAPL"}]'}
+        self.versions = {"u1": 1}
+        self.calls = []
+        self.subscribed = set()
+        self.listeners = []
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def is_subscribed(self, uri):
+        return uri in self.subscribed
+
+    async def subscribe(self, uri):
+        if self.push:
+            self.subscribed.add(uri)
+        return self.push
+
+    async def call_tool(self, name, arguments):
+        self.calls.append(arguments)
+        user_id = arguments["user_id"]
+        version = self.versions.get(user_id, 0)
+        if arguments.get("known_version") == version:
+            return CallToolResult(content=[], _meta={"version": version, "not_modified": True})
+        return CallToolResult(
+            content=[TextContent(type="text", text=self.rows.get(user_id, "[]"))],
+            _meta={"version": version}
+        )
+
+    def write(self, user_id, text):
+        self.rows[user_id] = text
+        self.versions[user_id] = self.versions.get(user_id, 0) + 1
+        for callback in self.listeners:
+            callback(portfolio_uri(user_id))
+
+
+def make_client(pool, **cache_options):
+    return MCPClient(host="mcp", port=8001, pool=pool, cache=PortfolioCache(**cache_options))
+
+
+@pytest.mark.asyncio
+async def test_subscribed_portfolio_is_served_from_cache():
+    pool = FakePool()
+    client = make_client(pool, max_users=10, ttl_seconds=60)
+
+    first = await client.fetch_portfolio("u1")
+    second = await client.fetch_portfolio("u1")
+    assert first == second == '[{"symbol": "AAPL"}]'
+    assert len(pool.calls) == 1
+    assert client.cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pushed_write_invalidates_entry():
+    pool = FakePool()
+    client = make_client(pool, max_users=10, ttl_seconds=60)
+    await client.fetch_portfolio("u1")
+
+    pool.write("u1", '[{"symbol": "NVDA"}]')
+    assert await client.fetch_portfolio("u1") == '[{"symbol": "NVDA"}]'
+    assert client.cache.stats()["invalidations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_without_push_every_lookup_revalidates():
+    pool = FakePool(push=False)
+    client = make_client(pool, max_users=10, ttl_seconds=60)
+
+    await client.fetch_portfolio("u1")
+    assert await client.fetch_portfolio("u1") == '[{"symbol": "AAPL"}]'
+    assert pool.calls[-1] == {"user_id": "u1", "known_version": 1}
+    assert client.cache.stats()["not_modified"] == 1
+
+    # A write nobody was told about is still seen on the next lookup
+    pool.rows["u1"] = "[]"
+    pool.versions["u1"] = 2
+    assert await client.fetch_portfolio("u1") == "[]"
+
+
+@pytest.mark.asyncio
+async def test_expired_entry_is_revalidated():
+    pool = FakePool()
+    client = make_client(pool, max_users=10, ttl_seconds=0)
+
+    await client.fetch_portfolio("u1")
+    await client.fetch_portfolio("u1")
+    assert len(pool.calls) == 2
+    assert client.cache.stats()["not_modified"] == 1
+
+
+@pytest.mark.asyncio
+async def test_ttl_is_capped_at_node_b_watch_interval():
+    pool = FakePool()
+    client = make_client(pool, max_users=10, ttl_seconds=60, watch_interval_seconds=0)
+    assert client.cache.ttl_seconds == 0
+
+    await client.fetch_portfolio("u1")
+    # A write whose push has not arrived yet is still seen
+    pool.rows["u1"] = "[]"
+    pool.versions["u1"] = 2
+    assert await client.fetch_portfolio("u1") == "[]"
+    assert pool.calls[-1] == {"user_id": "u1", "known_version": 1}
+
+@pytest.mark.asyncio
+async def test_fetch_racing_an_invalidation_is_not_stored():
+    pool = FakePool()
+    client = make_client(pool, max_users=10, ttl_seconds=60)
+    call_tool = pool.call_tool
+
+    async def write_during_call(name, arguments):
+        result = await call_tool(name, arguments)
+        pool.write("u1", "[]")
+        return result
+
+    pool.call_tool = write_during_call
+    await client.fetch_portfolio("u1")
+    assert client.cache.get("u1") is None
+
+
+def test_cache_is_bounded():
+    cache = PortfolioCache(max_users=2, ttl_seconds=60)
+    for user_id in ("u1", "u2", "u3"):
+        cache.put(user_id, "[]", 1, cache.ticket(user_id))
+    assert cache.get("u1") is None
+    assert cache.get("u3") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disabled_cache_always_fetches():
+    pool = FakePool()
+    client = make_client(pool, max_users=0)
+
+    await client.fetch_portfolio("u1")
+    await client.fetch_portfolio("u1")
+    assert pool.calls == [{"user_id": "u1"}, {"user_id": "u1"}]
+    assert not pool.subscribed
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached():
+    pool = FakePool()
+    client = make_client(pool, max_users=10, ttl_seconds=60)
+
+    async def failing(name, arguments):
+        raise ConnectionError("down")
+
+    pool.call_tool = failing
+    with pytest.raises(MCPConnectionError):
+        await client.fetch_portfolio("u1")
+    assert client.cache.get("u1") is None
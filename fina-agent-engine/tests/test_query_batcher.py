@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.service.query_batcher import QueryBatcher
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return super().embed_documents(texts)
+
+
+class FailingEmbedding(DeterministicFakeEmbedding):
+    def embed_documents(self, texts):
+        raise RuntimeError("endpoint down")
+
+
+TEXTS = ["alpha", "beta", "gamma", "delta"]
+
+
+@pytest.mark.asyncio
+async def test_queries_in_window_are_batched():
+    embeddings = CountingEmbedding(size=8)
+    store = FAISS.from_texts(TEXTS, embeddings)
+    embeddings.calls = 0
+    batcher = QueryBatcher(window_ms=20)
+
+    results = await asyncio.gather(*(batcher.search(store, embeddings, text, 1) for text in TEXTS))
+
+    assert [hits for _, hits, _ in results] == [[0], [1], [2], [3]]
+    assert all(distances[0] < 1e-4 for _, _, distances in results)
+    assert embeddings.calls == 1
+    stats = batcher.stats()
+    assert stats["batches"] == 1
+    assert stats["max_batch_size"] == 4
+    assert stats["max_queue_delay_ms"] > 0
+
+
+@pytest.mark.asyncio
+async def test_max_batch_flushes_immediately_and_k_is_per_query():
+    embeddings = DeterministicFakeEmbedding(size=8)
+    store = FAISS.from_texts(TEXTS, embeddings)
+    batcher = QueryBatcher(window_ms=10_000, max_batch=2)
+
+    (_, one, _), (vector, three, _) = await asyncio.wait_for(asyncio.gather(
+        batcher.search(store, embeddings, "alpha", 1),
+        batcher.search(store, embeddings, "beta", 3),
+    ), timeout=5)
+
+    assert len(one) == 1
+    assert len(three) == 3
+    assert vector.shape == (8,)
+
+
+@pytest.mark.asyncio
+async def test_stores_are_searched_separately_and_errors_propagate():
+    embeddings = DeterministicFakeEmbedding(size=8)
+    first = FAISS.from_texts(["alpha"], embeddings)
+    second = FAISS.from_texts(["beta", "gamma"], embeddings)
+    batcher = QueryBatcher(window_ms=20)
+
+    a, b = await asyncio.gather(
+        batcher.search(first, embeddings, "beta", 2),
+        batcher.search(second, embeddings, "beta", 2),
+    )
+    assert a[1] == [0]
+    assert b[1][0] == 0
+
+    with pytest.raises(RuntimeError, match="endpoint down"):
+        await batcher.search(first, FailingEmbedding(size=8), "alpha", 1)
+
+
+class RendezvousEmbedding(DeterministicFakeEmbedding):
+    """Async embedding that only returns once both stores' batches are embedding."""
+
+    barrier: object = None
+
+    async def aembed_documents(self, texts):
+        await self.barrier.wait()
+        return self.embed_documents(texts)
+
+
+@pytest.mark.asyncio
+async def test_store_groups_are_embedded_concurrently_on_the_loop():
+    barrier = asyncio.Barrier(2)
+    first_embeddings = RendezvousEmbedding(size=8, barrier=barrier)
+    second_embeddings = RendezvousEmbedding(size=8, barrier=barrier)
+    first = FAISS.from_texts(["alpha"], first_embeddings)
+    second = FAISS.from_texts(["beta"], second_embeddings)
+    batcher = QueryBatcher(window_ms=20)
+
+    # Awaiting the groups one after the other would never pass the barrier
+    a, b = await asyncio.wait_for(asyncio.gather(
+        batcher.search(first, first_embeddings, "alpha", 1),
+        batcher.search(second, second_embeddings, "beta", 1),
+    ), timeout=5)
+
+    assert a[1] == [0]
+    assert b[1] == [0]
+    assert batcher.stats()["batches"] == 1
@@ -0,0 +1,48 @@
+from langchain_core.documents import Document
+
+from app.core.settings import settings
+from app.service.query_fanout import decompose_query, merge_results, plan_queries
+
+
+def test_decompose_expands_ticker_enumerations():
+    assert decompose_query("compare the risk outlook for my AAPL and NVDA holdings") == [
+        "compare the risk outlook for my AAPL holdings",
+        "compare the risk outlook for my NVDA holdings",
+    ]
+    assert decompose_query("AAPL, MSFT or NVDA guidance") == ["AAPL guidance", "MSFT guidance", "NVDA guidance"]
+
+
+def test_decompose_splits_separate_questions():
+    assert decompose_query("What is NVDA revenue? What are the AAPL risks?") == [
+        "What is NVDA revenue?",
+        "What are the AAPL risks?",
+    ]
+
+
+def test_decompose_leaves_simple_questions_alone():
+    assert decompose_query("EBITDA 2023") == ["EBITDA 2023"]
+    assert decompose_query("Revenue in Q3 and Q4") == ["Revenue in Q3 and Q4"]
+
+
+def test_decompose_caps_sub_queries():
+    assert len(decompose_query("A, B, C, D, E and F outlook", max_queries=3)) == 3
+
+
+def test_plan_queries_prefers_explicit_sub_queries(monkeypatch):
+    assert plan_queries("risks", ["AAPL risks", "aapl  risks", "NVDA risks"]) == ["AAPL risks", "NVDA risks"]
+    monkeypatch.setattr(settings, "SEARCH_DECOMPOSE_QUERIES", False)
+    assert plan_queries("AAPL and NVDA risks") == ["AAPL and NVDA risks"]
+
+
+def test_merge_normalises_and_deduplicates():
+    shared = Document(id="s", page_content="shared")
+    a = Document(id="a", page_content="a")
+    b = Document(id="b", page_content="b")
+
+    merged = merge_results([
+        [(a, 0.9), (shared, 0.45)],
+        [(b, 0.2), (shared, 0.18)],
+        [],
+    ])
+
+    assert [(doc.id, round(score, 2)) for doc, score in merged] == [("a", 1.0), ("b", 1.0), ("s", 0.9)]
@@ -0,0 +1,151 @@
+import asyncio
+
+import anyio
+import pytest
+
+from app.core.exceptions import CircuitOpenError, MCPConnectionError
+from app.core.settings import settings
+from app.service.mcp_client import MCPClient
+from app.service.portfolio_cache import PortfolioCache
+from app.service.resilience import CircuitBreaker, ResilientCaller, backoff_delay
+
+
+@pytest.fixture(autouse=True)
+def fast_settings(monkeypatch):
+    monkeypatch.setattr(settings, "MCP_CALL_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "MCP_CALL_DEADLINE_SECONDS", 1.0)
+    monkeypatch.setattr(settings, "MCP_MAX_RETRIES", 2)
+    monkeypatch.setattr(settings, "MCP_RETRY_BACKOFF_SECONDS", 0.001)
+    monkeypatch.setattr(settings, "MCP_RETRY_BACKOFF_MAX_SECONDS", 0.002)
+    monkeypatch.setattr(settings, "MCP_HEDGE_PERCENTILE", 0)
+
+
+def flaky(failures, error=anyio.ClosedResourceError):
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) <= failures:
+            raise error()
+        return "ok"
+
+    return call, attempts
+
+
+def test_backoff_is_jittered_and_capped():
+    delays = [backoff_delay(attempt, 0.1, 0.5) for attempt in range(1, 8) for _ in range(20)]
+    assert all(0 <= delay <= 0.5 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+async def test_retries_connection_errors_then_succeeds():
+    caller = ResilientCaller(CircuitBreaker(failure_threshold=5, reset_seconds=30))
+    call, attempts = flaky(2)
+    assert await caller.call(call) == "ok"
+    assert len(attempts) == 3
+    assert caller.stats()["retries"] == 2
+    assert caller.breaker.state == "closed"
+
+
+async def test_retries_are_bounded():
+    caller = ResilientCaller(CircuitBreaker(failure_threshold=10, reset_seconds=30))
+    call, attempts = flaky(10)
+    with pytest.raises(anyio.ClosedResourceError):
+        await caller.call(call)
+    assert len(attempts) == 3
+
+
+async def test_tool_errors_are_not_retried():
+    caller = ResilientCaller(CircuitBreaker(failure_threshold=1, reset_seconds=30))
+    call, attempts = flaky(1, error=ValueError)
+    with pytest.raises(ValueError):
+        await caller.call(call)
+    assert len(attempts) == 1
+    assert caller.breaker.state == "closed"
+
+
+async def test_hung_call_hits_its_deadline():
+    caller = ResilientCaller(CircuitBreaker(failure_threshold=10, reset_seconds=30))
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    with pytest.raises(TimeoutError):
+        await caller.call(hang)
+    assert caller.stats()["timeouts"] == 3
+
+
+async def test_breaker_opens_fails_fast_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=0.05)
+    caller = ResilientCaller(breaker)
+    call, attempts = flaky(3)
+
+    with pytest.raises(anyio.ClosedResourceError):
+        await caller.call(call)
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        await caller.call(call)
+    assert len(attempts) == 3
+    assert breaker.stats()["rejected"] == 1
+
+    await asyncio.sleep(0.06)
+    assert await caller.call(call) == "ok"
+    assert breaker.state == "closed"
+    assert breaker.stats()["opens"] == 1
+
+
+async def test_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+async def test_slow_attempt_is_hedged(monkeypatch):
+    monkeypatch.setattr(settings, "MCP_HEDGE_PERCENTILE", 90)
+    monkeypatch.setattr(settings, "MCP_HEDGE_MIN_SAMPLES", 5)
+    monkeypatch.setattr(settings, "MCP_CALL_TIMEOUT_SECONDS", 1.0)
+    caller = ResilientCaller(CircuitBreaker(failure_threshold=5, reset_seconds=30))
+    for _ in range(10):
+        await caller.call(lambda: asyncio.sleep(0.001, result="fast"))
+    assert caller.hedge_delay() is not None
+
+    started = []
+
+    async def first_slow():
+        started.append(1)
+        await asyncio.sleep(0.5 if len(started) == 1 else 0.001)
+        return len(started)
+
+    assert await caller.call(first_slow) == 2
+    stats = caller.stats()
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
+
+
+async def test_client_maps_open_circuit_to_connection_error():
+    class DeadPool:
+        calls = 0
+
+        def add_listener(self, callback):
+            pass
+
+        async def call_tool(self, name, arguments):
+            self.calls += 1
+            raise anyio.ClosedResourceError()
+
+    caller = ResilientCaller(CircuitBreaker(failure_threshold=1, reset_seconds=30))
+    pool = DeadPool()
+    client = MCPClient(host="mcp", port=8001, pool=pool, cache=PortfolioCache(max_users=0), resilience=caller)
+    # The first failure opens the circuit, so its retry already fails fast
+    with pytest.raises(MCPConnectionError, match="circuit open"):
+        await client.fetch_portfolio("u1")
+    with pytest.raises(MCPConnectionError, match="circuit open"):
+        await client.fetch_portfolio("u1")
+    assert pool.calls == 1
+    assert caller.breaker.stats()["rejected"] == 2
@@ -0,0 +1,54 @@
+import json
+
+import numpy as np
+
+from benchmarks.retrieval import HashingEmbeddings, compare, main, resolve_mode, run, synthetic_corpus
+
+
+def test_hashing_embeddings_are_deterministic_and_lexical():
+    embeddings = HashingEmbeddings(64)
+    a = np.asarray(embeddings.embed_query("NVDA revenue Q3 2024"))
+    assert np.allclose(a, HashingEmbeddings(64).embed_query("NVDA revenue Q3 2024"))
+    assert abs(np.linalg.norm(a) - 1) < 1e-5
+
+    related = np.asarray(embeddings.embed_query("NVDA reported revenue for Q3 2024"))
+    unrelated = np.asarray(embeddings.embed_query("Management highlighted litigation outcomes"))
+    assert np.linalg.norm(a - related) < np.linalg.norm(a - unrelated)
+
+
+def test_synthetic_corpus_is_reproducible():
+    assert synthetic_corpus(50, seed=3) == synthetic_corpus(50, seed=3)
+    texts, metadata = synthetic_corpus(50)
+    assert len(texts) == len(metadata) == 50
+
+
+def test_resolve_mode_sizes_placeholders():
+    assert resolve_mode("IVF{nlist},PQ{pq}x4fs", 10000, 384) == "IVF256,PQ64x4fs"
+    assert resolve_mode("HNSW32", 10000, 384) == "HNSW32"
+
+
+def test_run_reports_every_mode():
+    report = run(chunks=1000, queries=20, k=5, dimension=32, modes=("Flat", "HNSW32", "IVF{nlist},Flat", "IVF4096,Flat"))
+
+    flat, hnsw, ivf, too_big = report["results"]
+    assert flat["recall@5"] == 1.0
+    assert 0 <= hnsw["recall@5"] <= 1
+    assert ivf["mode"] == "IVF25,Flat"
+    assert "skipped" in too_big
+    for row in (flat, hnsw, ivf):
+        assert row["search"]["p50_ms"] <= row["search"]["p95_ms"] <= row["search"]["p99_ms"]
+        assert row["ingest"]["chunks_per_s"] > 0
+        assert row["memory"]["index_bytes"] > 0
+
+
+def test_main_writes_report_and_flags_regressions(tmp_path):
+    output = tmp_path / "report.json"
+    args = ["--chunks", "1000", "--queries", "10", "--dimension", "32", "--modes", "Flat", "--output", str(output)]
+    assert main(args) == 0
+    report = json.loads(output.read_text())
+    assert report["config"]["chunks"] == 1000
+
+    baseline = json.loads(output.read_text())
+    baseline["results"][0]["recall@10"] = 1.5
+    assert compare(baseline, report) == [f"Flat: recall@10 1.5 -> {report['results'][0]['recall@10']}"]
+    assert compare(report, report) == []
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+import time
+
+import faiss
+import pytest
+
+from app.core.settings import settings
+from app.service.search_pool import LoopLagMonitor, SearchPool, faiss_omp_threads
+
+
+def test_faiss_omp_threads_shares_cores(monkeypatch):
+    monkeypatch.setattr(settings, "FAISS_OMP_THREADS", 0)
+    assert faiss_omp_threads(10_000) == 1
+    monkeypatch.setattr(settings, "FAISS_OMP_THREADS", 3)
+    assert faiss_omp_threads(4) == 3
+
+
+@pytest.mark.asyncio
+async def test_run_uses_pool_threads_and_sets_omp(monkeypatch):
+    monkeypatch.setattr(settings, "FAISS_OMP_THREADS", 1)
+    pool = SearchPool(max_workers=2)
+    try:
+        names = await asyncio.gather(*(pool.run(lambda: threading.current_thread().name) for _ in range(4)))
+    finally:
+        pool.shutdown()
+
+    assert all(name.startswith("vector-search") for name in names)
+    assert faiss.omp_get_max_threads() == 1
+    stats = pool.stats()
+    assert stats["tasks"] == 4
+    assert stats["threads"] == 2
+
+
+@pytest.mark.asyncio
+async def test_loop_monitor_reports_blocking():
+    monitor = LoopLagMonitor(interval_ms=10, threshold_ms=50)
+    monitor.start()
+    await asyncio.sleep(0.03)
+    time.sleep(0.15)  # blocks the loop
+    await asyncio.sleep(0.03)
+    await monitor.stop()
+
+    stats = monitor.stats()
+    assert stats["blocked_events"] >= 1
+    assert stats["max_lag_ms"] >= 100
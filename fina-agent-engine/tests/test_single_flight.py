@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from app.service.mcp_client import MCPClient
+from app.service.portfolio_cache import PortfolioCache
+from app.service.single_flight import SingleFlight, call_key
+
+
+async def test_concurrent_identical_calls_share_one_request():
+    flights = SingleFlight()
+    started = []
+
+    async def call():
+        started.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    key = call_key("fetch_portfolio", {"user_id": "u1"})
+    results = await asyncio.gather(*(flights.do(key, call) for _ in range(5)))
+    assert results == ["result"] * 5
+    assert len(started) == 1
+    assert flights.stats() == {"coalesced_calls": 4, "in_flight_keys": 0}
+
+    # Once finished, the next call goes out again
+    await flights.do(key, call)
+    assert len(started) == 2
+
+
+async def test_different_arguments_are_not_coalesced():
+    flights = SingleFlight()
+    seen = []
+
+    async def call(user_id):
+        seen.append(user_id)
+        await asyncio.sleep(0.01)
+        return user_id
+
+    results = await asyncio.gather(
+        flights.do(call_key("fetch_portfolio", {"user_id": "u1"}), lambda: call("u1")),
+        flights.do(call_key("fetch_portfolio", {"user_id": "u2"}), lambda: call("u2")),
+    )
+    assert results == ["u1", "u2"]
+    assert flights.coalesced == 0
+
+
+async def test_errors_reach_every_caller():
+    flights = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.01)
+        raise ConnectionError("down")
+
+    key = call_key("fetch_portfolio", {"user_id": "u1"})
+    results = await asyncio.gather(*(flights.do(key, call) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+async def test_cancelled_caller_does_not_cancel_the_others():
+    flights = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.02)
+        return "result"
+
+    key = call_key("fetch_portfolio", {"user_id": "u1"})
+    first = asyncio.ensure_future(flights.do(key, call))
+    second = asyncio.ensure_future(flights.do(key, call))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == "result"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+async def test_client_coalesces_portfolio_lookups():
+    calls = []
+
+    class SlowPool:
+        def add_listener(self, callback):
+            pass
+
+        async def call_tool(self, name, arguments):
+            calls.append(arguments)
+            await asyncio.sleep(0.01)
+            result = type("Result", (), {})()
+            result.content = [type("Text", (), {"text": "[]"})()]
+            result.meta = None
+            result.isError = False
+            return result
+
+    client = MCPClient(host="mcp", port=8001, pool=SlowPool(), cache=PortfolioCache(max_users=0))
+    results = await asyncio.gather(*(client.fetch_portfolio("u1") for _ in range(4)))
+    assert results == ["[]"] * 4
+    assert len(calls) == 1
+    assert client.flights.stats()["coalesced_calls"] == 3
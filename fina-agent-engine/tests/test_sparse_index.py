@@ -0,0 +1,45 @@
+from app.service.sparse_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def test_tokenize_keeps_codes_and_figures():
+    assert tokenize("NVDA EBITDA 2023: $12.5% (ISIN US0378331005, 10-K)") == [
+        "nvda", "ebitda", "2023", "12.5%", "isin", "us0378331005", "10-k"
+    ]
+
+
+def test_bm25_ranks_exact_matches_first():
+    index = BM25Index()
+    index.add(
+        ["a", "b", "c"],
+        [
+            "Revenue grew strongly across all segments",
+            "EBITDA 2023 reached 4.1 billion for NVDA",
+            "EBITDA margins are discussed in the outlook",
+        ],
+    )
+
+    results = index.search("NVDA EBITDA 2023", k=2)
+
+    assert [doc_id for doc_id, _ in results] == ["b", "c"]
+    assert index.search("unrelated words", k=3) == []
+
+
+def test_bm25_remove_and_persist(tmp_path):
+    index = BM25Index()
+    index.add(["a", "b"], ["apple results", "banana results"])
+    index.remove(["a", "missing"])
+
+    index.save(str(tmp_path))
+    loaded = BM25Index.load(str(tmp_path))
+
+    assert len(loaded) == 1
+    assert "apple" not in loaded.postings
+    assert loaded.search("results", k=5)[0][0] == "b"
+    assert BM25Index.load(str(tmp_path / "empty")) is None
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d"]], k=60)
+
+    assert [doc_id for doc_id, _ in fused][:1] == ["c"]
+    assert {doc_id for doc_id, _ in fused} == {"a", "b", "c", "d"}
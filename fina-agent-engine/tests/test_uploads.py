@@ -0,0 +1,52 @@
+import hashlib
+import io
+import os
+import pytest
+from fastapi import UploadFile
+
+from app.api.uploads import save_upload_stream
+from app.core.exceptions import PayloadTooLargeError
+from app.core.settings import settings
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 1024)
+    monkeypatch.setattr(settings, "MAX_PDF_SIZE_MB", 1)
+
+
+@pytest.mark.asyncio
+async def test_save_upload_stream_hashes_while_writing(tmp_path, small_chunks):
+    payload = b"%PDF-1.4 " + os.urandom(10_000)
+    upload = UploadFile(io.BytesIO(payload), filename="report.pdf")
+
+    stored = await save_upload_stream(upload, str(tmp_path))
+
+    assert stored.size == len(payload)
+    assert stored.sha256 == hashlib.sha256(payload).hexdigest()
+    with open(stored.path, "rb") as f:
+        assert f.read() == payload
+
+
+@pytest.mark.asyncio
+async def test_save_upload_stream_uses_unique_names(tmp_path, small_chunks):
+    first = await save_upload_stream(UploadFile(io.BytesIO(b"a"), filename="same.pdf"), str(tmp_path))
+    second = await save_upload_stream(UploadFile(io.BytesIO(b"b"), filename="same.pdf"), str(tmp_path))
+    assert first.path != second.path
+
+
+@pytest.mark.asyncio
+async def test_save_upload_stream_aborts_past_limit(tmp_path, small_chunks):
+    payload = b"x" * (1024 * 1024 + 1)
+    upload = UploadFile(io.BytesIO(payload), filename="huge.pdf")
+
+    with pytest.raises(PayloadTooLargeError):
+        await save_upload_stream(upload, str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_save_upload_stream_rejects_declared_size(tmp_path, small_chunks):
+    upload = UploadFile(io.BytesIO(b"x"), filename="huge.pdf", size=2 * 1024 * 1024)
+    with pytest.raises(PayloadTooLargeError):
+        await save_upload_stream(upload, str(tmp_path))
@@ -0,0 +1,308 @@
+import os
+
+import pytest
+from unittest.mock import patch
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.core.exceptions import ReadOnlyDocstoreError
+from app.core.settings import settings
+from app.service import vector_store
+from app.service.ann_index import ensure_index_type
+from app.service.docstore import PositionMap, SQLiteDocstore
+from app.service.vector_store import (
+    TenantIndexes,
+    VectorIndexHolder,
+    collect_snapshots,
+    current_snapshot,
+    load_store,
+    read_manifest,
+    read_registry,
+    save_store,
+    tenant_for,
+    write_manifest,
+    write_snapshot,
+)
+from app.service.sparse_index import BM25Index
+
+embeddings = DeterministicFakeEmbedding(size=8)
+
+
+def _save_index(path, texts):
+    store = FAISS.from_documents([Document(page_content=t) for t in texts], embeddings)
+    save_store(store, str(path))
+    return write_manifest(str(path))
+
+
+def test_write_and_read_manifest(tmp_path):
+    version = write_manifest(str(tmp_path), file_hash="abc")
+    manifest = read_manifest(str(tmp_path))
+    assert manifest["version"] == version
+    assert manifest["file_hash"] == "abc"
+
+
+def test_read_manifest_missing(tmp_path):
+    assert read_manifest(str(tmp_path)) is None
+
+
+@pytest.mark.asyncio
+async def test_get_returns_none_without_index(tmp_path):
+    holder = VectorIndexHolder(str(tmp_path))
+    assert await holder.get(embeddings) is None
+    assert holder.stats() == {"loaded": False}
+
+
+@pytest.mark.asyncio
+async def test_get_loads_once_and_reports_stats(tmp_path):
+    _save_index(tmp_path, ["alpha", "beta"])
+    holder = VectorIndexHolder(str(tmp_path))
+
+    with patch.object(vector_store, "load_store", wraps=load_store) as spy:
+        first = await holder.get(embeddings)
+        second = await holder.get(embeddings)
+    assert first is second
+    assert spy.call_count == 1
+
+    stats = holder.stats()
+    assert stats["loaded"] is True
+    assert stats["vectors"] == 2
+    assert stats["dimension"] == 8
+    assert stats["disk_bytes"] > 0
+    assert stats["load_time_ms"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_get_swaps_in_new_version(tmp_path):
+    _save_index(tmp_path, ["alpha"])
+    holder = VectorIndexHolder(str(tmp_path))
+    old = await holder.get(embeddings)
+
+    new_version = _save_index(tmp_path, ["alpha", "beta", "gamma"])
+    new = await holder.get(embeddings)
+
+    assert new is not old
+    assert new.index.ntotal == 3
+    assert holder.stats()["version"] == new_version
+
+
+@pytest.mark.asyncio
+async def test_publish_replaces_current(tmp_path):
+    holder = VectorIndexHolder(str(tmp_path))
+    version = _save_index(tmp_path, ["alpha"])
+    store = load_store(str(tmp_path), embeddings)
+
+    holder.publish(store, version)
+    assert await holder.get(embeddings) is store
+
+
+def _write_snapshot(path, texts, registry=None):
+    store = FAISS.from_documents([Document(page_content=t) for t in texts], embeddings)
+    return write_snapshot(str(path), store, BM25Index(), registry or {})
+
+
+def test_write_snapshot_publishes_complete_directory(tmp_path):
+    version, path = _write_snapshot(tmp_path, ["alpha"], {"abc": {"ids": []}})
+
+    assert read_manifest(str(tmp_path))["version"] == version
+    assert current_snapshot(str(tmp_path)) == path
+    assert os.path.basename(path) == version
+    assert sorted(os.listdir(path)) == ["bm25.json", "docstore.sqlite", "index.faiss", "registry.json"]
+    assert read_registry(path) == {"abc": {"ids": []}}
+    assert not os.path.exists(tmp_path / "index.faiss")
+
+
+@pytest.mark.asyncio
+async def test_reader_keeps_its_snapshot_across_writes(tmp_path):
+    _write_snapshot(tmp_path, ["alpha"])
+    holder = VectorIndexHolder(str(tmp_path))
+    old = await holder.get_loaded(embeddings)
+
+    _, new_path = _write_snapshot(tmp_path, ["alpha", "beta"])
+    new = await holder.get_loaded(embeddings)
+
+    assert new.path == new_path
+    assert new.store.index.ntotal == 2
+    # The old snapshot is still referenced, so it survives collection
+    assert collect_snapshots(str(tmp_path), grace_seconds=0) == []
+    assert old.store.docstore.search(old.store.index_to_docstore_id[0]).page_content == "alpha"
+
+    old_path = old.path
+    del old
+    assert collect_snapshots(str(tmp_path), grace_seconds=0) == [old_path]
+    assert os.listdir(tmp_path / "snapshots") == [os.path.basename(new_path)]
+
+
+def test_collect_snapshots_respects_grace_period(tmp_path):
+    _write_snapshot(tmp_path, ["alpha"])
+    _write_snapshot(tmp_path, ["beta"])
+
+    assert collect_snapshots(str(tmp_path), grace_seconds=3600) == []
+    assert len(os.listdir(tmp_path / "snapshots")) == 2
+
+
+def test_grace_period_runs_from_supersession(tmp_path):
+    _, old_path = _write_snapshot(tmp_path, ["alpha"])
+    # Created long ago, but only replaced now
+    os.utime(old_path, (0, 0))
+    _write_snapshot(tmp_path, ["beta"])
+    old_name = os.path.join("snapshots", os.path.basename(old_path))
+    assert old_name in read_manifest(str(tmp_path))["superseded"]
+
+    assert collect_snapshots(str(tmp_path), grace_seconds=60) == []
+
+    manifest = read_manifest(str(tmp_path))
+    manifest["superseded"][old_name] -= 120
+    vector_store._write_json_atomic(str(tmp_path / "manifest.json"), manifest)
+    assert collect_snapshots(str(tmp_path), grace_seconds=60) == [old_path]
+
+    # Entries of collected snapshots are dropped on the next publish
+    _write_snapshot(tmp_path, ["gamma"])
+    assert old_name not in read_manifest(str(tmp_path))["superseded"]
+
+def test_collect_snapshots_removes_superseded_flat_layout(tmp_path):
+    _save_index(tmp_path, ["alpha"])
+    assert current_snapshot(str(tmp_path)) == str(tmp_path)
+
+    _, path = _write_snapshot(tmp_path, ["alpha"])
+    collect_snapshots(str(tmp_path), grace_seconds=0)
+
+    assert not os.path.exists(tmp_path / "index.faiss")
+    assert os.path.exists(os.path.join(path, "index.faiss"))
+
+
+def test_resident_store_is_mmapped_and_lazy(tmp_path):
+    _save_index(tmp_path, ["alpha", "beta"])
+    assert not os.path.exists(tmp_path / "index.pkl")
+
+    store = load_store(str(tmp_path), embeddings)
+    assert isinstance(store.docstore, SQLiteDocstore)
+    assert isinstance(store.index_to_docstore_id, PositionMap)
+    assert store.similarity_search("alpha", k=1)[0].page_content == "alpha"
+    with pytest.raises(ValueError, match="support adding items"):
+        store.add_texts(["gamma"])
+    assert store.index.ntotal == 2
+    with pytest.raises(ReadOnlyDocstoreError):
+        store.docstore.delete(["x"])
+
+    writable = load_store(str(tmp_path), embeddings, writable=True)
+    writable.add_texts(["gamma"])
+    save_store(writable, str(tmp_path))
+    # The open snapshot keeps reading the file it was opened on
+    assert len(store.index_to_docstore_id) == 2
+    assert load_store(str(tmp_path), embeddings).index.ntotal == 3
+
+
+
+@pytest.mark.asyncio
+async def test_loaded_ivf_index_has_its_direct_map(tmp_path):
+    store = FAISS.from_documents([Document(page_content=f"chunk {i}") for i in range(300)], embeddings)
+    ensure_index_type(store, "IVF4,Flat")
+    save_store(store, str(tmp_path))
+    write_manifest(str(tmp_path))
+
+    loaded = await VectorIndexHolder(str(tmp_path)).get(embeddings)
+
+    ivf = vector_store.faiss.extract_index_ivf(loaded.index)
+    assert ivf.direct_map.type != vector_store.faiss.DirectMap.NoMap
+    assert loaded.index.reconstruct_batch([0, 299]).shape == (2, 8)
+
+
+def test_resident_store_loads_with_pre_ifc_mmap_flag(tmp_path, monkeypatch):
+    # faiss before 1.10 has no IO_FLAG_MMAP_IFC
+    monkeypatch.setattr(vector_store, "MMAP_FLAG", vector_store.faiss.IO_FLAG_MMAP)
+    _save_index(tmp_path, ["alpha", "beta"])
+
+    store = load_store(str(tmp_path), embeddings)
+    assert store.similarity_search("beta", k=1)[0].page_content == "beta"
+
+@pytest.mark.asyncio
+async def test_legacy_pickle_store_is_migrated(tmp_path):
+    store = FAISS.from_documents([Document(page_content=t) for t in ["alpha", "beta"]], embeddings)
+    store.save_local(str(tmp_path))
+    write_manifest(str(tmp_path))
+
+    holder = VectorIndexHolder(str(tmp_path))
+    loaded = await holder.get_loaded(embeddings)
+
+    assert not os.path.exists(tmp_path / "index.pkl")
+    assert os.path.exists(tmp_path / "docstore.sqlite")
+    assert os.path.exists(tmp_path / "bm25.json")
+    assert loaded.store.similarity_search("beta", k=1)[0].page_content == "beta"
+
+
+def test_legacy_pickle_migration_can_be_disabled(tmp_path, monkeypatch):
+    store = FAISS.from_documents([Document(page_content="alpha")], embeddings)
+    store.save_local(str(tmp_path))
+    monkeypatch.setattr(settings, "LEGACY_PICKLE_MIGRATION", False)
+
+    with pytest.raises(RuntimeError):
+        vector_store.migrate_legacy_store(str(tmp_path), embeddings)
+    assert os.path.exists(tmp_path / "index.pkl")
+
+
+def test_tenant_for_maps_users_and_organizations(monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_TENANCY", "user")
+    monkeypatch.setattr(settings, "TENANT_ORGANIZATIONS", '{"alice": "acme"}')
+    assert tenant_for("bob") == "bob"
+    assert tenant_for("alice") == "acme"
+    # Unsafe IDs never become paths
+    assert "/" not in tenant_for("../etc/passwd")
+    assert len(tenant_for("../etc/passwd")) == 32
+
+    monkeypatch.setattr(settings, "VECTOR_TENANCY", "shared")
+    assert tenant_for("bob") is None
+
+
+@pytest.mark.asyncio
+async def test_tenant_lru_evicts_cold_tenants(tmp_path):
+    tenants = TenantIndexes(VectorIndexHolder(str(tmp_path)), max_tenants=2)
+    for name in ("a", "b", "c"):
+        _save_index(tenants.holder(name).db_path, [f"{name} report"])
+
+    assert tenants.holder(None).db_path == str(tmp_path)
+    await tenants.get_loaded("a", embeddings)
+    await tenants.get_loaded("b", embeddings)
+    await tenants.get_loaded("a", embeddings)
+    await tenants.get_loaded("c", embeddings)
+
+    stats = tenants.stats()
+    assert stats["resident_tenants"] == 2
+    assert stats["evictions"] == 1
+    # "b" was the least recently used
+    assert tenants.holder("b").resident_bytes == 0
+    assert tenants.holder("a").resident_bytes > 0
+
+    loaded = await tenants.get_loaded("b", embeddings)
+    assert loaded.store.similarity_search("report", k=1)[0].page_content == "b report"
+
+
+@pytest.mark.asyncio
+async def test_tenant_memory_cap(tmp_path):
+    tenants = TenantIndexes(VectorIndexHolder(str(tmp_path)), max_bytes=1)
+    for name in ("a", "b"):
+        _save_index(tenants.holder(name).db_path, [f"{name} report"])
+
+    await tenants.get_loaded("a", embeddings)
+    await tenants.get_loaded("b", embeddings)
+
+    # The tenant being served is never evicted, even past the cap
+    assert tenants.stats()["resident_tenants"] == 1
+    assert tenants.holder("b").resident_bytes > 0
+
+
+@pytest.mark.asyncio
+async def test_one_eviction_pass_removes_several_tenants(tmp_path):
+    tenants = TenantIndexes(VectorIndexHolder(str(tmp_path)), max_tenants=5)
+    names = ("a", "b", "c", "d", "e")
+    for name in names:
+        _save_index(tenants.holder(name).db_path, [f"{name} report"])
+        await tenants.get_loaded(name, embeddings)
+    assert tenants.stats()["resident_tenants"] == 5
+
+    tenants.max_tenants = 1
+    tenants.touch("c")
+
+    assert tenants.stats()["resident_tenants"] == 1
+    assert tenants.stats()["evictions"] == 4
+    assert [n for n in names if tenants.holder(n).resident_bytes] == ["c"]
@@ -1,7 +1,23 @@
 import aiosqlite
 import os
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "../../portfolio.db")
+DB_PATH = os.getenv("PORTFOLIO_DB_PATH", os.path.join(os.path.dirname(__file__), "../../portfolio.db"))
+
+# Every write to a user's rows bumps that user's version in the same transaction,
+# whichever connection or process makes it
+VERSION_TRIGGERS = {
+    "portfolio_version_insert": "AFTER INSERT ON portfolio BEGIN {bump_new} END",
+    "portfolio_version_update": "AFTER UPDATE ON portfolio BEGIN {bump_new} END",
+    # A row moved to another user also changes the previous owner's portfolio
+    "portfolio_version_move": (
+        "AFTER UPDATE OF user_id ON portfolio WHEN OLD.user_id IS NOT NEW.user_id BEGIN {bump_old} END"
+    ),
+    "portfolio_version_delete": "AFTER DELETE ON portfolio BEGIN {bump_old} END",
+}
+BUMP_VERSION = """
+    INSERT INTO portfolio_versions (user_id, version) VALUES ({row}.user_id, 1)
+    ON CONFLICT(user_id) DO UPDATE SET version = version + 1;
+"""
 
 async def init_db():
     async with aiosqlite.connect(DB_PATH) as db:
@@ -14,16 +30,66 @@ async def init_db():
                 avg_price REAL
             )
         """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS portfolio_versions (
+                user_id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            )
+        """)
+        for name, body in VERSION_TRIGGERS.items():
+            statement = body.format(
+                bump_old=BUMP_VERSION.format(row="OLD"),
+                bump_new=BUMP_VERSION.format(row="NEW"),
+            )
+            await db.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {statement}")
         # Insert test data if the table is empty
         cursor = await db.execute("SELECT COUNT(*) FROM portfolio")
         if (await cursor.fetchone())[0] == 0:
             await db.execute("INSERT INTO portfolio (user_id, symbol, shares, avg_price) VALUES ('user123', 'AAPL', 10, 150.5)")
             await db.execute("INSERT INTO portfolio (user_id, symbol, shares, avg_price) VALUES ('user123', 'NVDA', 5, 450.0)")
-            await db.commit()
+        await db.commit()
 
 async def get_portfolio(user_id: str):
     async with aiosqlite.connect(DB_PATH) as db:
         db.row_factory = aiosqlite.Row
         async with db.execute("SELECT * FROM portfolio WHERE user_id = ?", (user_id,)) as cursor:
             rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
\ No newline at end of file
+            return [dict(row) for row in rows]
+
+async def get_portfolio_versions(user_ids: list[str]) -> dict[str, int]:
+    """Current version of each user's rows (0 for a user that was never written)."""
+    versions = {user_id: 0 for user_id in user_ids}
+    if not user_ids:
+        return versions
+    async with aiosqlite.connect(DB_PATH) as db:
+        placeholders = ",".join("?" * len(user_ids))
+        async with db.execute(
+            f"SELECT user_id, version FROM portfolio_versions WHERE user_id IN ({placeholders})",
+            list(user_ids),
+        ) as cursor:
+            for user_id, version in await cursor.fetchall():
+                versions[user_id] = version
+    return versions
+
+async def get_versioned_portfolio(user_id: str, known_version: int | None = None):
+    """A user's rows and their version, read in one transaction.
+
+    Returns (None, version) without reading the rows when the version
+    equals known_version.
+    """
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        await db.execute("BEGIN")
+        try:
+            async with db.execute(
+                "SELECT version FROM portfolio_versions WHERE user_id = ?", (user_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            version = row["version"] if row else 0
+            if known_version is not None and known_version == version:
+                return None, version
+            async with db.execute("SELECT * FROM portfolio WHERE user_id = ?", (user_id,)) as cursor:
+                rows = await cursor.fetchall()
+            return [dict(row) for row in rows], version
+        finally:
+            await db.rollback()
@@ -1,15 +1,58 @@
+import asyncio
+import contextvars
+import os
+import uuid
+from contextlib import asynccontextmanager, suppress
+
 from mcp.server import Server
+from mcp.server.session import ServerSession
 import mcp.types as types
 from mcp.server.sse import SseServerTransport
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
 from starlette.applications import Starlette
 from starlette.routing import Route
 from src.logger import get_logger
-from src.database.db_manager import get_portfolio, init_db
+from src.database.db_manager import get_portfolio, get_portfolio_versions, get_versioned_portfolio, init_db
 from starlette.responses import JSONResponse
 import json
 
 logger = get_logger("MCP_CORE")
-server = Server("fina-portfolio-vault")
+
+# Identifies the client connection a request handler runs for
+connection_id: contextvars.ContextVar[str] = contextvars.ContextVar("connection_id")
+
+class PortfolioVaultServer(Server):
+    def create_initialization_options(self, *args, **kwargs):
+        options = super().create_initialization_options(*args, **kwargs)
+        # Subscriptions are handled below; the low-level server does not advertise them itself
+        options.capabilities.resources.subscribe = True
+        return options
+
+    async def run(self, *args, **kwargs):
+        # Runs once per connection on either transport; handlers inherit the id
+        connection = uuid.uuid4().hex
+        token = connection_id.set(connection)
+        try:
+            return await super().run(*args, **kwargs)
+        finally:
+            # The connection ended: drop its subscriptions
+            subscriptions.pop(connection, None)
+            connection_id.reset(token)
+
+server = PortfolioVaultServer("fina-portfolio-vault")
+
+PORTFOLIO_URI_PREFIX = "portfolio://"
+# How often subscribed portfolios are checked for writes
+PORTFOLIO_WATCH_INTERVAL = float(os.getenv("PORTFOLIO_WATCH_INTERVAL", "0.5"))
+
+# Per connection: its session and subscribed portfolio URIs, with the version last announced
+subscriptions: dict[str, tuple[ServerSession, dict[str, int]]] = {}
+
+def user_from_uri(uri) -> str:
+    uri = str(uri)
+    if not uri.startswith(PORTFOLIO_URI_PREFIX) or len(uri) == len(PORTFOLIO_URI_PREFIX):
+        raise ValueError(f"Unknown resource: {uri}")
+    return uri[len(PORTFOLIO_URI_PREFIX):]
 
 @server.list_tools()
 async def handle_list_tools() -> list[types.Tool]:
@@ -20,7 +63,11 @@ async def handle_list_tools() -> list[types.Tool]:
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "user_id": {"type": "string", "description": "The unique identifier for the user."}
+                    "user_id": {"type": "string", "description": "The unique identifier for the user."},
+                    "known_version": {
+                        "type": "integer",
+                        "description": "Version the caller already holds; unchanged rows are not returned."
+                    }
                 },
                 "required": ["user_id"]
             }
@@ -36,13 +83,18 @@ async def handle_call_tool(name: str, arguments: dict | None) -> list[types.Text
             
         logger.info(f"Fetching portfolio for user: {user_id}")
         try:
-            data = await get_portfolio(user_id)
-            return [
-                types.TextContent(
-                    type="text",
-                    text=json.dumps(data, indent=2)
-                )
-            ]
+            data, version = await get_versioned_portfolio(user_id, arguments.get("known_version"))
+            if data is None:
+                return types.CallToolResult(content=[], _meta={"version": version, "not_modified": True})
+            return types.CallToolResult(
+                content=[
+                    types.TextContent(
+                        type="text",
+                        text=json.dumps(data, indent=2)
+                    )
+                ],
+                _meta={"version": version}
+            )
         except Exception as e:
             logger.error(f"Error fetching portfolio: {str(e)}")
             return [
@@ -54,10 +106,86 @@ async def handle_call_tool(name: str, arguments: dict | None) -> list[types.Text
             
     raise ValueError(f"Tool not found: {name}")
 
+@server.list_resources()
+async def handle_list_resources() -> list[types.Resource]:
+    return []
+
+@server.list_resource_templates()
+async def handle_list_resource_templates() -> list[types.ResourceTemplate]:
+    return [
+        types.ResourceTemplate(
+            uriTemplate=PORTFOLIO_URI_PREFIX + "{user_id}",
+            name="portfolio",
+            description="A user's portfolio. Subscribe to be notified when its rows change.",
+            mimeType="application/json"
+        )
+    ]
+
+@server.read_resource()
+async def handle_read_resource(uri) -> str:
+    return json.dumps(await get_portfolio(user_from_uri(uri)), indent=2)
+
+@server.subscribe_resource()
+async def handle_subscribe(uri) -> None:
+    user_id = user_from_uri(uri)
+    versions = await get_portfolio_versions([user_id])
+    _, uris = subscriptions.setdefault(connection_id.get(), (server.request_context.session, {}))
+    uris[str(uri)] = versions[user_id]
+
+@server.unsubscribe_resource()
+async def handle_unsubscribe(uri) -> None:
+    _, uris = subscriptions.get(connection_id.get(), (None, {}))
+    uris.pop(str(uri), None)
+
+async def notify_portfolio_changes() -> None:
+    """Push resources/updated to every session subscribed to a portfolio whose version changed."""
+    user_ids = {user_from_uri(uri) for _, uris in subscriptions.values() for uri in uris}
+    if not user_ids:
+        return
+    versions = await get_portfolio_versions(sorted(user_ids))
+    for connection, (session, uris) in list(subscriptions.items()):
+        for uri, announced in list(uris.items()):
+            version = versions.get(user_from_uri(uri), 0)
+            if version == announced:
+                continue
+            try:
+                await session.send_resource_updated(uri)
+                uris[uri] = version
+            except Exception:
+                # Session is gone: forget its subscriptions
+                subscriptions.pop(connection, None)
+                break
+
+async def watch_portfolio_versions() -> None:
+    while True:
+        try:
+            await notify_portfolio_changes()
+        except Exception as e:
+            logger.error(f"Error checking portfolio versions: {str(e)}")
+        await asyncio.sleep(PORTFOLIO_WATCH_INTERVAL)
+
+def start_version_watcher() -> asyncio.Task:
+    return asyncio.get_running_loop().create_task(watch_portfolio_versions())
+
+# Legacy transport: a long-lived GET /sse stream plus POST /messages per request
 sse = SseServerTransport("/messages")
+# Streamable HTTP: every request is a POST to /mcp, answered inline or as a short stream
+streamable_http = StreamableHTTPSessionManager(server)
+
+@asynccontextmanager
+async def lifespan(app):
+    await init_db()
+    watcher = start_version_watcher()
+    try:
+        async with streamable_http.run():
+            yield
+    finally:
+        watcher.cancel()
+        with suppress(asyncio.CancelledError):
+            await watcher
 
 starlette_app = Starlette(
-    on_startup=[init_db],
+    lifespan=lifespan,
     routes=[
         Route("/health", endpoint=lambda r: JSONResponse({"status": "ok"})),
         Route("/sse", endpoint=lambda r: sse.connect_sse(r.scope, r.receive, r._send)),
@@ -67,6 +195,9 @@ starlette_app = Starlette(
 async def app(scope, receive, send):
     path = scope.get("path", "")
 
+    if path == "/mcp" or path.startswith("/mcp/"):
+        return await streamable_http.handle_request(scope, receive, send)
+
     if path.startswith("/messages"):
         return await sse.handle_post_message(scope, receive, send)
 
@@ -0,0 +1,38 @@
+import aiosqlite
+import pytest
+import pytest_asyncio
+from src.database import db_manager
+
+@pytest_asyncio.fixture
+async def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "portfolio.db")
+    monkeypatch.setattr(db_manager, "DB_PATH", path)
+    await db_manager.init_db()
+    return path
+
+@pytest.mark.asyncio
+async def test_writes_bump_the_user_version(db_path):
+    versions = await db_manager.get_portfolio_versions(["user123", "user456"])
+    assert versions == {"user123": 2, "user456": 0}
+
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute("UPDATE portfolio SET shares = 20 WHERE symbol = 'AAPL'")
+        await db.execute("INSERT INTO portfolio (user_id, symbol, shares, avg_price) VALUES ('user456', 'MSFT', 1, 400.0)")
+        await db.commit()
+
+    versions = await db_manager.get_portfolio_versions(["user123", "user456"])
+    assert versions == {"user123": 3, "user456": 1}
+
+@pytest.mark.asyncio
+async def test_known_version_skips_the_rows(db_path):
+    rows, version = await db_manager.get_versioned_portfolio("user123")
+    assert {row["symbol"] for row in rows} == {"AAPL", "NVDA"}
+
+    assert await db_manager.get_versioned_portfolio("user123", known_version=version) == (None, version)
+
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute("DELETE FROM portfolio WHERE symbol = 'NVDA'")
+        await db.commit()
+    rows, new_version = await db_manager.get_versioned_portfolio("user123", known_version=version)
+    assert new_version == version + 1
+    assert [row["symbol"] for row in rows] == ["AAPL"]
@@ -1,5 +1,9 @@
+import aiosqlite
 import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+from src import server as node
 from src.server import server
+from src.database import db_manager
 import mcp.types as types
 
 @pytest.mark.asyncio
@@ -41,3 +45,26 @@ async def test_handle_call_tool_not_found():
     )
     with pytest.raises(ValueError, match="Tool not found: unknown_tool"):
         await handler(request)
+
+@pytest.mark.asyncio
+async def test_subscriptions_are_pushed_and_dropped_with_the_connection(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_manager, "DB_PATH", str(tmp_path / "portfolio.db"))
+    await db_manager.init_db()
+    updates = []
+
+    async def on_message(message):
+        if isinstance(getattr(message, "root", None), types.ResourceUpdatedNotification):
+            updates.append(str(message.root.params.uri))
+
+    async with create_connected_server_and_client_session(server, message_handler=on_message) as client:
+        await client.subscribe_resource("portfolio://user123")
+        assert len(node.subscriptions) == 1
+
+        async with aiosqlite.connect(db_manager.DB_PATH) as db:
+            await db.execute("UPDATE portfolio SET shares = 1 WHERE symbol = 'AAPL'")
+            await db.commit()
+        await node.notify_portfolio_changes()
+        await client.send_ping()
+        assert updates == ["portfolio://user123"]
+
+    assert node.subscriptions == {}